@@ -0,0 +1,154 @@
+"""
+batch.py
+Modo em lote: processa todos os arquivos .lenhs de uma pasta sem criar janelas e salva os resultados em CSV e JSON.
+Uso: python -m app.batch PASTA [-o SAIDA] [-j PROCESSOS]
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import app.global_variables as gv
+import app.project as project
+import app.calculations as calculations
+
+def processFile(path):
+    ''' Calcula todos os resultados disponíveis para o arquivo em `path` e retorna um dicionário.
+    Erros de um arquivo não interrompem o lote; a mensagem fica em 'erro'. '''
+
+    result = {'arquivo': os.path.basename(path), 'erro': ''}
+
+    try:
+        data = project.loadProject(path)
+        result.update(getResults(data))
+    except Exception as e:
+        result['erro'] = f'{type(e).__name__}: {e}'
+
+    return result
+
+def getResults(data):
+    ''' Recebe o dicionário de `project.loadProject()` e retorna os resultados de cada seção preenchida. '''
+
+    results = {}
+    parametros = data['parameters']
+    expenses = data['expenses']
+
+    if parametros:
+        results['energia'] = calculations.getEnergyIndicators(parametros)
+
+        if expenses and None not in expenses['aliquotas']:
+            if None not in expenses['green']:
+                results['tarifaVerde'] = calculations.getGreenTariff(parametros, expenses['aliquotas'], expenses['green'])
+            if None not in expenses['blue']:
+                results['tarifaAzul'] = calculations.getBlueTariff(parametros, expenses['aliquotas'], expenses['blue'])
+
+    if data['pump']:
+        q, h = data['pump']
+        P2, R2 = calculations.getPumpCurve(q, h)
+        results['bomba'] = {'a': float(P2[0]), 'b': float(P2[1]), 'c': float(P2[2]), 'R2': float(R2)}
+
+        if data['system']:
+            B, C, d, HG = calculations.fitSystemCurve(q, data['system'])
+            results['sistema'] = {'B': float(B), 'C': float(C), 'd': float(d), 'HG': float(HG)}
+
+            ponto, mensagem = calculations.getOperationPoint(q, h, data['system'])
+            if ponto:
+                results['pontoOperacao'] = {'vazao': ponto[0], 'altura': ponto[1]}
+            else:
+                results['pontoOperacao'] = {'erro': mensagem}
+
+    if data['hydric']:
+        for i in range(0, 2):
+            form = data['hydric'][i]
+            if not form:
+                continue
+
+            # Um formulário sem os dados de consumo de que precisa não descarta os demais resultados do arquivo.
+            try:
+                results[f'reservatorio{i + 1}'] = calculations.getHydricBalance(form, data['water'])
+            except ValueError as e:
+                results[f'reservatorio{i + 1}'] = {'erro': str(e)}
+
+    return results
+
+def flattenResult(result):
+    ''' Transforma o dicionário de `processFile()` em uma linha de CSV. Ex: {'energia': {'consumoTotal': 1.0}} -> {'energia.consumoTotal': 1.0} '''
+
+    row = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            for subKey, subValue in value.items():
+                row[f'{key}.{subKey}'] = subValue
+        else:
+            row[key] = value
+
+    return row
+
+def writeCSV(results, path):
+    ''' Salva os resultados em um CSV, com uma linha por arquivo. '''
+
+    rows = [flattenResult(result) for result in results]
+
+    # Mantém a ordem em que as colunas aparecem.
+    columns = []
+    for row in rows:
+        for key in row.keys():
+            if key not in columns:
+                columns.append(key)
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def writeJSON(results, path):
+    ''' Salva os resultados em um JSON. '''
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+
+def getProjectFiles(folder):
+    ''' Retorna a lista ordenada dos arquivos .lenhs em `folder`. '''
+
+    files = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(gv.file_suffix):
+            files.append(os.path.join(folder, name))
+
+    return files
+
+def runBatch(folder, output=None, workers=None):
+    ''' Processa os arquivos de `folder` em paralelo e salva resultados.csv e resultados.json em `output`
+    (por padrão, a própria pasta). Retorna a lista de resultados. '''
+
+    files = getProjectFiles(folder)
+    output = output or folder
+    os.makedirs(output, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Arquivos pequenos e numerosos: agrupamos para reduzir a troca de mensagens entre processos.
+        chunksize = max(1, len(files) // (4 * (workers or os.cpu_count() or 1)))
+        results = list(executor.map(processFile, files, chunksize=chunksize))
+
+    writeCSV(results, os.path.join(output, 'resultados.csv'))
+    writeJSON(results, os.path.join(output, 'resultados.json'))
+
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.batch', description='Processa arquivos .lenhs sem interface gráfica.')
+    parser.add_argument('pasta', help='pasta com os arquivos .lenhs')
+    parser.add_argument('-o', '--saida', help='pasta onde resultados.csv e resultados.json serão salvos')
+    parser.add_argument('-j', '--processos', type=int, help='quantidade de processos (padrão: número de CPUs)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = runBatch(args.pasta, args.saida, args.processos)
+    errors = sum(1 for result in results if result['erro'])
+
+    print(f'{len(results)} arquivos processados em {time.perf_counter() - start:.1f} s, {errors} com erro.')
+
+if __name__ == '__main__':
+    main()
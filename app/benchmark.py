@@ -0,0 +1,597 @@
+"""
+benchmark.py
+Medições de desempenho dos cálculos do programa. Não depende do wx.
+Execute a partir da raiz do projeto com `python -m app.benchmark`.
+"""
+
+import os
+import csv
+import json
+import time
+import datetime
+import tempfile
+import tracemalloc
+import numpy as np
+import app.reservoir as reservoir
+import app.calculations as calculations
+import app.hydraulics as hydraulics
+import app.file_manager as fm
+import app.global_variables as gv
+import app.water_import as water_import
+import app.water_cache as water_cache
+import app.project as project
+import app.water_series as water_series
+import app.water_store as water_store
+import app.indicators as indicators
+import app.downsample as downsample
+import app.water_reference as water_reference
+import app.matching as matching
+import app.data_processing as dp
+
+def getReferenceCurve(vazaoMedia=50):
+    ''' Retorna uma curva de demanda de 24 valores (m³/h) a partir do primeiro perfil do banco de dados de consumo de água. '''
+
+    with open('assets/files/water_database.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    fatores = np.array([float(value) for value in data[0]['data'].split(',')])
+    return fatores * vazaoMedia
+
+def bestTime(function, repeat=3):
+    ''' Executa `function` `repeat` vezes e retorna uma tupla com o menor tempo (s) e o último resultado. '''
+
+    best = float('inf')
+    result = None
+    for _ in range(0, repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return (best, result)
+
+def benchReservoir(diasList=(1, 30, 365)):
+    ''' Compara `reservoir.simulate()` (minuto a minuto) com `reservoir.simulateEvents()` (orientado a eventos). '''
+
+    curva = getReferenceCurve()
+    volDia = curva.sum()
+    volMaximo = volDia * 0.3
+    volMinimo = volDia * 0.1
+    volInicial = volDia * 0.2
+    vazoesSum = curva.max() * 1.5 / 3600
+
+    print('Balanço hídrico: minuto a minuto x eventos')
+    print(f'{"dias":>6} {"minutos (ms)":>14} {"eventos (ms)":>14} {"trocas":>8} {"dif. máx. (m³)":>16} {"ok":>4}')
+
+    for diasSim in diasList:
+        demanda = reservoir.getCurveDemand(curva, diasSim)
+        blocos, duracao = reservoir.getCurveBlocks(curva, diasSim)
+
+        tMinutos, (volume, liga, vazio) = bestTime(lambda: reservoir.simulate(demanda, volInicial, volMaximo, volMinimo, vazoesSum))
+        tEventos, (pontos, trocas, vazioEventos) = bestTime(lambda: reservoir.simulateEvents(blocos, duracao, volInicial, volMaximo, volMinimo, vazoesSum))
+
+        volumeEventos, ligaEventos = reservoir.expandEvents(pontos, trocas, len(demanda))
+        diferenca = float(np.abs(volume - volumeEventos).max())
+        ok = diferenca <= reservoir.TOLERANCIA_VOLUME * max(1, volMaximo) and np.array_equal(liga, ligaEventos) and vazio == vazioEventos
+
+        print(f'{diasSim:>6} {tMinutos * 1000:>14.2f} {tEventos * 1000:>14.2f} {len(trocas) - 1:>8} {diferenca:>16.2e} {"sim" if ok else "não":>4}')
+
+def getSyntheticRows(dias=365, intervalo=1):
+    ''' Gera as linhas (data, horário, consumo) de `dias` de medições a cada `intervalo` minutos, seguindo a curva de referência. '''
+
+    curva = getReferenceCurve()
+    inicio = datetime.date(2021, 1, 1)
+    rng = np.random.default_rng(0)
+    minutos = range(0, reservoir.MINUTOS_DIA, intervalo)
+
+    for dia in range(0, dias):
+        date = (inicio + datetime.timedelta(days=dia)).strftime('%d/%m/%Y')
+        ruido = rng.normal(1, 0.05, len(minutos))
+        for k, minuto in enumerate(minutos):
+            yield (date, f'{minuto // 60:02d}:{minuto % 60:02d}', f'{curva[minuto // 60] * ruido[k]:.2f}')
+
+def writeSyntheticProject(path, dias=365, intervalo=1):
+    ''' Escreve em `path` um arquivo .lenhs com `dias` de consumo de água e os Parâmetros do Sistema. '''
+
+    with open(path, 'w') as f:
+        f.write('#water_consumption_start\n')
+        for row in getSyntheticRows(dias, intervalo):
+            f.write(' '.join(row) + '\n')
+        f.write('#water_consumption_end\n')
+        f.write('#parameters_start\n0.05\n60\n0.9\n0.75\n1\n3\n21\n#parameters_end\n')
+
+def writeSyntheticWaterFiles(folder, dias=365, intervalo=1):
+    ''' Escreve em `folder` os arquivos agua.txt, agua.csv e agua.xlsx com `dias` de medições a cada `intervalo` minutos,
+    seguindo a curva de referência. Retorna a lista com os caminhos dos arquivos. '''
+
+    from openpyxl import Workbook
+
+    rows = lambda: getSyntheticRows(dias, intervalo)
+    paths = [os.path.join(folder, name) for name in ('agua.txt', 'agua.csv', 'agua.xlsx')]
+
+    with open(paths[0], 'w') as f:
+        for row in rows():
+            f.write(' '.join(row) + '\n')
+
+    with open(paths[1], 'w', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['Data', 'Hora', 'Consumo'])
+        for date, hora, value in rows():
+            writer.writerow([date, hora, value.replace('.', ',')])
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['Data', 'Hora', 'Consumo'])
+    for date, hora, value in rows():
+        sheet.append([datetime.datetime.strptime(date, '%d/%m/%Y'), datetime.time(int(hora[:2]), int(hora[3:])), float(value)])
+    workbook.save(paths[2])
+
+    return paths
+
+def legacyTxtImport(path):
+    ''' Importação de .txt como era feita pela janela de consumo: lista de dicionários com strings e `fm.analizeWaterData()`. '''
+
+    data = []
+    with open(path, 'r') as f:
+        for line in f.readlines():
+            words = line.split()
+            data.append({'date': words[0], 'time': words[1], 'value': words[2]})
+
+    return fm.analizeWaterData(data)
+
+def benchWaterImport(dias=365):
+    ''' Mede a importação em blocos de arquivos sintéticos com um ano de dados a cada minuto. '''
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = writeSyntheticWaterFiles(folder, dias)
+        linhas = dias * reservoir.MINUTOS_DIA
+
+        print(f'Importação de consumo de água: {dias} dias a cada minuto ({linhas} linhas)')
+        print(f'{"arquivo":>10} {"tamanho (MB)":>14} {"blocos (s)":>12} {"linhas/s":>12} {"arrays (MB)":>12}')
+
+        for path in paths:
+            t, arrays = bestTime(lambda: water_import.importWaterFile(path), 1)
+            memoria = sum(a.nbytes for a in arrays) / 2**20
+            tamanho = os.path.getsize(path) / 2**20
+
+            print(f'{os.path.basename(path):>10} {tamanho:>14.1f} {t:>12.2f} {len(arrays[0]) / t:>12.0f} {memoria:>12.1f}')
+
+        t, ok = bestTime(lambda: legacyTxtImport(paths[0]), 1)
+        print(f'Importação antiga do .txt (lista de dicionários + analizeWaterData): {t:.2f} s, válido: {"sim" if ok else "não"}')
+
+def legacyProjectOpen(path):
+    ''' Abertura como era feita pelo programa: `readlines()`, lista de dicionários e `fm.analizeWaterData()`. '''
+
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    data = fm.copyWaterFileDataToList(lines, project.getSectionIndices(lines))
+    return fm.analizeWaterData(data)
+
+def benchProjectOpen(dias=365):
+    ''' Mede o tempo para ler e validar os dados de consumo de água de um projeto .lenhs, com e sem o cache binário. '''
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'projeto.lenhs')
+        writeSyntheticProject(path, dias)
+        abrir = lambda useCache=True: project.LenhsDocument(path, useCache).getWaterData()
+
+        tAntigo, _ = bestTime(lambda: legacyProjectOpen(path), 1)
+        tSem, serie = bestTime(lambda: abrir(False))
+        tFrio, _ = bestTime(abrir, 1)       # Primeira abertura: converte o texto e grava o cache.
+        tQuente, _ = bestTime(abrir)
+
+        # Salvar outra seção muda o mtime, mas não a seção de água: o hash confirma o cache.
+        project.saveSection(path, 'parameters', ['0.06\n', '60\n', '0.9\n', '0.75\n', '1\n', '0\n', '24\n'])
+        tHash, _ = bestTime(abrir, 1)
+
+        print(f'Abertura de projeto: {dias} dias a cada minuto ({len(serie)} linhas, {os.path.getsize(path) / 2**20:.1f} MB)')
+        print(f'{"leitura":>34} {"tempo (ms)":>12}')
+        for nome, t in [('antiga (lista de dicionários)', tAntigo), ('texto, sem cache', tSem), ('cache frio (grava o .npz)', tFrio),
+            ('cache, mtime igual', tQuente), ('cache, mtime mudou, hash igual', tHash)]:
+            print(f'{nome:>34} {t * 1000:>12.1f}')
+
+        print(f'Tamanho do cache: {os.path.getsize(water_cache.getCachePath(path)) / 2**20:.1f} MB')
+
+def legacyGuiOpen(path):
+    ''' Abertura de um projeto pela janela de consumo como era feita: `readlines()`, `isFileIntegrityOK()` com a lista de
+    dicionários e `fm.analizeWaterData()`, e a mesma lista montada e validada de novo para a tabela. '''
+
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    indices = project.getSectionIndices(lines)
+    ok = fm.analizeWaterData(fm.copyWaterFileDataToList(lines, indices))
+
+    data = fm.copyWaterFileDataToList(lines, indices)
+    return ok and fm.analizeWaterData(data)
+
+def guiOpen(path):
+    ''' Abertura de um projeto pela janela de consumo, sem o wx: as variáveis de `fm.openAndUpdateFileVariables()`,
+    `fm.isFileIntegrityOK()` e os dados de `fm.getWaterData()`, que reaproveitam a leitura da verificação. '''
+
+    fm.clearFileVariables()
+    gv.file_path = path
+    gv.opened_file = open(path, 'r')
+    fm.getEntrysDictAndFile()
+
+    ok = fm.isFileIntegrityOK()
+    serie = fm.getWaterData()
+    fm.clearFileVariables()
+
+    return ok and serie is not None
+
+def benchGuiOpen(dias=365):
+    ''' Mede a abertura de um projeto como a janela de consumo de água a faz, até ter os dados da tabela, sem desenhar a janela. '''
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'projeto.lenhs')
+        writeSyntheticProject(path, dias)
+
+        tAntigo, okAntigo = bestTime(lambda: legacyGuiOpen(path), 1)
+        tFrio, okFrio = bestTime(lambda: guiOpen(path), 1)     # Sem o cache: converte o texto e grava o .npz.
+        tQuente, okQuente = bestTime(lambda: guiOpen(path))
+
+        print(f'Abertura pela janela de consumo: {dias} dias a cada minuto ({os.path.getsize(path) / 2**20:.1f} MB)')
+        print(f'Antiga: {tAntigo * 1000:.0f} ms | Cache frio: {tFrio * 1000:.0f} ms | Cache: {tQuente * 1000:.0f} ms | '
+            f'válido: {"sim" if okAntigo and okFrio and okQuente else "não"}')
+
+def getSyntheticChunks(dias, tamanho=water_import.TAMANHO_BLOCO):
+    ''' Gera blocos (ordinais, minutos, valores) de dias inteiros a cada minuto, como os de `water_import.readChunks()`,
+    sem passar por texto. '''
+
+    curva = np.repeat(getReferenceCurve(), 60)
+    rng = np.random.default_rng(0)
+    inicio = datetime.date(2021, 1, 1).toordinal()
+    porBloco = max(1, tamanho // reservoir.MINUTOS_DIA)
+
+    for primeiro in range(0, dias, porBloco):
+        n = min(porBloco, dias - primeiro)
+        ordinais = np.repeat(np.arange(inicio + primeiro, inicio + primeiro + n, dtype=np.int32), reservoir.MINUTOS_DIA)
+        minutos = np.tile(np.arange(0, reservoir.MINUTOS_DIA, dtype=np.int16), n)
+        valores = np.tile(curva, n) * rng.normal(1, 0.05, n * reservoir.MINUTOS_DIA)
+        yield (ordinais, minutos, valores)
+
+def peakMemory(function):
+    ''' Executa `function` e retorna uma tupla com o tempo (s) e o pico de memória alocada (MB) durante a execução. '''
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    t = time.perf_counter() - start
+    pico = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    return (t, pico)
+
+def benchWaterStore(anosList=(1, 5, 10)):
+    ''' Compara o pico de memória do resumo diário (indicadores e dia de maior consumo) com a WaterSeries em memória
+    e com a WaterStore, que percorre a série em blocos. '''
+
+    print('Resumo diário: série em memória x fora da memória (memmap)')
+    print(f'{"anos":>6} {"linhas":>10} {"memória (s)":>12} {"pico (MB)":>10} {"memmap (s)":>12} {"pico (MB)":>10} {"ok":>4}')
+
+    for anos in anosList:
+        dias = anos * 365
+
+        with tempfile.TemporaryDirectory() as folder:
+            store = water_store.WaterStore.build(folder, getSyntheticChunks(dias))
+
+            resultado = {}
+            def emMemoria():
+                serie = water_series.WaterSeries(*(np.concatenate(a) for a in zip(*getSyntheticChunks(dias))))
+                resultado['memoria'] = indicators.getMaxDay(indicators.getDailyIndicators(serie))
+
+            def foraDaMemoria():
+                resultado['memmap'] = indicators.getMaxDay(indicators.getDailyIndicators(water_store.WaterStore(folder)))
+
+            tMemoria, picoMemoria = peakMemory(emMemoria)
+            tMemmap, picoMemmap = peakMemory(foraDaMemoria)
+            ok = np.allclose(resultado['memoria'], resultado['memmap'])
+
+            print(f'{anos:>6} {len(store):>10} {tMemoria:>12.2f} {picoMemoria:>10.1f} {tMemmap:>12.2f} {picoMemmap:>10.1f} {"sim" if ok else "não":>4}')
+
+def legacyFatorPerdaCarga(rugosidade, diametro, reynolds):
+    ''' Fator de perda de carga como era calculado por `calculations.fatorPerdaCarga()`: um único número de Reynolds
+    por iteração de ponto fixo. '''
+
+    if reynolds < 2300:
+        result = 64 / reynolds
+
+    else:
+        f0 = 0.000001
+        f1 = (1 / 4) * pow(np.log10(rugosidade / (3.706 * diametro) + 2.51 / (reynolds * np.sqrt(f0))), -2)
+        k = abs((f1 - f0) / f1)
+
+        while k > 0.000001:
+            f1 = (1 / 4) * pow(np.log10(rugosidade / (3.706 * diametro) + 2.51 / (reynolds * np.sqrt(f0))), -2)
+            k = abs((f1 - f0) / f1)
+            f0 = f1
+
+        result = f1
+
+    return result
+
+def benchColebrook(pontos=5000):
+    ''' Compara o fator de atrito vetorizado (`hydraulics.fatorAtrito()`) com a iteração escalar de
+    `legacyFatorPerdaCarga()`: tempo para `pontos` números de Reynolds e maior diferença relativa. '''
+
+    reynolds = np.logspace(np.log10(hydraulics.REYNOLDS_LAMINAR), 8, pontos)
+    sistema = {'diametro': 0.3, 'rugosidade': 0.00015, 'comprimento': 1200, 'desnivel': 30, 'singularidades': 25}
+    vazoes = np.linspace(0, 0.5, pontos)
+
+    print(f'Fator de atrito de Colebrook: {pontos} pontos, Re de 2300 a 1e8')
+    print(f'{"rugosidade (m)":>16} {"escalar (ms)":>14} {"vetorizado (ms)":>16} {"dif. relativa":>14}')
+
+    for rugosidade in (0, 0.000015, 0.00015, 0.0015):
+        tEscalar, antigo = bestTime(lambda: np.array([legacyFatorPerdaCarga(rugosidade, sistema['diametro'], re) for re in reynolds]), 1)
+        tVetor, novo = bestTime(lambda: hydraulics.fatorAtrito(rugosidade, sistema['diametro'], reynolds))
+        diferenca = float((np.abs(novo - antigo) / antigo).max())
+
+        print(f'{rugosidade:>16} {tEscalar * 1000:>14.1f} {tVetor * 1000:>16.2f} {diferenca:>14.1e}')
+
+    t, _ = bestTime(lambda: hydraulics.alturaSistema(vazoes, sistema))
+    print(f'Curva do Sistema com {pontos} vazões em uma chamada: {t * 1000:.2f} ms')
+
+def benchOperationPoint(n=1000):
+    ''' Mede quantos pontos de operação `calculations.solveOperationPoint()` resolve por segundo, variando o desnível. '''
+
+    q = np.array([0, 0.05, 0.1, 0.15, 0.2, 0.25])
+    h = np.array([80, 78, 74, 67, 58, 46])
+    P2, R2 = calculations.getPumpCurve(q, h)
+    sistema = {'diametro': 0.3, 'rugosidade': 0.00015, 'comprimento': 1200, 'desnivel': 30, 'singularidades': 25}
+    desniveis = np.linspace(10, 70, n)
+
+    def resolver():
+        pontos = []
+        for desnivel in desniveis:
+            sistema['desnivel'] = desnivel
+            pontos.append(calculations.solveOperationPoint(P2, sistema, q.min(), q.max()))
+        return pontos
+
+    t, pontos = bestTime(resolver, 1)
+    unicos = sum(1 for p in pontos if len(p) == 1)
+    print(f'Ponto de operação (brentq): {n} sistemas em {t:.2f} s ({n / t:.0f} por segundo), {unicos} com uma única interseção')
+
+def legacyUsageHours(horas, valores, vazaoMedia):
+    ''' Indicadores de um dia como o antigo `GraphCalendar.getUsageHours()`: uma iteração por medição, com
+    `dp.getTimesDifference()` entre horários. Retorna (horasAcima, horasAbaixo, consumoPonta, consumoForaPonta). '''
+
+    above, below, ponta, foraPonta = 0, 0, 0, 0
+    lastTime = horas[0]
+
+    for now, value in zip(horas, valores):
+        h = int(now.split(':')[0])
+
+        if h >= 18 and h <= 20:
+            ponta += value
+        else:
+            foraPonta += value
+
+        if value >= vazaoMedia:
+            above += dp.getTimesDifference(lastTime, now)
+        else:
+            below += dp.getTimesDifference(lastTime, now)
+
+        lastTime = now
+
+    return (above, below, ponta, foraPonta)
+
+def benchIndicators(dias=365):
+    ''' Compara os indicadores diários de `indicators.getDailyIndicators()`, todos os dias de uma vez, com o cálculo antigo
+    dia a dia, para um ano de dados a cada minuto. '''
+
+    serie = water_series.WaterSeries(*(np.concatenate(a) for a in zip(*getSyntheticChunks(dias))))
+    horas = [f'{m // 60:02d}:{m % 60:02d}' for m in range(0, reservoir.MINUTOS_DIA)]
+
+    def antigo():
+        resultado = []
+        for i in range(0, serie.getDaysCount()):
+            valores = serie.getDay(i)[1].tolist()
+            resultado.append(legacyUsageHours(horas, valores, float('{:.2f}'.format(sum(valores) / len(valores)))))
+        return np.array(resultado)
+
+    tAntigo, referencia = bestTime(antigo, 1)
+    tNovo, tabela = bestTime(lambda: indicators.getDailyIndicators(serie))
+
+    novo = np.column_stack([tabela[name] for name in ('horasAcima', 'horasAbaixo', 'consumoPonta', 'consumoForaPonta')])
+    diferenca = float((np.abs(novo - referencia) / np.maximum(np.abs(referencia), 1e-12)).max())
+
+    print(f'Indicadores diários: {dias} dias, {len(serie)} medições')
+    print(f'Dia a dia: {tAntigo:.2f} s | Todos os dias: {tNovo * 1000:.1f} ms | Maior diferença relativa: {diferenca:.1e}')
+
+def benchDownsample(dias=365, pixels=1000):
+    ''' Mede a redução de uma simulação de `dias` dias, minuto a minuto, para `pixels` pixels de largura e confere se o
+    menor e o maior volume continuam entre os pontos desenhados e se as trocas da bomba são as de `simulateEvents()`. '''
+
+    curva = getReferenceCurve()
+    volDia = curva.sum()
+    parametros = (volDia * 0.2, volDia * 0.3, volDia * 0.1, curva.max() * 1.5 / 3600)
+    volume, liga, _ = reservoir.simulate(reservoir.getCurveDemand(curva, dias), *parametros)
+    _, trocasEventos, _ = reservoir.simulateEvents(*reservoir.getCurveBlocks(curva, dias), *parametros)
+
+    t, indices = bestTime(lambda: downsample.minMaxIndices(volume, 0, len(volume), pixels))
+    tTrocas, trocas = bestTime(lambda: reservoir.getTransitions(liga))
+    extremos = volume[indices].min() == volume.min() and volume[indices].max() == volume.max()
+
+    print(f'Gráfico do reservatório: {len(volume)} minutos -> {len(indices)} pontos em {t * 1000:.1f} ms (extremos preservados: {"sim" if extremos else "não"})')
+    print(f'Bomba: {len(liga)} minutos -> {len(trocas)} trocas de estado em {tTrocas * 1000:.1f} ms (iguais às de eventos: {"sim" if np.array_equal(trocas, trocasEventos) else "não"})')
+
+def benchCharts(n=100):
+    ''' Mede o tempo de cada desenho e a memória retida após `n` gráficos de um dia em dois casos. No primeiro, cada gráfico
+    cria uma figura nova no pyplot, que nunca é fechada, como era antes. No segundo, uma única figura é reaproveitada,
+    como nas janelas de `app/windows/charts.py`. O FigureCanvasWxAgg desenha com o mesmo canvas Agg usado aqui. '''
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import app.figures as figures
+
+    curva = np.repeat(getReferenceCurve(), 60)
+    rng = np.random.default_rng(0)
+    x = np.datetime64('2021-01-01T00:00') + np.arange(reservoir.MINUTOS_DIA).astype('timedelta64[m]')
+    dias = [curva * rng.normal(1, 0.05, len(curva)) for _ in range(n)]
+
+    def figurasNovas():
+        for i, y in enumerate(dias):
+            figures.getDayFigure(x, y, f'Dia {i + 1}', f'Vazão Máxima: {y.max():.2f}').canvas.draw()
+
+    def figuraReaproveitada():
+        fig = Figure(figsize=figures.TAMANHO)
+        FigureCanvasAgg(fig)
+        for i, y in enumerate(dias):
+            figures.getDayFigure(x, y, f'Dia {i + 1}', f'Vazão Máxima: {y.max():.2f}', fig=fig)
+            fig.canvas.draw()
+
+    print(f'Gráfico de um dia, {n} desenhos')
+    for nome, function in (('Figura nova no pyplot', figurasNovas), ('Figura reaproveitada', figuraReaproveitada)):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        function()
+        t = time.perf_counter() - inicio
+        retida = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+
+        print(f'{nome}: {t / n * 1000:.1f} ms por desenho, {retida:.1f} MB retidos, {len(plt.get_fignums())} figuras abertas no pyplot')
+
+    plt.close('all')
+
+def legacyReferenceIndicators(valores):
+    ''' Os 15 indicadores de um perfil do banco de dados como a antiga `WaterDataBase.setIndicadoresVariables()`. '''
+
+    total, maximo = sum(valores), max(valores)
+    media = total / 24
+    k2 = maximo / media
+    ponta = sum(valores[18:21])
+    tempoABM = sum(1 for value in valores if value < media)
+    consumoABM = sum(value for value in valores if value < media)
+    consumoACM = sum(value for value in valores if value > media)
+
+    return [media, maximo, k2, 1 / k2, ponta, ponta / total, tempoABM, 24 - tempoABM, total - ponta, (total - ponta) / total,
+        ponta / (total - ponta), consumoABM, consumoABM / total, consumoACM, consumoACM / total]
+
+def benchWaterReference(tamanhos=(21, 1000, 10000), texto='campus do vale'):
+    ''' Mede a abertura da lista e a pesquisa a cada tecla digitada em `texto` no banco de dados de referência em SQLite,
+    com `tamanhos` locais (cópias dos perfis do arquivo .json com nomes numerados), e confere os indicadores calculados na
+    importação com o cálculo antigo. '''
+
+    with open(water_reference.PATH, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    teclas = [texto[:i] for i in range(1, len(texto) + 1)]
+    _, perfis = water_reference.parseItems(items)
+    referencia = np.array([legacyReferenceIndicators(perfil.tolist()) for perfil in perfis])
+    iguais = np.allclose(water_reference.getIndicators(perfis), referencia, equal_nan=True)
+
+    print(f'Banco de dados de referência: pesquisa de {len(teclas)} teclas (indicadores iguais aos antigos: {"sim" if iguais else "não"})')
+    print(f'{"locais":>8} {"importação (s)":>15} {"abertura (ms)":>14} {"por tecla (ms)":>15} {"tecla mais lenta (ms)":>22}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        for tamanho in tamanhos:
+            copias = [dict(item, name=f"{item['name']} {i}") for i in range(0, -(-tamanho // len(items))) for item in items]
+            store = water_reference.WaterReference(os.path.join(folder, f'{tamanho}.sqlite'))
+
+            tImportacao, _ = bestTime(lambda: store.importItems(copias[:tamanho]), 1)
+            tAbertura, _ = bestTime(lambda: (len(store), store.search()))
+            tempos = [bestTime(lambda: store.search(tecla))[0] for tecla in teclas]
+            store.close()
+
+            print(f'{tamanho:>8} {tImportacao:>15.2f} {tAbertura * 1000:>14.2f} {sum(tempos) / len(tempos) * 1000:>15.2f} {max(tempos) * 1000:>22.2f}')
+
+def legacyMatch(curva, validos, perfis, k):
+    ''' Os `k` perfis mais próximos de um dia, comparando perfil a perfil e hora a hora. Retorna a lista de posições dos perfis. '''
+
+    distancias = []
+    for perfil in perfis.tolist():
+        erros = [(valor - p) ** 2 for valor, p, valido in zip(curva.tolist(), perfil, validos.tolist()) if valido]
+        distancias.append((sum(erros) / len(erros)) ** 0.5)
+
+    return sorted(range(len(distancias)), key=lambda i: distancias[i])[:k]
+
+def benchMatching(anosList=(1, 10), tamanhos=(21, 10000), k=3):
+    ''' Mede `matching.matchDays()` para `anosList` anos de medições a cada minuto contra `tamanhos` perfis de referência
+    (os do arquivo .json e cópias com ruído), e confere os mais próximos com a comparação perfil a perfil para um ano. '''
+
+    with open(water_reference.PATH, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+
+    rng = np.random.default_rng(0)
+    _, base = water_reference.parseItems(items)
+
+    print(f'Perfis de referência semelhantes: os {k} mais próximos de cada dia e do dia típico')
+    print(f'{"anos":>6} {"perfis":>8} {"tempo (s)":>10} {"pico (MB)":>10} {"ok":>4}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        for tamanho in tamanhos:
+            store = water_reference.WaterReference(os.path.join(folder, f'{tamanho}.sqlite'))
+            perfis = np.tile(base, (-(-tamanho // len(base)), 1))[:tamanho]
+            perfis[len(base):] *= rng.normal(1, 0.1, perfis[len(base):].shape)
+            store.importItems([{'name': f'Perfil {i}', 'region': 'sul', 'data': perfil} for i, perfil in enumerate(perfis.tolist())])
+
+            for anos in anosList:
+                serie = water_series.WaterSeries(*(np.concatenate(a) for a in zip(*getSyntheticChunks(365 * anos))))
+                t, pico = peakMemory(lambda: matching.matchDays(serie, store, k))
+                resultado = matching.matchDays(serie, store, k)
+
+                ok = '-'
+                if anos == 1 and tamanho <= 1000:
+                    ids, normalizados = store.getProfileMatrix()
+                    normalizados, _ = matching.normalize(normalizados, np.ones(normalizados.shape, dtype=bool))
+                    curvas, validos = matching.getHourlyDays(serie.inicios, serie.minutos, serie.valores)
+                    iguais = all(np.array_equal(ids[legacyMatch(curvas[i], validos[i], normalizados, k)], resultado['ids'][i])
+                        for i in range(0, serie.getDaysCount()))
+                    ok = 'sim' if iguais else 'não'
+
+                print(f'{anos:>6} {tamanho:>8} {t:>10.2f} {pico:>10.1f} {ok:>4}')
+
+            store.close()
+
+def legacyPumpHours(liga):
+    ''' Minutos de bombeamento dentro e fora da ponta, minuto a minuto. Retorna uma tupla (ponta, foraPonta). '''
+
+    ponta, foraPonta = 0, 0
+    for minuto, estado in enumerate(liga.tolist()):
+        if estado:
+            if indicators.PONTA_INICIO <= minuto % reservoir.MINUTOS_DIA < indicators.PONTA_FIM:
+                ponta += 1
+            else:
+                foraPonta += 1
+
+    return (ponta, foraPonta)
+
+def benchScheduleCosts(diasList=(30, 90, 365)):
+    ''' Mede as horas de bombeamento na ponta e fora da ponta de `calculations.getPumpOperation()`, calculadas com máscaras
+    sobre toda a simulação, e as compara com a contagem minuto a minuto. '''
+
+    curva = getReferenceCurve()
+    volDia = curva.sum()
+    parametros = (volDia * 0.2, volDia * 0.3, volDia * 0.1, curva.max() * 1.5 / 3600)
+
+    print('Operação simulada das bombas: horas na ponta e fora da ponta')
+    print(f'{"dias":>6} {"minuto a minuto (ms)":>21} {"máscaras (ms)":>14} {"ponta (h/dia)":>14} {"fora (h/dia)":>13} {"ok":>4}')
+
+    for dias in diasList:
+        _, liga, _ = reservoir.simulate(reservoir.getCurveDemand(curva, dias), *parametros)
+        trocas = reservoir.getTransitions(liga)
+
+        tAntigo, (ponta, foraPonta) = bestTime(lambda: legacyPumpHours(liga))
+        tNovo, operacao = bestTime(lambda: calculations.getPumpOperation(trocas, len(liga)))
+        ok = (ponta, foraPonta) == (operacao['minutosPonta'], operacao['minutosForaPonta'])
+
+        print(f'{dias:>6} {tAntigo * 1000:>21.2f} {tNovo * 1000:>14.3f} {operacao["operacaoHorarioPonta"]:>14.2f} {operacao["operacaoHorarioForaPonta"]:>13.2f} {"sim" if ok else "não":>4}')
+
+if __name__ == '__main__':
+    benchReservoir()
+    benchWaterImport()
+    benchProjectOpen()
+    benchGuiOpen()
+    benchWaterStore()
+    benchColebrook()
+    benchOperationPoint()
+    benchIndicators()
+    benchDownsample()
+    benchCharts()
+    benchWaterReference()
+    benchMatching()
+    benchScheduleCosts()
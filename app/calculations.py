@@ -0,0 +1,375 @@
+"""
+calculations.py
+Cálculos do programa sem dependência do wx: indicadores hidroenergéticos, tarifas verde e azul, curvas da bomba e do sistema,
+ponto de operação e balanço hídrico. Usado pelas janelas e pelo modo em lote (app/batch.py).
+"""
+
+import numpy as np
+import app.reservoir as reservoir
+import app.hydraulics as hydraulics
+import app.indicators as indicators
+
+G = hydraulics.G
+VISCOSIDADE = hydraulics.VISCOSIDADE
+
+# Coeficientes de singularidade, na mesma ordem dos campos da Curva do Sistema:
+# curvas 45°, curvas 90°, registros globo, registros gaveta, registros esfera, válvula de retenção e válvula pé com crivo.
+COEFICIENTES_SINGULARIDADES = (0.2, 0.4, 10, 0.2, 5, 10, 3)
+
+# Vazões amostradas para separar as raízes do Ponto de Operação antes do brentq.
+AMOSTRAS_PONTO = 64
+ITERACOES_BISSECAO = 50
+
+### Consumo Energético e Indicadores Hidroenergéticos ###
+
+def potencia(parametros):
+    ''' Retorna a potência (kW) do conjunto motobomba. `parametros` é o dicionário de Parâmetros do Sistema
+    retornado por `project.getParameters()`. '''
+
+    num = 9.81 * parametros['vazaoBombeada'] * parametros['alturaNanometrica'] # Numerador
+    den = (parametros['rendimentoMotor'] / 100) * (parametros['rendimentoBomba'] / 100) # Denominador
+
+    return num / den
+
+def energiaPonta(parametros, isIn):
+    """ Retorna o consumo de energia mensal na ponta.
+    @``isIn`` é True para Operacao dentro da Ponta, False caso contrario. """
+
+    if isIn:
+        return potencia(parametros) * parametros['operacaoHorarioPonta'] * 30
+    else:
+        return potencia(parametros) * parametros['operacaoHorarioForaPonta'] * 30
+
+def volumeBombeado(parametros):
+    ''' Retorna o volume bombeado no mês. '''
+
+    return parametros['vazaoBombeada'] * (parametros['operacaoHorarioPonta'] + parametros['operacaoHorarioForaPonta']) * 30 * 3600
+
+def getEnergyIndicators(parametros):
+    ''' Retorna um dicionário com os resultados de Consumo Energético e Indicadores Hidroenergéticos. '''
+
+    consumoPonta = energiaPonta(parametros, True)
+    consumoForaPonta = energiaPonta(parametros, False)
+    consumoTotal = consumoPonta + consumoForaPonta
+    volume = volumeBombeado(parametros)
+    consumoEspecifico = consumoTotal / volume
+
+    return {
+        'consumoPonta': consumoPonta,
+        'consumoForaPonta': consumoForaPonta,
+        'consumoTotal': consumoTotal,
+        'volumeBombeado': volume,
+        'consumoEspecifico': consumoEspecifico,
+        'consumoEspecificoNormalizado': consumoEspecifico * (100 / parametros['alturaNanometrica'])
+    }
+
+### Custos de Operação ###
+
+def getAliquotasDivisor(aliquotas):
+    ''' Recebe as alíquotas, em ordem, ICMS, PIS e COFINS (%) e retorna o divisor aplicado a todos os custos. '''
+
+    return 1 - (aliquotas[0] - aliquotas[1] - aliquotas[2]) / 100
+
+def getGreenTariff(parametros, aliquotas, greenFields):
+    ''' Retorna um dicionário com os custos da tarifa verde.
+    `greenFields` -> Em ordem, Custo de Energia Dentro da Ponta, Fora da Ponta e Preco da Demanda. '''
+
+    indicadores = getEnergyIndicators(parametros)
+    den = getAliquotasDivisor(aliquotas)
+
+    CEEP = indicadores['consumoPonta'] * greenFields[0] / den
+    CEEFP = indicadores['consumoForaPonta'] * greenFields[1] / den
+    CD = potencia(parametros) * greenFields[2] / den
+    CTEE = CEEP + CEEFP + CD
+
+    return {
+        'CEEP': CEEP,
+        'CEEFP': CEEFP,
+        'CD': CD,
+        'CTEE': CTEE,
+        'CMEE': CTEE / indicadores['consumoTotal'],
+        'CMMB': CTEE / indicadores['volumeBombeado']
+    }
+
+def getBlueTariff(parametros, aliquotas, blueFields):
+    ''' Retorna um dicionário com os custos da tarifa azul.
+    `blueFields` -> Em ordem, Preco Da Demanda no Horario de Ponta, Fora de Ponta, Preco da Energia Dentro da Ponta, Fora da ponta. '''
+
+    indicadores = getEnergyIndicators(parametros)
+    den = getAliquotasDivisor(aliquotas)
+
+    CEEP = indicadores['consumoPonta'] * blueFields[2] / den
+    CEEFP = indicadores['consumoForaPonta'] * blueFields[3] / den
+    CDP = potencia(parametros) * blueFields[0] / den
+    CDFP = potencia(parametros) * blueFields[1] / den
+    CTEE = CEEP + CEEFP + CDP + CDFP
+
+    return {
+        'CEEP': CEEP,
+        'CEEFP': CEEFP,
+        'CDP': CDP,
+        'CDFP': CDFP,
+        'CTEE': CTEE,
+        'CMEE': CTEE / indicadores['consumoTotal'],
+        'CMMB': CTEE / indicadores['volumeBombeado']
+    }
+
+### Custos da Operação Simulada ###
+
+def getPumpMask(trocas, n):
+    ''' Retorna um array booleano com o estado das bombas em cada um dos `n` minutos da simulação, a partir das trocas
+    [minuto, estado] de `simulateHydric()`. '''
+
+    tamanhos = np.diff(np.append(trocas[:, 0], n))
+    return np.repeat(trocas[:, 1].astype(bool), tamanhos)
+
+def getPeakMask(n):
+    ''' Retorna um array booleano com True nos minutos do horário de ponta, das 18h às 21h, de uma simulação de `n` minutos.
+    As simulações do Balanço Hídrico sempre começam à meia-noite. '''
+
+    return np.resize(indicators.PONTA, n)
+
+def getPumpOperation(trocas, n):
+    ''' Retorna um dicionário com os minutos de bombeamento dentro e fora da ponta de uma simulação de `n` minutos e
+    as horas de operação por dia, no mesmo formato dos campos 'operacaoHorarioPonta' e 'operacaoHorarioForaPonta'
+    dos Parâmetros do Sistema. '''
+
+    liga = getPumpMask(trocas, n)
+    ligada = int(np.count_nonzero(liga))
+    ponta = int(np.count_nonzero(liga & getPeakMask(n)))
+    dias = n / reservoir.MINUTOS_DIA
+
+    return {
+        'minutosPonta': ponta,
+        'minutosForaPonta': ligada - ponta,
+        'dias': dias,
+        'operacaoHorarioPonta': ponta / 60 / dias if dias else 0,
+        'operacaoHorarioForaPonta': (ligada - ponta) / 60 / dias if dias else 0
+    }
+
+def getScheduleCosts(parametros, simulacao, despesas=None):
+    ''' Calcula o consumo de energia e os custos das tarifas verde e azul com as horas de operação na ponta e fora da ponta
+    da simulação `simulacao` de `simulateHydric()`, no lugar das horas informadas nos Parâmetros do Sistema.
+    A potência e a vazão bombeada continuam sendo as dos Parâmetros do Sistema. `despesas` está no formato de
+    `project.getExpenses()`. Retorna um dicionário com 'operacao' (ver `getPumpOperation()`), 'energia'
+    (ver `getEnergyIndicators()`) e, se todos os campos da tarifa estiverem preenchidos, 'verde' e 'azul'. '''
+
+    operacao = getPumpOperation(simulacao['trocas'], len(simulacao['volume']))
+    parametros = dict(parametros, operacaoHorarioPonta=operacao['operacaoHorarioPonta'],
+        operacaoHorarioForaPonta=operacao['operacaoHorarioForaPonta'])
+
+    resultado = {'operacao': operacao, 'energia': getEnergyIndicators(parametros)}
+    if not despesas or None in despesas['aliquotas']:
+        return resultado
+
+    if None not in despesas['green']:
+        resultado['verde'] = getGreenTariff(parametros, despesas['aliquotas'], despesas['green'])
+
+    if None not in despesas['blue']:
+        resultado['azul'] = getBlueTariff(parametros, despesas['aliquotas'], despesas['blue'])
+
+    return resultado
+
+### Curva da Bomba, Curva do Sistema e Ponto de Operação ###
+
+def getPumpCurve(q, h):
+    ''' Ajusta a equação de 2º grau da Curva da Bomba. Retorna uma tupla (P2, R2), com P2 = [a, b, c] de ax² + bx + c. '''
+
+    q = np.array(q, dtype=np.float64)
+    h = np.array(h, dtype=np.float64)
+
+    P2 = np.polyfit(q, h, 2)
+    yhat = np.polyval(P2, q)
+    ybar = h.sum() / len(h)
+    SST = ((h - ybar) ** 2).sum()
+    SSreg = ((yhat - ybar) ** 2).sum()
+
+    return (P2, SSreg / SST)
+
+def getSingularidadesSum(quantidades):
+    ''' Retorna o somatório dos coeficientes de singularidade a partir das quantidades de cada peça,
+    na ordem de `COEFICIENTES_SINGULARIDADES`. '''
+
+    KS = 0
+    for quantidade, coeficiente in zip(quantidades, COEFICIENTES_SINGULARIDADES):
+        KS += int(quantidade) * coeficiente
+
+    return KS
+
+def alturaSistema(vazao, sistema):
+    ''' Calcula a altura manométrica do sistema para `vazao` (m³/s), um número ou um array de vazões.
+    `sistema` é o dicionário retornado por `project.getSystemParameters()`, com o diâmetro em metros. '''
+
+    return hydraulics.alturaSistema(vazao, sistema)
+
+def curveFitHelper(X, C, d):
+    ''' Perda de carga distribuída C * X^d, a função ajustada por `fitSystemCurve()`. '''
+
+    return C * pow(X, d)
+
+def fitSystemCurve(q, sistema):
+    ''' Ajusta a Curva do Sistema na forma HG + C * Q^d + B * Q² para as vazões `q`.
+    A perda de carga distribuída é ajustada por C * Q^d e a localizada é exata, B * Q².
+    Retorna a tupla (B, C, d, HG). '''
+
+    from scipy.optimize import curve_fit
+
+    q = np.array(q, dtype=np.float64)
+    D = sistema['diametro']
+    B = sistema['singularidades'] / (2 * G * pow(0.25, 2) * pow(np.pi, 2) * pow(D, 4))
+
+    HPL = hydraulics.perdaCargaDistribuida(q, sistema)
+
+    initialGuess = [1.0, 1.0]
+    popt, pcov = curve_fit(curveFitHelper, q[1:], HPL[1:], initialGuess) # Tirando os primeiros zeros da lista.
+
+    return (B, popt[0], popt[1], sistema['desnivel'])
+
+def systemCurveHeight(q, systemEq):
+    ''' Retorna a altura da Curva do Sistema ajustada por `fitSystemCurve()` para as vazões `q`. '''
+
+    B, C, d, HG = systemEq
+    q = np.array(q, dtype=np.float64)
+
+    return HG + (C * pow(q, d) + (B * pow(q, 2)))
+
+def solveOperationPoint(P2, sistema, qMin, qMax, amostras=AMOSTRAS_PONTO):
+    ''' Resolve H_bomba(Q) - H_sistema(Q) = 0 entre as vazões `qMin` e `qMax` (m³/s). H_bomba é a equação de 2º grau `P2`
+    de `getPumpCurve()` e H_sistema é a expressão completa de Darcy-Weisbach com as singularidades (`hydraulics.alturaSistema()`).
+
+    A diferença é calculada de uma vez em `amostras` vazões; cada troca de sinal isola uma raiz, que é refinada por brentq.
+    Retorna a lista de pontos (vazao, altura), em ordem de vazão: vazia se as curvas não se cruzam no intervalo. Não desenha nada. '''
+
+    from scipy.optimize import brentq
+
+    diferenca = lambda x: np.polyval(P2, x) - hydraulics.alturaSistema(x, sistema)
+
+    x = np.linspace(qMin, qMax, amostras)
+    y = diferenca(x)
+
+    pontos = []
+    for i in np.flatnonzero(y == 0):
+        pontos.append(float(x[i]))
+
+    for i in np.flatnonzero(y[:-1] * y[1:] < 0):
+        pontos.append(brentq(diferenca, x[i], x[i + 1]))
+
+    pontos.sort()
+    return [(vazao, float(np.polyval(P2, vazao))) for vazao in pontos]
+
+def solveOperationPoints(P2, sistema, qMax, bombas=1, iteracoes=ITERACOES_BISSECAO):
+    ''' Versão vetorizada de `solveOperationPoint()` para muitos sistemas de uma vez: os valores de `sistema` e `bombas`
+    podem ser arrays, um por cenário. Com `bombas` bombas iguais em paralelo, a Curva da Bomba é H(Q) = P2(Q / bombas).
+
+    Cada cenário é resolvido por bissecção, todos ao mesmo tempo, entre 0 e `qMax * bombas`. Supõe uma única interseção
+    no intervalo (bomba perdendo altura com a vazão); para verificar se há mais de uma, use `solveOperationPoint()`.
+    Retorna a tupla de arrays (vazao, altura), com NaN nos cenários em que as curvas não se cruzam. '''
+
+    bombas = np.asarray(bombas, dtype=np.float64)
+    diferenca = lambda x: np.polyval(P2, x / bombas) - hydraulics.alturaSistema(x, sistema)
+
+    shape = np.broadcast(bombas, *(np.asarray(value) for value in sistema.values())).shape
+    a = np.zeros(shape)
+    b = np.broadcast_to(qMax * bombas, shape).astype(np.float64)
+    fa = diferenca(a)
+    valido = fa * diferenca(b) <= 0
+
+    for _ in range(0, iteracoes):
+        m = (a + b) / 2
+        fm = diferenca(m)
+        esquerda = fa * fm <= 0
+
+        b = np.where(esquerda, m, b)
+        a = np.where(esquerda, a, m)
+        fa = np.where(esquerda, fa, fm)
+
+    vazao = np.where(valido, (a + b) / 2, np.nan)
+    return (vazao, np.polyval(P2, vazao / bombas))
+
+def getOperationPoint(q, h, sistema):
+    ''' Retorna uma tupla (ponto, mensagem) com o ponto de operação (vazao, altura), a interseção entre a Curva da Bomba
+    ajustada aos dados (`q`, `h`) e a Curva do Sistema, dentro das vazões da Curva da Bomba.
+
+    Se as curvas não se cruzarem, ou se cruzarem mais de uma vez, `ponto` é None e `mensagem` explica o motivo.
+    Caso contrário, `mensagem` é None. '''
+
+    q = np.array(q, dtype=np.float64)
+    P2, R2 = getPumpCurve(q, h)
+    pontos = solveOperationPoint(P2, sistema, q.min(), q.max())
+
+    if len(pontos) == 1:
+        return (pontos[0], None)
+
+    if not pontos:
+        return (None, f'As curvas não se cruzam entre {q.min():.4f} e {q.max():.4f} m³/s.')
+
+    lista = ', '.join(f'[{x:.4f}, {y:.4f}]' for x, y in pontos)
+    return (None, f'As curvas se cruzam {len(pontos)} vezes: {lista}.')
+
+### Balanço Hídrico de Reservatório ###
+
+def checkWaterData(agua):
+    ''' Levanta ValueError se um formulário que usa os dados de consumo de água não tiver esses dados. '''
+
+    if agua is None or not len(agua):
+        raise ValueError('O formulário usa os dados de consumo de água, mas o projeto não tem dados de consumo.')
+
+def simulateHydric(formulario, agua=None):
+    ''' Simula, minuto a minuto, um formulário do Balanço Hídrico de Reservatório (ver `project.getHydricData()`).
+    Se o formulário usar os dados de consumo de água, `agua` precisa ser uma WaterSeries ou a lista de `dp.getTableReadyData()`.
+    Retorna um dicionário com os arrays 'time' e 'volume', com um valor por minuto, e 'trocas', com as trocas de estado
+    da bomba no formato [minuto, estado] de `reservoir.simulateEvents()`, além de 'minutosVazio', 'maximo' e 'minimo'.
+    Na opção 2 os valores estão em nível. '''
+
+    area = formulario['area']
+    escala = area if area else 1
+
+    if formulario['curva']:
+        demanda = reservoir.getCurveDemand(formulario['curva'], formulario['diasSim'])
+        tempo = reservoir.getCurveTimes(len(demanda))
+    else:
+        checkWaterData(agua)
+        demanda, tempo = reservoir.getWaterDataDemand(agua, formulario['diasSim'])
+
+    # A simulação é sempre feita em volume. Os níveis são convertidos aqui e o resultado volta para nível.
+    volume, liga, minutosVazio = reservoir.simulate(demanda, formulario['inicial'] * escala, formulario['maximo'] * escala,
+        formulario['minimo'] * escala, sum(formulario['vazoes']))
+
+    return {
+        'time': tempo,
+        'volume': volume / escala,
+        'trocas': reservoir.getTransitions(liga),
+        'minutosVazio': minutosVazio,
+        'maximo': formulario['maximo'],
+        'minimo': formulario['minimo']
+    }
+
+def getHydricBalance(formulario, agua=None):
+    ''' Simula um formulário do Balanço Hídrico de Reservatório, retornado por `project.getHydricData()`,
+    e retorna um dicionário com o resumo da simulação. Se o formulário usar os dados de consumo de água,
+    `agua` precisa ser uma WaterSeries ou a lista de `dp.getTableReadyData()`.
+    Na opção 2, os níveis são convertidos para volume com a área da base e o resultado volta em nível. '''
+
+    area = formulario['area']
+    escala = area if area else 1
+
+    if formulario['curva']:
+        demanda, duracao = reservoir.getCurveBlocks(formulario['curva'], formulario['diasSim'])
+    else:
+        checkWaterData(agua)
+        demanda, duracao = reservoir.getWaterDataBlocks(agua, formulario['diasSim'])
+
+    pontos, trocas, minutosVazio = reservoir.simulateEvents(demanda, duracao, formulario['inicial'] * escala,
+        formulario['maximo'] * escala, formulario['minimo'] * escala, sum(formulario['vazoes']))
+
+    n = int(duracao.sum())
+    tamanhos = np.diff(np.append(trocas[:, 0], n))
+    volumes = pontos[1:, 1] / escala # O primeiro ponto é o volume inicial, antes do primeiro minuto.
+
+    return {
+        'minutosVazio': minutosVazio,
+        'horasBombeamento': float(tamanhos[trocas[:, 1] == 1].sum()) / 60,
+        'acionamentos': int(np.count_nonzero(trocas[:, 1] == 1)),
+        'minimo': float(volumes.min()),
+        'maximo': float(volumes.max())
+    }
@@ -3,9 +3,7 @@ data_processing.py
 Arquivo contem as funcoes para a manipulacao dos dados
 """
 
-import wx
 import numpy as np
-from scipy.interpolate import make_interp_spline
 import datetime
 import app.global_variables as gv
 
@@ -177,12 +175,15 @@ def excelTimeToOurTime(time):
     return time[:5]
 
 def getTableReadyData(data):
-    """ Recebe uma lista com os dados de consumo de água e retorna a lista com os dados prontos para exibição.
+    """ Recebe uma lista com os dados de consumo de água, ou uma WaterSeries, e retorna a lista com os dados prontos para exibição.
     PS: ['value'] ja serão "entreges" como floats. """
 
     if not data:
         return None
 
+    if hasattr(data, 'toDaysList'):
+        return data.toDaysList()
+
     daysList = []
 
     # Ira conter os dados para um unico grafico / dia. Sera adicionada a daysList posteriormente.
@@ -294,6 +295,8 @@ def isDateBigger(date1, date2):
 def smoothGraph(x, y, stops=10):
     ''' Recebe duas listas e suaviza os valores para a impressão. `x` e `y` precisam ser numpy.array. '''
 
+    from scipy.interpolate import make_interp_spline
+
     x_new = np.linspace(x.min(), x.max(), stops)
     a_BSpline = make_interp_spline(x, y)
     y_new = a_BSpline(x_new)
@@ -325,6 +328,9 @@ def colorField(field, isThereError):
     ''' Recebe a referência, `field`, de um widget com a função "SetBackgroundColour()" e a colore
     de acordo com `isThereError`. '''
 
+    # Importado aqui para que o módulo possa ser usado sem interface gráfica (ver app/batch.py).
+    import wx
+
     if isThereError:
         field.SetBackgroundColour(gv.RED_ERROR)
     else:
@@ -0,0 +1,74 @@
+"""
+downsample.py
+Redução dos pontos enviados ao matplotlib em séries longas. Cada pixel da largura do eixo recebe no máximo dois pontos,
+o menor e o maior valor do trecho, então picos e períodos com o reservatório vazio continuam visíveis.
+Ao aproximar ou mover o gráfico, o trecho visível é reduzido novamente a partir dos dados completos.
+Não depende do wx.
+"""
+
+import numpy as np
+import matplotlib.dates as mdates
+
+def minMaxIndices(y, inicio, fim, baldes):
+    ''' Divide `y[inicio:fim]` em `baldes` trechos de mesmo tamanho e retorna, em ordem, os índices do primeiro e do último
+    ponto e do menor e do maior valor de cada trecho. Se o intervalo já couber em `2 * baldes` pontos, retorna todos. '''
+
+    n = fim - inicio
+    if n <= 2 * baldes:
+        return np.arange(inicio, fim)
+
+    tamanho = -(-n // baldes)
+    cheios = n // tamanho
+    trecho = y[inicio:inicio + cheios * tamanho].reshape(cheios, tamanho)
+    deslocamentos = inicio + np.arange(cheios) * tamanho
+
+    indices = [[inicio, fim - 1], deslocamentos + trecho.argmin(axis=1), deslocamentos + trecho.argmax(axis=1)]
+
+    # O último trecho, mais curto, fica fora do reshape.
+    resto = inicio + cheios * tamanho
+    if resto < fim:
+        indices.append([resto + int(np.argmin(y[resto:fim])), resto + int(np.argmax(y[resto:fim]))])
+
+    return np.unique(np.concatenate(indices))
+
+class DetailLine:
+    ''' Linha do matplotlib desenhada com os pontos de `minMaxIndices()` para a largura do eixo em pixels.
+    Quando os limites do eixo X mudam (zoom ou movimento), os pontos do trecho visível são recalculados. '''
+
+    def __init__(self, ax, x, y, *args, **kwargs):
+        self.ax = ax
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+
+        # Posições no eixo X, nas unidades do matplotlib, para localizar o trecho visível.
+        self.posicoes = mdates.date2num(self.x) if np.issubdtype(self.x.dtype, np.datetime64) else self.x.astype(np.float64)
+
+        self.line, = ax.plot(*self.getData(0, len(self.x)), *args, **kwargs)
+
+        # O matplotlib guarda apenas uma referência fraca ao método. A linha mantém este objeto vivo enquanto existir.
+        self.line.detailLine = self
+        ax.callbacks.connect('xlim_changed', self.OnXLimChanged)
+
+    def setData(self, x, y):
+        ''' Troca os dados completos da linha, reaproveitando a linha e o eixo. '''
+
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self.posicoes = mdates.date2num(self.x) if np.issubdtype(self.x.dtype, np.datetime64) else self.x.astype(np.float64)
+
+        self.line.set_data(*self.getData(0, len(self.x)))
+
+    def getData(self, inicio, fim):
+        ''' Retorna os arrays (x, y) reduzidos do intervalo [inicio, fim). '''
+
+        i = minMaxIndices(self.y, inicio, fim, max(1, int(self.ax.bbox.width)))
+        return (self.x[i], self.y[i])
+
+    def OnXLimChanged(self, ax):
+        ''' Chamada pelo matplotlib quando os limites do eixo X mudam. Inclui um ponto de cada lado para a linha chegar às bordas. '''
+
+        esquerda, direita = ax.get_xlim()
+        inicio = max(int(np.searchsorted(self.posicoes, esquerda, side='left')) - 1, 0)
+        fim = min(int(np.searchsorted(self.posicoes, direita, side='right')) + 1, len(self.x))
+
+        self.line.set_data(*self.getData(inicio, fim))
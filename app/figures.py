@@ -0,0 +1,361 @@
+"""
+figures.py
+Gráficos do programa sem dependência do wx. Cada função retorna a figura do matplotlib pronta para ser exibida com
+`plt.show()` ou salva com `fig.savefig()`. Quem salvar a figura deve fechá-la com `plt.close(fig)`.
+Com o argumento `fig`, o gráfico é desenhado em uma figura existente, como as das janelas de `app/windows/charts.py`,
+que é limpa e reaproveitada em vez de criar uma nova figura no pyplot. Os gráficos da bomba, do sistema, do reservatório
+e do dia vão além: se a figura já tiver o mesmo gráfico, apenas os dados das linhas são trocados, sem limpar o eixo.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+import app.data_processing as dp
+import app.calculations as calculations
+import app.water_series as water_series
+import app.downsample as downsample
+
+TAMANHO = (11, 6)
+
+def newFigure(fig=None):
+    ''' Retorna uma tupla (fig, ax). Sem `fig`, cria uma figura no pyplot. Com `fig`, limpa o eixo da figura e o reaproveita.
+    `fig.artistas` guarda os elementos que um gráfico pode atualizar no próximo desenho e também é limpo. '''
+
+    if fig is None:
+        fig, ax = plt.subplots(figsize=TAMANHO)
+    elif len(fig.axes) == 1:
+        ax = fig.axes[0]
+        ax.clear()
+    else:
+        fig.clear()
+        ax = fig.add_subplot()
+
+    fig.artistas = {}
+    return (fig, ax)
+
+def getArtists(fig, name):
+    ''' Retorna os elementos do gráfico `name` guardados em `fig.artistas` pelo desenho anterior, ou None. '''
+
+    if fig is None:
+        return None
+
+    return getattr(fig, 'artistas', {}).get(name)
+
+def updateLimits(ax):
+    ''' Recalcula os limites do eixo depois de trocar os dados das linhas. '''
+
+    ax.relim()
+    ax.autoscale_view()
+
+def styleAxes(ax, isGrid=False):
+    ''' Remove as bordas de cima e da direita e, se `isGrid`, estiliza o grid. '''
+
+    # estiliza o grid
+    if isGrid:
+        ax.set_axisbelow(True)
+        ax.yaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
+        ax.xaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
+
+    # remove spines
+    ax.spines['right'].set_visible(False)
+    ax.spines['top'].set_visible(False)
+
+def getWaterSummaryFigure(agua, fig=None):
+    ''' Retorna o Gráfico Geral de Consumo, com o consumo de cada dia. `agua` é uma WaterSeries ou a lista de dias de
+    `dp.getTableReadyData()`. '''
+
+    serie = water_series.asWaterSeries(agua)
+    x = serie.getDayStarts()
+    y = serie.getDailySums()
+
+    fig, ax = newFigure(fig)
+    ax.xaxis.set_tick_params(rotation=30, labelsize=10)
+
+    # Informacoes do gráfico.
+    ax.set_xlabel('Hora')
+    ax.set_ylabel('Consumo (m³/dia)')
+    fig.suptitle('Gráfico Geral de Consumo', x=0.07, y=0.98, ha='left', fontsize=15)
+
+    downsample.DetailLine(ax, x, y, '-r', lw=2, label='Consumo')
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%Y'))  # Aplica a formatacao.
+    fig.autofmt_xdate()  # Aplica a 'organizacao'.
+    styleAxes(ax, True)
+
+    vazao_maxima = "{:.2f}".format(y.max())
+    vazao_media = float("{:.2f}".format(y.mean()))
+    vazao_minima = "{:.2f}".format(y.min())
+
+    ax.set_title(f"Vazão Máxima: {vazao_maxima} | Vazão Média: {vazao_media} | Vazão Mínima: {vazao_minima}", loc='left', fontsize=10)
+    ax.legend(loc='best')
+    fig.tight_layout()
+
+    return fig
+
+def getPumpFigure(q, h, fig=None):
+    ''' Retorna o gráfico da Curva da Bomba. '''
+
+    P2, R2 = calculations.getPumpCurve(q, h)
+    q = np.array(q, dtype=np.float64)
+    h = np.array(h, dtype=np.float64)
+
+    arr = dp.smoothGraph(q, h)
+    artistas = getArtists(fig, 'bomba')
+
+    if artistas:
+        curva, pontos = artistas
+        ax = curva.axes
+
+        curva.set_data(arr[0], arr[1])
+        pontos.set_data(q, np.polyval(P2, q))
+        updateLimits(ax)
+    else:
+        fig, ax = newFigure(fig)
+        fig.suptitle('Curva da Bomba', x=0.06, y=0.98, ha='left', fontsize=15)
+
+        # Informacoes do gráfico.
+        ax.set_xlabel('Vazão (m³/s)')
+        ax.set_ylabel('Altura Manométrica (m)')
+        styleAxes(ax)
+
+        curva, = ax.plot(arr[0], arr[1], '-', label='Curva da bomba', color='b')
+        pontos, = ax.plot(q, np.polyval(P2, q), 'o', label='Ponto [Q, H]')
+        ax.legend(loc='best')
+
+        fig.artistas['bomba'] = (curva, pontos)
+
+    eq = getPumpEquation(P2)
+    eq += f'R²: {"{:.2f}".format(R2)}'
+    ax.set_title(eq, loc='left', fontsize=10)
+    fig.tight_layout()
+
+    return fig
+
+def getPumpEquation(P2):
+    ''' Retorna a string da equação da Curva da Bomba. '''
+
+    a = "{:.2f}".format(P2[0])
+    b = "{:.2f}".format(P2[1])
+    c = "{:.2f}".format(P2[2])
+
+    return f'f(x) = {a}x² + {b}x + {c}\n'
+
+def getSystemFigure(q, sistema, fig=None):
+    ''' Retorna o gráfico da Curva do Sistema para as vazões `q`. `sistema` está no formato de `project.getSystemParameters()`. '''
+
+    h = calculations.alturaSistema(np.asarray(q, dtype=np.float64), sistema)
+
+    arr = dp.smoothGraph(np.array(q, dtype=np.float64), np.array(h))
+    artistas = getArtists(fig, 'sistema')
+
+    if artistas:
+        curva, = artistas
+        ax = curva.axes
+
+        curva.set_data(arr[0], arr[1])
+        updateLimits(ax)
+    else:
+        fig, ax = newFigure(fig)
+        fig.suptitle('Curva do Sistema', x=0.06, y=0.98, ha='left', fontsize=15)
+
+        # Informacoes do gráfico.
+        ax.set_xlabel('Vazão (m³/s)')
+        ax.set_ylabel('Altura Nanométrica (m)')
+        styleAxes(ax)
+
+        curva, = ax.plot(arr[0], arr[1], '-', label='Curva do Sistema', color='r')
+        ax.legend(loc='best')
+
+        fig.artistas['sistema'] = (curva,)
+
+    fig.tight_layout()
+
+    return fig
+
+def getOperationFigure(q, h, sistema, fig=None):
+    ''' Retorna uma tupla (fig, ponto, mensagem) com o gráfico do Ponto de Operação, o ponto (vazao, altura) encontrado
+    e a mensagem de `calculations.getOperationPoint()`. `ponto` é None se as curvas não se cruzarem uma única vez. '''
+
+    q = np.array(q, dtype=np.float64)
+    h = np.array(h, dtype=np.float64)
+
+    systemEq = calculations.fitSystemCurve(q, sistema)
+    AMT = calculations.alturaSistema(q, sistema)
+    P2, R2 = calculations.getPumpCurve(q, h)
+    x = np.linspace(q.min(), q.max(), 100)
+
+    fig, ax = newFigure(fig)
+    fig.suptitle('Análise do Ponto de Operação', x=0.06, y=0.98, ha='left', fontsize=15)
+
+    # Informacoes do gráfico.
+    ax.set_xlabel('Vazão (m³/s)')
+    ax.set_ylabel('Altura Nanométrica (m)')
+    styleAxes(ax)
+
+    # Curva da Bomba: a mesma equação usada para achar o ponto de operação.
+    ax.plot(x, np.polyval(P2, x), '-', label=getPumpEquation(P2), color='b')
+    ax.plot(q, h, 'o', color='b')
+
+    # Curva do Sistema
+    B = "{:.2f}".format(systemEq[0])
+    C = "{:.2f}".format(systemEq[1])
+    d = "{:.3f}".format(systemEq[2])
+    HG = "{:.2f}".format(systemEq[3])
+
+    ax.plot(x, calculations.alturaSistema(x, sistema), '-', color='r', label=f'{B}Q² + {C}Q^{d} + {HG}')
+    ax.plot(q, AMT, 'o', color='black')
+
+    ponto, mensagem = calculations.getOperationPoint(q, h, sistema)
+    if ponto:
+        px, py = ponto
+        ax.plot(px, py, 'o', label=f'Interseção [{"{:.4f}".format(px)}, {"{:.4f}".format(py)}]', color='green')
+        ax.annotate('Ponto de operação', xy=(px, py), xycoords='data', xytext=(0.8, 0.95),
+        textcoords='axes fraction', arrowprops=dict(facecolor='green', shrink=0.05), horizontalalignment='right', verticalalignment='top')
+    else:
+        ax.set_title(mensagem, loc='left', fontsize=10)
+
+    ax.legend(loc='lower right')
+    fig.tight_layout()
+
+    return (fig, ponto, mensagem)
+
+def getReservoirFigure(ID, simulacao, fig=None):
+    ''' Retorna o gráfico da análise de volume do Balanço Hídrico de Reservatório.
+    `ID` é 0 para a opção de volumes e 1 para a de níveis. `simulacao` é o dicionário de `calculations.simulateHydric()`. '''
+
+    # O volume é reduzido à largura do gráfico. A bomba é desenhada só nas trocas de estado, como degraus.
+    tempo = simulacao['time']
+    trocas = simulacao['trocas']
+    if len(trocas):
+        minutos = np.append(trocas[:, 0], len(tempo) - 1)
+        bombaX = tempo[minutos]
+        bombaY = np.where(np.append(trocas[:, 1], trocas[-1, 1]) == 1, simulacao['maximo'], simulacao['minimo'])
+    else:
+        bombaX, bombaY = tempo[:0], []
+
+    artistas = getArtists(fig, 'reservatorio')
+
+    if artistas:
+        volume, maximo, bomba = artistas
+        ax = volume.ax
+
+        volume.setData(tempo, simulacao['volume'])
+        maximo.set_ydata([simulacao['maximo'], simulacao['maximo']])
+        bomba.set_data(bombaX, bombaY)
+        updateLimits(ax)
+    else:
+        fig, ax = newFigure(fig)
+        ax.xaxis.set_tick_params(rotation=30, labelsize=10)
+
+        fig.suptitle('Análise do volume do reservatório', x=0.07, y=0.98, ha='left', fontsize=15)
+        ax.set_xlabel('Dia')
+        styleAxes(ax, True)
+
+        fmt = mdates.DateFormatter('%d/%m')
+        ax.xaxis.set_major_formatter(fmt)  # Aplica a formatacao.
+        fig.autofmt_xdate()  # Aplica a 'organizacao'.
+
+        volume = downsample.DetailLine(ax, tempo, simulacao['volume'], label='Nível')
+        maximo = ax.axhline(y=simulacao['maximo'], color='grey', alpha=0.4, label='Volume Máximo')
+        bomba, = ax.step(bombaX, bombaY, '--', where='post', color='red', alpha=0.4)
+
+        fig.artistas['reservatorio'] = (volume, maximo, bomba)
+
+    # Informacoes do gráfico.
+    minsBelowZero = simulacao['minutosVazio']
+    if minsBelowZero > 0:
+        ax.set_title(f'Quantidade de horas com reservatório vazio: {(minsBelowZero / 60):.1f}', loc='left', fontsize=10)
+    else:
+        ax.set_title('', loc='left')
+
+    if ID == 0:
+        yLabel = 'Volume (m³)'
+    else:
+        yLabel = 'Nível (m)'
+    ax.set_ylabel(yLabel)
+
+    # Sem trocas de estado, a bomba fica fora da legenda.
+    bomba.set_label('Funcionamento da bomba' if len(trocas) else '_bomba')
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), fancybox=True, shadow=True, ncol=3)
+    fig.tight_layout()
+
+    return fig
+
+def getDayFigure(x, y, titulo, texto, fig=None):
+    ''' Retorna o gráfico de consumo de um dia, com a linha de vazão média. `x` são os horários (datetime64), `y` as vazões
+    e `texto` as informações do dia, escritas acima do gráfico. Se `fig` já tiver o gráfico de outro dia, as linhas e os
+    textos são atualizados no lugar, sem recriar o eixo. '''
+
+    y = np.asarray(y, dtype=np.float64)
+    vazaoMedia = float("{:.2f}".format(y.mean()))
+
+    artistas = getArtists(fig, 'dia')
+
+    if artistas:
+        consumo, media = artistas
+        ax = consumo.axes
+
+        consumo.set_data(x, y)
+        media.set_ydata([vazaoMedia, vazaoMedia])
+        updateLimits(ax)
+    else:
+        fig, ax = newFigure(fig)
+        ax.xaxis.set_tick_params(rotation=30, labelsize=10)
+
+        # Informacoes do gráfico.
+        ax.set_xlabel('Hora')
+        ax.set_ylabel('Consumo (m³/dia)')
+        styleAxes(ax, True)
+
+        consumo, = ax.plot(x, y, '-r', lw=2, label='Consumo')
+        media = ax.axhline(y=vazaoMedia, color='g', label='Vazão Média')
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+        fig.autofmt_xdate()
+        ax.legend(loc='best')
+
+        fig.artistas['dia'] = (consumo, media)
+
+    fig.suptitle(titulo, x=0.07, y=0.98, ha='left', fontsize=15)
+    ax.set_title(texto, loc='left', fontsize=10)
+    fig.tight_layout()
+
+    return fig
+
+def getEfficiencyFigure(polos, x, y, ajuste, equacao, fig=None):
+    ''' Retorna o gráfico do rendimento nominal dos motores de `polos` polos: os pontos [kW, rendimento] da portaria
+    e a curva de ajuste `ajuste`, calculada nas mesmas potências `x`. '''
+
+    fig, ax = newFigure(fig)
+
+    # Informacoes do grafico.
+    ax.set_xlabel('Potência do Motor (kW)')
+    ax.set_ylabel('Rendimento Nominal (%)')
+    fig.suptitle(f'{polos} Polos', x=0.07, y=0.98, ha='left', fontsize=15)
+    styleAxes(ax, True)
+
+    ax.plot(x, ajuste, label=equacao)
+    ax.plot(x, y, 'o', label='Ponto [kW, Rendimento]')
+
+    ax.legend(loc='lower right')
+    fig.tight_layout()
+
+    return fig
+
+def getWaterProfilesFigure(perfis, fig=None):
+    ''' Retorna o gráfico dos perfis de consumo do banco de dados. `perfis` é uma lista de tuplas (nome, horas, Q/Qmédia). '''
+
+    fig, ax = newFigure(fig)
+
+    # Informacoes do grafico.
+    ax.set_xlabel('Hora')
+    ax.set_ylabel('Q/Qmédia')
+    ax.xaxis.set_tick_params(rotation=30, labelsize=10)
+    fig.suptitle('Gráficos de Consumo', x=0.07, y=0.98, ha='left', fontsize=15)
+    styleAxes(ax, True)
+
+    for nome, x, y in perfis:
+        ax.plot(x, y, label=nome)
+
+    ax.legend(loc='best')
+    fig.tight_layout()
+
+    return fig
@@ -3,8 +3,13 @@
 
 import os
 import csv
+import numpy as np
 import app.global_variables as gv
 import app.data_processing as dp
+import app.water_import as water_import
+import app.water_cache as water_cache
+import app.water_store as water_store
+import app.project as project
 
 def getFileExtension(filename):
     """ Recebe um string com o nome do arquivo e retorna a extensao.
@@ -69,28 +74,29 @@ def createEmptyFile():
     gv.opened_file = open(gv.file_path, 'r')
     getEntrysDictAndFile()
 
-def copyWaterFileDataToList():
-    """ Abre o arquivo e retorna uma lista contendo apenas os dados.
+def copyWaterFileDataToList(lines, indices):
+    """ Recebe as linhas de um arquivo e seus índices e retorna uma lista contendo apenas os dados de consumo de água.
     Exemplo: [{'date': '09/03/2021', 'time': '12:30', 'value': '12.9'}, ...]
     Retorna uma lista vazia em caso de erro ou falta de dados.
+    `gv.fileLines` não tem os dados de consumo de água. Para o arquivo aberto, use `getWaterSeries()`.
     """
 
-    if not gv.fileLines or not '#water_consumption_start' in gv.fileStartIndices.keys():
+    if not lines or not '#water_consumption_start' in indices.keys():
         return []
 
     data = []
     dic = {}
 
-    for i in range(gv.fileStartIndices['#water_consumption_start'], len(gv.fileLines)):
-        if gv.fileLines[i].strip() == '#water_consumption_end': # Procura pela string que sinaliza o fim dos dados de consumo de agua.
+    for i in range(indices['#water_consumption_start'], len(lines)):
+        if lines[i].strip() == '#water_consumption_end': # Procura pela string que sinaliza o fim dos dados de consumo de agua.
             break
 
-        if gv.fileLines[i][0] != '#':
-            if not validate_line(gv.fileLines[i]):
+        if lines[i][0] != '#':
+            if not validate_line(lines[i]):
                 return []
 
             else:
-                words = gv.fileLines[i].split()
+                words = lines[i].split()
                 if(len(words)) == 3:
                     dic['date'] = words[0]
                     dic['time'] = words[1]
@@ -104,59 +110,23 @@ def copyWaterFileDataToList():
 def analizeWaterData(data):
     ''' Recebe a lista de dados de agua e analiza para ver se estao de acordo com as regras. Retorna True em caso de sucesso. Exemplo de entrada:\n
     [{'date': '08/03/2021', 'time': '00:00', 'value': '20.16'}, {'date': '08/03/2021', 'time': '01:00', 'value': '19.70'}, ...]
-     Retorna True se data estiver vazio. '''
+     Retorna True se data estiver vazio. Para saber quais linhas têm erros, use `getWaterDataReport()`. '''
 
-    if not data:
-        return True
-
-    intervals = [60, 30, 15, 5, 1]
-    curDate = data[0]['date']
-    diff = 0
-    timesList = []
-    count = 1   # Conta os dias. Comeca em 1 pois 'curDate' ja contem a data da primeira linha de dados.
-
-    for line in data:
-        if curDate != line['date']:
-            # Precisamos saber se a quantidade de dados e exatamente igual ao esperado para o diferenca de tempo entre uma hora e outra.
-            if diff == 0 or len(timesList) != int(24 * (60 / round(diff * 60))):
-                return False
-
-            # A proxima data tem que ser maior que a anterior.
-            if not dp.isDateBigger(curDate, line['date']):
-                return False
+    return getWaterDataReport(data)['ok']
 
-            curDate = line['date']
-            timesList.clear()
-            diff = 0
-            count += 1
+def getWaterDataReport(data):
+    ''' Analiza a lista de dados de agua e retorna o relatório de `water_import.getWaterDataReport()`, com todas as linhas
+    que violam alguma regra. Linhas com data ou horário inválidos aparecem na regra 'formato'. '''
 
-        timesList.append(line['time'])
+    ordinais, minutos, invalidos = water_import.parseDataList(data)
+    report = water_import.getWaterDataReport(ordinais, minutos)
 
-        # Quando tivermos dois ou mais horarios, podemos comecar a monitorar a diferenca entre eles.
-        if len(timesList) >= 2:
-            if len(timesList) == 2:
-                diff = dp.getTimesDifference(timesList[-2], timesList[-1])
-                # Se a diferenca de horarios nao estiver dentro daquelas que o programa aceita.
-                if round(diff * 60) not in intervals: # diff esta em horas. Precisamos converter para minutos para comparar com intervals.
-                    return False
-
-            else:
-                # A partir daqui, a diferena entre os dois ultimos horarios tem que ser sempre a mesma dos dois primeiros.
-                if round(dp.getTimesDifference(timesList[-2], timesList[-1]) * 60) != round(diff * 60):
-                    return False
-
-        else:
-            # O primeiro horario tem que ser sempre '00:00'.
-            if line['time'] != '00:00':
-                return False
-
-    # Aqui vamos lidar se o arquivo tiver apenas dados para uma data.
-    if count == 1:
-        if diff == 0 or len(timesList) != int(24 * (60 / round(diff * 60))):
-            return False
-
-    return True
+    if len(invalidos):
+        report['erros'] = {'formato': invalidos, **report['erros']}
+        report['linhas'] = np.union1d(report['linhas'], invalidos)
+        report['ok'] = False
 
+    return report
 
 def analizeParametersData():
     ''' Analiza no arquivo os dados de Parametros do Sistema. Se tudo estiver OK, retorna True. '''
@@ -412,8 +382,8 @@ def isFileIntegrityOK():
 
     try:
         if '#water_consumption_start' in gv.fileStartIndices.keys():
-            data = copyWaterFileDataToList()
-            status.append(analizeWaterData(data))
+            # Lê os dados pelo cache binário ou pela série fora da memória. Se forem inválidos, levanta ValueError.
+            getWaterData()
 
         if '#parameters_start' in gv.fileStartIndices.keys():
             status.append(analizeParametersData())
@@ -435,29 +405,88 @@ def isFileIntegrityOK():
 
     return all(status)
 
+def getDocument():
+    ''' Retorna o `project.LenhsDocument` do arquivo aberto. O mesmo documento é reaproveitado enquanto o arquivo não mudar
+    no disco, então a verificação de integridade e as janelas leem a seção de consumo de água uma única vez. '''
+
+    if gv.document is None or gv.document.path != gv.file_path or gv.document.chave != water_cache.getFileKey(gv.file_path):
+        gv.document = project.LenhsDocument(gv.file_path)
+
+    return gv.document
+
+def getWaterSeries():
+    ''' Retorna os dados de consumo de água do arquivo aberto como WaterSeries, ou None se não houver dados.
+    Levanta ValueError se os dados forem inválidos. '''
+
+    if not gv.file_path or not '#water_consumption_start' in gv.fileStartIndices.keys():
+        return None
+
+    return getDocument().getWaterData()
+
+def isLargeFile():
+    ''' Retorna True se o arquivo aberto for maior que `water_store.LIMITE_MEMORIA`. '''
+
+    return bool(gv.file_path) and os.path.exists(gv.file_path) and os.path.getsize(gv.file_path) > water_store.LIMITE_MEMORIA
+
+def getWaterData():
+    ''' Retorna os dados de consumo de água do arquivo aberto, ou None se não houver dados. Arquivos grandes usam a
+    WaterStore de `water_store.openStore()`, lida do disco em blocos; os demais, a WaterSeries de `getWaterSeries()`.
+    As duas têm a mesma interface de leitura. Levanta ValueError se os dados forem inválidos. '''
+
+    if not isLargeFile():
+        return getWaterSeries()
+
+    if not '#water_consumption_start' in gv.fileStartIndices.keys():
+        return None
+
+    return water_store.openStore(gv.file_path)
+
 def getEntrysDictAndFile():
     ''' Analiza o arquivo aberto e atualiza gv.fileStartIndices com um dicionario contendo as linhas '...start' e '...end' encontradas no arquivo e seus indices.
-     Exemplo: {'#water_consumption_start': 1, '#water_consumption_end': 27, '#parameters_start': 48, ...}
-    Atualiza gv.fileLines com todas as linhas do arquivo tambem. '''
+     Exemplo: {'#water_consumption_start': 1, '#water_consumption_end': 1, '#parameters_start': 3, ...}
+    Atualiza gv.fileLines com todas as linhas do arquivo tambem, menos os dados de consumo de água: eles ficam no arquivo,
+    entre os marcadores, e são lidos por `getWaterSeries()`. '''
 
     gv.fileStartIndices.clear()
 
-    gv.opened_file.seek(0)
-    gv.fileLines = gv.opened_file.readlines()
+    gv.fileLines = getDocument().getLinesWithout('water_consumption')
+    gv.fileStartIndices.update(project.getSectionIndices(gv.fileLines))
 
-    i = 0
+def replaceSection(name, lines, atStart=False):
+    ''' Troca os dados da seção `name` em `gv.fileLines` por `lines` e desloca os índices de `gv.fileStartIndices` das
+    seções seguintes, sem percorrer o arquivo de novo. Se a seção não existir, ela é criada no início (`atStart`)
+    ou no fim do arquivo. '''
 
-    for line in gv.fileLines:
-        # if line[0] != '#':
-        #     continue
+    startKey = f'#{name}_start'
+    endKey = f'#{name}_end'
 
-        if line.strip()[-5:] == 'start':
-            gv.fileStartIndices[f'{line.strip()}'] = i + 1  # O indice ja vai apontar para o inicio dos dados.
+    if startKey in gv.fileStartIndices.keys():
+        start = gv.fileStartIndices[startKey]
+        end = gv.fileStartIndices[endKey]
 
-        if line.strip()[-3:] == 'end':
-            gv.fileStartIndices[f'{line.strip()}'] = i  # O indice vai apontar exatamente para o indicador de fim de dados.
+        gv.fileLines[start:end] = lines
+        pos = end
+        delta = len(lines) - (end - start)
+        novos = [startKey]
 
-        i += 1
+    else:
+        pos = 0 if atStart else len(gv.fileLines)
+        gv.fileLines[pos:pos] = [f'{startKey}\n'] + lines + [f'{endKey}\n']
+        delta = len(lines) + 2
+        novos = []
+
+    for key, index in gv.fileStartIndices.items():
+        if not key in novos and index >= pos:
+            gv.fileStartIndices[key] = index + delta
+
+    if not novos:
+        gv.fileStartIndices[startKey] = pos + 1
+        gv.fileStartIndices[endKey] = pos + 1 + len(lines)
+
+def getSectionLines(name):
+    ''' Retorna as linhas de dados da seção `name` de `gv.fileLines`, sem os marcadores. '''
+
+    return gv.fileLines[gv.fileStartIndices[f'#{name}_start']:gv.fileStartIndices[f'#{name}_end']]
 
 def getCSVFileObject(file_path, file_object):
     ''' Tenta abrir um arquivo .csv com ',' ou ';' como delimitador. Se os dois falharem, retorna None.
@@ -502,6 +531,7 @@ def clearFileVariables():
         gv.opened_file.close()
 
     gv.opened_file = None
+    gv.document = None
     gv.filename = ''
     gv.file_dir = ''
     gv.file_path = ''
@@ -20,6 +20,9 @@ fileLines = []
 # Exemplo: {'#water_consumption_start': 1, '#parameters_start': 48, ...}
 fileStartIndices = {}
 
+# `project.LenhsDocument` do arquivo aberto, reaproveitado por `file_manager.getDocument()` enquanto o arquivo não mudar.
+document = None
+
 tooltipList = [
     'Volume de água transportado que passa em uma determinada seção por intervalo de tempo.',
     'Definida pela soma do desnível geométrico mais a perda de carga existente entre diferentes pontos no sistema.',
@@ -0,0 +1,135 @@
+"""
+indicators.py
+Indicadores diários de consumo de água calculados para todos os dias de uma vez: horas e consumo acima e abaixo da
+vazão média, consumo na ponta (18h às 21h) e fora da ponta, fatores K2 e FD e o dia de maior consumo.
+Os dias de cada bloco são colocados em uma matriz dias × medições e cada indicador é uma redução por linha.
+Não depende do wx.
+"""
+
+import csv
+import numpy as np
+import app.water_series as water_series
+import app.water_import as water_import
+
+# Horário de ponta: das 18h00 às 20h59. A máscara tem uma posição por minuto do dia e é indexada pelos minutos das medições.
+PONTA_INICIO = 18 * 60
+PONTA_FIM = 21 * 60
+PONTA = np.zeros(water_series.MINUTOS_DIA, dtype=bool)
+PONTA[PONTA_INICIO:PONTA_FIM] = True
+
+# Colunas da tabela de indicadores, na ordem do CSV.
+COLUNAS = ('data', 'consumo', 'vazaoMaxima', 'vazaoMedia', 'vazaoMinima', 'k2', 'fd', 'horasAcima', 'horasAbaixo',
+    'consumoAcima', 'consumoAbaixo', 'consumoPonta', 'consumoForaPonta', 'percentualPonta', 'percentualForaPonta', 'maiorConsumo')
+
+def getDayMatrix(inicios, minutos, valores):
+    ''' Recebe os inícios de cada dia (com uma posição extra no final), os minutos e as vazões de um bloco de dias inteiros
+    e retorna uma tupla (minutos, valores, validos) de matrizes dias × medições.
+    Se todos os dias tiverem a mesma quantidade de medições, as matrizes são apenas `reshape`. Se não, os dias mais curtos
+    são completados com zeros e `validos` marca as posições com medição. '''
+
+    contagens = np.diff(inicios)
+    dias = len(contagens)
+    largura = int(contagens.max()) if dias else 0
+
+    if dias and (contagens == largura).all():
+        forma = (dias, largura)
+        return (minutos.reshape(forma), valores.reshape(forma), np.ones(forma, dtype=bool))
+
+    linha = np.repeat(np.arange(dias), contagens)
+    coluna = np.arange(len(valores)) - np.repeat(inicios[:-1] - inicios[0], contagens)
+
+    matrizMinutos = np.zeros((dias, largura), dtype=minutos.dtype)
+    matrizValores = np.zeros((dias, largura), dtype=np.float64)
+    validos = np.zeros((dias, largura), dtype=bool)
+
+    matrizMinutos[linha, coluna] = minutos
+    matrizValores[linha, coluna] = valores
+    validos[linha, coluna] = True
+
+    return (matrizMinutos, matrizValores, validos)
+
+def getBlockIndicators(minutos, valores, validos):
+    ''' Calcula os indicadores de um bloco de dias a partir das matrizes de `getDayMatrix()`.
+    Retorna um dicionário com um array por coluna de `COLUNAS`, exceto 'data' e 'maiorConsumo'. '''
+
+    valores = np.where(validos, valores, 0).astype(np.float64)
+    contagens = validos.sum(axis=1)
+
+    consumo = valores.sum(axis=1)
+    maxima = np.where(validos, valores, -np.inf).max(axis=1)
+    minima = np.where(validos, valores, np.inf).min(axis=1)
+    media = consumo / contagens
+
+    # Tempo desde a medição anterior, em horas. A primeira medição do dia não conta, como no gráfico do dia.
+    intervalos = np.zeros(valores.shape)
+    intervalos[:, 1:] = (np.diff(minutos.astype(np.int64), axis=1) % water_series.MINUTOS_DIA) / 60
+    intervalos[~validos] = 0
+
+    # A linha de vazão média do gráfico usa duas casas decimais. A separação acima/abaixo usa o mesmo valor.
+    acima = (valores >= np.round(media, 2)[:, None]) & validos
+    abaixo = ~acima & validos
+    ponta = PONTA[minutos] & validos
+
+    consumoPonta = np.where(ponta, valores, 0).sum(axis=1)
+    consumoForaPonta = np.where(validos & ~ponta, valores, 0).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k2 = maxima / media
+        fd = np.where(k2 != 0, 1 / k2, np.nan)
+        percentualPonta = consumoPonta / consumo * 100
+        percentualForaPonta = consumoForaPonta / consumo * 100
+
+    return {'consumo': consumo, 'vazaoMaxima': maxima, 'vazaoMedia': media, 'vazaoMinima': minima, 'k2': k2, 'fd': fd,
+        'horasAcima': (intervalos * acima).sum(axis=1), 'horasAbaixo': (intervalos * abaixo).sum(axis=1),
+        'consumoAcima': np.where(acima, valores, 0).sum(axis=1), 'consumoAbaixo': np.where(abaixo, valores, 0).sum(axis=1),
+        'consumoPonta': consumoPonta, 'consumoForaPonta': consumoForaPonta,
+        'percentualPonta': percentualPonta, 'percentualForaPonta': percentualForaPonta}
+
+def iterDayBlocks(serie, tamanho):
+    ''' Gera tuplas (primeiroDia, fimDia, minutos, valores) com blocos de dias inteiros de `serie`.
+    Uma WaterStore é lida em blocos de até `tamanho` medições. Uma WaterSeries, que já está em memória, é um bloco só. '''
+
+    if hasattr(serie, 'iterChunks'):
+        yield from serie.iterChunks(tamanho)
+    else:
+        yield (0, serie.getDaysCount(), serie.minutos, serie.valores)
+
+def getDailyIndicators(serie, tamanho=water_import.TAMANHO_BLOCO):
+    ''' Retorna a tabela de indicadores de todos os dias de `serie` (WaterSeries ou WaterStore): um dicionário com um array
+    por coluna de `COLUNAS` e um elemento por dia. 'maiorConsumo' é True apenas no dia de maior consumo. '''
+
+    n = serie.getDaysCount()
+    tabela = {name: np.full(n, np.nan) for name in COLUNAS[1:-1]}
+
+    for primeiro, fimDia, minutos, valores in iterDayBlocks(serie, tamanho):
+        if fimDia <= primeiro:
+            continue
+
+        inicios = serie.inicios[primeiro:fimDia + 1]
+        bloco = getBlockIndicators(*getDayMatrix(inicios, np.asarray(minutos), np.asarray(valores)))
+
+        for name, array in bloco.items():
+            tabela[name][primeiro:fimDia] = array
+
+    tabela['maiorConsumo'] = np.zeros(n, dtype=bool)
+    if n:
+        tabela['maiorConsumo'][np.argmax(tabela['consumo'])] = True
+
+    return {'data': np.array(serie.getDates()), **tabela}
+
+def getMaxDay(tabela):
+    ''' Retorna uma tupla (dia, consumo, k2, fd) com o índice e o consumo do dia de maior consumo da tabela de
+    `getDailyIndicators()` e seus fatores K2 e FD. O FD é nan quando o K2 é zero, como em `getBlockIndicators()`. '''
+
+    i = int(np.argmax(tabela['maiorConsumo']))
+    k2 = float(tabela['k2'][i])
+
+    return (i, float(tabela['consumo'][i]), k2, 1 / k2 if k2 != 0 else np.nan)
+
+def writeCSV(tabela, path):
+    ''' Salva a tabela de `getDailyIndicators()` em um CSV, com uma linha por dia. '''
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUNAS)
+        writer.writerows(zip(*(tabela[name].tolist() for name in COLUNAS)))
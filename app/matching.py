@@ -0,0 +1,141 @@
+"""
+matching.py
+Comparação dos dias medidos com os perfis de consumo do banco de dados de referência (`water_reference.py`).
+Os dias e os perfis são curvas horárias normalizadas pela vazão média (Q/Qmédia). A distância entre cada dia e cada perfil
+é o erro quadrático médio das horas com medição, calculado para todos os pares de um bloco com um produto de matrizes.
+Os dias são percorridos em blocos de `iterDayBlocks()` e os perfis em blocos de `TAMANHO_PERFIS`, então a memória não
+cresce com anos de dados ou milhares de perfis. Não depende do wx.
+"""
+
+import numpy as np
+import app.water_import as water_import
+import app.water_reference as water_reference
+import app.indicators as indicators
+
+HORAS = len(water_reference.HORARIOS)
+MINUTOS_HORA = 60
+
+# Perfis por bloco no produto de matrizes.
+TAMANHO_PERFIS = 4096
+
+def normalize(curvas, validos):
+    ''' Divide cada linha de `curvas` pela média das posições válidas. Retorna uma tupla (curvas, validos).
+    Linhas sem consumo não podem ser normalizadas e ficam sem nenhuma posição válida. '''
+
+    contagens = validos.sum(axis=1)
+    somas = np.where(validos, curvas, 0).sum(axis=1)
+    medias = np.divide(somas, contagens, out=np.zeros(len(curvas)), where=contagens > 0)
+
+    validos = validos & (medias > 0)[:, None]
+    curvas = np.divide(curvas, medias[:, None], out=np.zeros(curvas.shape), where=validos)
+
+    return (curvas, validos)
+
+def getHourlyDays(inicios, minutos, valores):
+    ''' Recebe os inícios de cada dia (com uma posição extra no final), os minutos e as vazões de um bloco de dias
+    e retorna uma tupla (curvas, validos) de matrizes dias × `HORAS`, com a vazão média de cada hora normalizada.
+    `validos` marca as horas que têm alguma medição. '''
+
+    dias = len(inicios) - 1
+    celulas = np.repeat(np.arange(dias), np.diff(inicios)) * HORAS + np.asarray(minutos) // MINUTOS_HORA
+
+    somas = np.bincount(celulas, weights=valores, minlength=dias * HORAS).reshape(dias, HORAS)
+    contagens = np.bincount(celulas, minlength=dias * HORAS).reshape(dias, HORAS)
+    validos = contagens > 0
+
+    return normalize(np.divide(somas, contagens, out=np.zeros(somas.shape), where=validos), validos)
+
+def getDistances(curvas, validos, perfis):
+    ''' Retorna a matriz dias × perfis com a raiz do erro quadrático médio entre cada dia e cada perfil, considerando
+    apenas as horas válidas de cada dia. Dias sem horas válidas têm distância infinita.
+    Usa |d - p|² = Σw·d² - 2·(w·d)·p + w·p², com os dois últimos termos calculados como produtos de matrizes. '''
+
+    pesos = validos.astype(np.float64)
+    ponderadas = curvas * pesos
+
+    quadrados = (ponderadas * curvas).sum(axis=1)[:, None] - 2 * (ponderadas @ perfis.T) + pesos @ (perfis * perfis).T
+    horas = pesos.sum(axis=1)[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(horas > 0, np.sqrt(np.maximum(quadrados, 0) / horas), np.inf)
+
+def getShiftedDistances(curvas, validos, perfis, deslocamento=0):
+    ''' Como `getDistances()`, mas cada perfil também é comparado deslocado de até `deslocamento` horas para cada lado
+    (deslocamento circular) e vale a menor distância. É um alinhamento simples, para dias com o pico adiantado ou atrasado. '''
+
+    distancias = getDistances(curvas, validos, perfis)
+    for horas in range(1, deslocamento + 1):
+        for sentido in (-horas, horas):
+            np.minimum(distancias, getDistances(curvas, validos, np.roll(perfis, sentido, axis=1)), out=distancias)
+
+    return distancias
+
+def getTopK(ids, distancias, k):
+    ''' Retorna uma tupla (ids, distancias) de matrizes linhas × `k` com os `k` perfis mais próximos de cada linha,
+    do mais próximo para o mais distante. `ids` são os ids das colunas de `distancias`. '''
+
+    k = min(k, distancias.shape[1])
+    if k < distancias.shape[1]:
+        colunas = np.argpartition(distancias, k - 1, axis=1)[:, :k]
+    else:
+        colunas = np.tile(np.arange(k), (len(distancias), 1))
+    melhores = np.take_along_axis(distancias, colunas, axis=1)
+
+    ordem = np.argsort(melhores, axis=1, kind='stable')
+    return (np.asarray(ids)[np.take_along_axis(colunas, ordem, axis=1)], np.take_along_axis(melhores, ordem, axis=1))
+
+def getBlockMatches(curvas, validos, ids, perfis, k, deslocamento=0, tamanhoPerfis=TAMANHO_PERFIS):
+    ''' Retorna uma tupla (ids, distancias) com os `k` perfis mais próximos de cada linha de `curvas`. Os perfis são
+    comparados em blocos de `tamanhoPerfis`, e os `k` melhores de cada bloco são juntados aos anteriores. '''
+
+    melhoresIds = np.empty((len(curvas), 0), dtype=np.int64)
+    melhores = np.empty((len(curvas), 0))
+
+    for inicio in range(0, len(perfis), tamanhoPerfis):
+        fim = inicio + tamanhoPerfis
+        blocoIds, bloco = getTopK(ids[inicio:fim], getShiftedDistances(curvas, validos, perfis[inicio:fim], deslocamento), k)
+
+        colunas = np.concatenate((melhoresIds, blocoIds), axis=1)
+        melhoresIds, melhores = getTopK(np.arange(colunas.shape[1]), np.concatenate((melhores, bloco), axis=1), k)
+        melhoresIds = np.take_along_axis(colunas, melhoresIds, axis=1)
+
+    return (melhoresIds, melhores)
+
+def matchDays(serie, database=None, k=3, deslocamento=0, tamanho=water_import.TAMANHO_BLOCO, tamanhoPerfis=TAMANHO_PERFIS):
+    ''' Compara todos os dias de `serie` (WaterSeries ou WaterStore) e o dia típico com os perfis de `database`
+    (o banco de referência, se None). Retorna um dicionário com:
+    - 'ids' e 'distancias': matrizes dias × k com os ids dos `k` perfis mais próximos de cada dia e as distâncias;
+    - 'tipico' e 'tipicoValidos': a curva do dia típico, média das curvas normalizadas dos dias, e as horas com medição;
+    - 'tipicoIds' e 'tipicoDistancias': os `k` perfis mais próximos do dia típico. '''
+
+    if database is None:
+        database = water_reference.getDatabase()
+
+    ids, perfis = database.getProfileMatrix()
+    perfis, _ = normalize(perfis, np.ones(perfis.shape, dtype=bool))
+
+    n = serie.getDaysCount()
+    k = min(k, len(ids))
+    resultado = {'ids': np.full((n, k), -1, dtype=np.int64), 'distancias': np.full((n, k), np.inf)}
+    somas, contagens = np.zeros(HORAS), np.zeros(HORAS)
+
+    for primeiro, fimDia, minutos, valores in indicators.iterDayBlocks(serie, tamanho):
+        if fimDia <= primeiro:
+            continue
+
+        inicios = serie.inicios[primeiro:fimDia + 1]
+        curvas, validos = getHourlyDays(inicios - inicios[0], minutos, np.asarray(valores, dtype=np.float64))
+
+        resultado['ids'][primeiro:fimDia], resultado['distancias'][primeiro:fimDia] = getBlockMatches(curvas, validos, ids,
+            perfis, k, deslocamento, tamanhoPerfis)
+
+        somas += np.where(validos, curvas, 0).sum(axis=0)
+        contagens += validos.sum(axis=0)
+
+    medias = np.divide(somas, contagens, out=np.zeros(HORAS), where=contagens > 0)
+    tipico, tipicoValidos = normalize(medias[None, :], (contagens > 0)[None, :])
+    tipicoIds, tipicoDistancias = getBlockMatches(tipico, tipicoValidos, ids, perfis, k, deslocamento, tamanhoPerfis)
+
+    resultado.update({'tipico': tipico[0], 'tipicoValidos': tipicoValidos[0], 'tipicoIds': tipicoIds[0],
+        'tipicoDistancias': tipicoDistancias[0]})
+    return resultado
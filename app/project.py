@@ -0,0 +1,441 @@
+"""
+project.py
+Leitura de arquivos .lenhs sem interface gráfica e sem as variáveis de global_variables.py.
+Cada seção é convertida para um dicionário com os valores já em float / int.
+"""
+
+import os
+import re
+import mmap
+import shutil
+import locale
+import tempfile
+import numpy as np
+import app.calculations as calculations
+import app.water_import as water_import
+import app.water_series as water_series
+import app.water_cache as water_cache
+
+# Marcadores de seção: '#<nome>_start' e '#<nome>_end', sempre no início da linha.
+MARCADOR = re.compile(rb'^#(\w+?)_(start|end)[ \t]*\r?$', re.MULTILINE)
+
+# Tamanho dos blocos da cópia de bytes quando os.sendfile não está disponível.
+TAMANHO_COPIA = 1 << 20
+
+# Chave de `loadProject()` de cada seção do arquivo.
+SECOES = {
+    'water_consumption': 'water',
+    'parameters': 'parameters',
+    'parameters_pump': 'pump',
+    'parameters_system': 'system',
+    'expenses': 'expenses',
+    'hydric': 'hydric'
+}
+
+class LenhsDocument:
+    ''' Acesso por seção a um arquivo .lenhs.
+
+    Ao abrir, o arquivo é percorrido uma única vez (com mmap e uma expressão regular, sem decodificar as linhas) para montar
+    o índice `secoes`: {nome: (inicio, fim)}, com as posições em bytes dos dados de cada seção. Uma seção só é lida e
+    convertida no primeiro acesso, e o resultado fica guardado. Ler os Parâmetros do Sistema, portanto, não lê os dados
+    de consumo de água. `marcadores` guarda as mesmas posições incluindo as linhas de início e fim, usadas ao salvar.
+    `chave` é a tupla (mtime, tamanho) do arquivo indexado, para saber se ele mudou no disco depois disso.
+
+    Os dados de consumo de água passam pelo cache de `water_cache.py`, a não ser que `useCache` seja False. '''
+
+    def __init__(self, path, useCache=True):
+        self.path = path
+        self.useCache = useCache
+        self.secoes = {}
+        self.marcadores = {}
+        self.cache = {}
+        self.indexSections()
+
+    def indexSections(self):
+        ''' (Re)constrói o índice de seções e limpa as seções já convertidas. '''
+
+        self.secoes.clear()
+        self.marcadores.clear()
+        self.cache.clear()
+        self.chave = water_cache.getFileKey(self.path)
+        inicios = {}
+
+        with open(self.path, 'rb') as f:
+            # mmap não aceita arquivos vazios.
+            if f.seek(0, 2) == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for match in MARCADOR.finditer(data):
+                    name = match.group(1).decode('ascii')
+                    fimLinha = match.end() + 1 if data[match.end():match.end() + 1] == b'\n' else match.end()
+
+                    if match.group(2) == b'start':
+                        inicios[name] = (match.start(), fimLinha)
+                    elif name in inicios:
+                        marcador, inicio = inicios.pop(name)
+                        self.secoes[name] = (inicio, match.start())
+                        self.marcadores[name] = (marcador, fimLinha)
+
+    def hasSection(self, name):
+        ''' Retorna True se o arquivo contém a seção `name`. Ex: 'parameters', 'water_consumption'. '''
+
+        return name in self.secoes
+
+    def getSectionBytes(self, name):
+        ''' Retorna os bytes dos dados da seção `name`, sem os marcadores. '''
+
+        inicio, fim = self.secoes[name]
+        with open(self.path, 'rb') as f:
+            f.seek(inicio)
+            return f.read(fim - inicio)
+
+    def getSectionLines(self, name):
+        ''' Retorna as linhas da seção `name`, como `readlines()` as retornaria. '''
+
+        return decodeLines(self.getSectionBytes(name))
+
+    def getLinesWithout(self, name):
+        ''' Retorna as linhas do arquivo, como `readlines()` as retornaria, sem os dados da seção `name`. Os marcadores
+        da seção continuam nas linhas, sem nada entre eles. Os bytes da seção não são lidos. '''
+
+        with open(self.path, 'rb') as f:
+            if name not in self.secoes:
+                return decodeLines(f.read())
+
+            inicio, fim = self.secoes[name]
+            data = f.read(inicio)
+            f.seek(fim)
+
+            return decodeLines(data + f.read())
+
+    def iterSectionLines(self, name):
+        ''' Gera as linhas da seção `name` uma a uma, sem carregar a seção inteira em memória. '''
+
+        inicio, fim = self.secoes[name]
+        encoding = locale.getpreferredencoding(False)
+
+        with open(self.path, 'rb') as f:
+            f.seek(inicio)
+            for line in f:
+                if inicio >= fim:
+                    break
+
+                inicio += len(line)
+                yield line.decode(encoding).replace('\r\n', '\n')
+
+    def getSection(self, name):
+        ''' Retorna a seção `name` convertida pela função correspondente deste módulo, ou None se a seção não existir.
+        A conversão é feita apenas no primeiro acesso. '''
+
+        if name not in self.cache:
+            if not self.hasSection(name):
+                return None
+
+            if name == 'water_consumption':
+                self.cache[name] = water_cache.loadWaterSeries(self.path, lambda: self.getSectionBytes(name),
+                    lambda data: parseSection(name, decodeLines(data)), self.useCache)
+            else:
+                self.cache[name] = parseSection(name, self.getSectionLines(name))
+
+        return self.cache[name]
+
+    def getWaterData(self):
+        return self.getSection('water_consumption')
+
+    def getParameters(self):
+        return self.getSection('parameters')
+
+    def getPumpData(self):
+        return self.getSection('parameters_pump')
+
+    def getSystemParameters(self):
+        return self.getSection('parameters_system')
+
+    def getExpenses(self):
+        return self.getSection('expenses')
+
+    def getHydricData(self):
+        return self.getSection('hydric')
+
+    def getProject(self):
+        ''' Retorna todas as seções no formato de `loadProject()`. '''
+
+        return {key: self.getSection(name) for name, key in SECOES.items()}
+
+    def saveSection(self, name, lines, atStart=False):
+        ''' Grava `lines` (linhas terminadas em '\\n', sem os marcadores) como os dados da seção `name`.
+        Se a seção não existir, ela é criada no início (`atStart`) ou no fim do arquivo.
+
+        O arquivo novo é montado em um arquivo temporário na mesma pasta: o que vem antes e depois da seção é copiado em
+        bytes, sem ser lido como texto, e só a seção é escrita. No fim, `os.replace()` troca os arquivos de uma vez, então
+        uma falha no meio da gravação não corrompe o arquivo original. '''
+
+        text = f'#{name}_start\n' + ''.join(lines) + f'#{name}_end\n'
+        data = text.replace('\n', os.linesep).encode(locale.getpreferredencoding(False))
+        size = os.path.getsize(self.path)
+
+        if name in self.marcadores:
+            inicio, fim = self.marcadores[name]
+        elif atStart:
+            inicio = fim = 0
+        else:
+            inicio = fim = size
+
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tempPath = tempfile.mkstemp(dir=folder, prefix='.lenhs_', suffix='.tmp')
+
+        try:
+            with open(self.path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                copyRange(src, dst, 0, inicio)
+
+                # Um arquivo sem '\n' no final não pode ter a seção colada na última linha.
+                if inicio == size and size > 0:
+                    src.seek(size - 1)
+                    if src.read(1) != b'\n':
+                        dst.write(os.linesep.encode('ascii'))
+
+                dst.write(data)
+                copyRange(src, dst, fim, size)
+
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            shutil.copymode(self.path, tempPath)
+            os.replace(tempPath, self.path)
+
+        except:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+            raise
+
+        self.indexSections()
+
+def copyRange(src, dst, inicio, fim):
+    ''' Copia os bytes [inicio, fim) do arquivo `src` para a posição atual de `dst`, ambos abertos em modo binário.
+    Usa os.sendfile, que copia dentro do kernel, quando disponível. Caso contrário, copia em blocos de `TAMANHO_COPIA`. '''
+
+    if fim <= inicio:
+        return
+
+    dst.flush()
+    if hasattr(os, 'sendfile'):
+        try:
+            while inicio < fim:
+                sent = os.sendfile(dst.fileno(), src.fileno(), inicio, fim - inicio)
+                if sent == 0:
+                    break
+                inicio += sent
+        except OSError:
+            pass    # Sistema de arquivos sem suporte: o restante vai pela cópia em blocos.
+
+    src.seek(inicio)
+    while inicio < fim:
+        block = src.read(min(TAMANHO_COPIA, fim - inicio))
+        if not block:
+            break
+        dst.write(block)
+        inicio += len(block)
+
+def decodeLines(data):
+    ''' Decodifica os bytes de uma seção e retorna as linhas, como `readlines()` as retornaria. '''
+
+    text = data.decode(locale.getpreferredencoding(False))
+    return text.replace('\r\n', '\n').splitlines(True)
+
+def parseSection(name, lines):
+    ''' Converte as linhas de dados da seção `name` com a função de leitura correspondente deste módulo. '''
+
+    # As funções de leitura recebem apenas as linhas da seção, com os índices ajustados.
+    indices = {f'#{name}_start': 0, f'#{name}_end': len(lines)}
+    return LEITORES[name](lines, indices)
+
+def saveSection(path, name, lines, atStart=False):
+    ''' Grava apenas a seção `name` do arquivo .lenhs em `path`. Ver `LenhsDocument.saveSection()`. '''
+
+    LenhsDocument(path).saveSection(name, lines, atStart)
+
+def loadProject(path):
+    ''' Lê o arquivo .lenhs em `path` e retorna um dicionário com as seções convertidas.
+    Seções ausentes ou vazias ficam com None. Ex: {'water': WaterSeries, 'parameters': {...}, 'pump': None, ...} '''
+
+    return LenhsDocument(path).getProject()
+
+def loadProjectLines(lines):
+    ''' Igual a `loadProject()`, mas recebe as linhas do arquivo já lidas. Ex: `gv.fileLines`, que não tem os dados
+    de consumo de água (ver `fm.getWaterSeries()`). '''
+
+    indices = getSectionIndices(lines)
+
+    return {
+        'water': getWaterData(lines, indices),
+        'parameters': getParameters(lines, indices),
+        'pump': getPumpData(lines, indices),
+        'system': getSystemParameters(lines, indices),
+        'expenses': getExpenses(lines, indices),
+        'hydric': getHydricData(lines, indices)
+    }
+
+def getSectionIndices(lines):
+    ''' Recebe as linhas de um arquivo e retorna o dicionário com as linhas '...start' e '...end' e seus indices,
+    no mesmo formato de `gv.fileStartIndices`. '''
+
+    indices = {}
+    i = 0
+
+    for line in lines:
+        if line.strip()[-5:] == 'start':
+            indices[f'{line.strip()}'] = i + 1  # O indice ja vai apontar para o inicio dos dados.
+
+        if line.strip()[-3:] == 'end':
+            indices[f'{line.strip()}'] = i  # O indice vai apontar exatamente para o indicador de fim de dados.
+
+        i += 1
+
+    return indices
+
+def getWaterData(lines, indices):
+    ''' Retorna os dados de consumo de água como WaterSeries. Levanta ValueError se os dados forem inválidos. '''
+
+    serie = water_series.WaterSeries.fromFileLines(lines, indices)
+    if not serie:
+        return None
+
+    ordinais = np.repeat(serie.datas, serie.getDailyCounts())
+    water_import.checkDays(ordinais, serie.minutos)
+
+    return serie
+
+def getParameters(lines, indices):
+    ''' Retorna os Parâmetros do Sistema. '''
+
+    if not '#parameters_start' in indices.keys():
+        return None
+
+    i = indices['#parameters_start']
+    values = [lines[j].strip() for j in range(i, i + 7)]
+
+    return {
+        'vazaoBombeada': float(values[0]),
+        'alturaNanometrica': float(values[1]),
+        'rendimentoMotor': float(values[2]),
+        'rendimentoBomba': float(values[3]),
+        'bombasParalelo': int(values[4]),
+        'operacaoHorarioPonta': float(values[5]),
+        'operacaoHorarioForaPonta': float(values[6])
+    }
+
+def getPumpData(lines, indices):
+    ''' Retorna os dados da Curva da Bomba como a tupla (q, h). '''
+
+    if not '#parameters_pump_start' in indices.keys():
+        return None
+
+    start = indices['#parameters_pump_start']
+    end = indices['#parameters_pump_end']
+    if start == end:
+        return None
+
+    q = []
+    h = []
+    for i in range(start, end):
+        words = lines[i].split()
+        q.append(float(words[0]))
+        h.append(float(words[1]))
+
+    return (q, h)
+
+def getSystemParameters(lines, indices):
+    ''' Retorna os dados da Curva do Sistema. O diâmetro é convertido para metros e `singularidades` já contém o
+    somatório dos coeficientes, informado ou calculado a partir das quantidades de cada peça. '''
+
+    if not '#parameters_system_start' in indices.keys():
+        return None
+
+    i = indices['#parameters_system_start']
+    if i == indices['#parameters_system_end']:
+        return None
+
+    values = [lines[j].strip() for j in range(i, i + 15)]
+
+    # Não há no programa uma tabela de rugosidade por material, estado e idade, então o valor precisa ter sido informado.
+    if values[3] == '':
+        raise ValueError('Rugosidade do material não informada na Curva do Sistema.')
+
+    if values[7] == '':
+        singularidades = calculations.getSingularidadesSum(values[8:15])
+    else:
+        singularidades = float(values[7])
+
+    return {
+        'desnivel': float(values[0]),
+        'comprimento': float(values[1]),
+        'diametro': float(values[2]) / 1000,
+        'rugosidade': float(values[3]),
+        'singularidades': singularidades
+    }
+
+def getExpenses(lines, indices):
+    ''' Retorna os dados de Custos de Operação. Campos vazios ficam com None. '''
+
+    if not '#expenses_start' in indices.keys():
+        return None
+
+    i = indices['#expenses_start']
+    values = []
+    for j in range(i + 1, i + 11):
+        value = lines[j].strip()
+        values.append(float(value) if value != '' else None)
+
+    return {
+        'color': lines[i].strip(),
+        'aliquotas': values[0:3],
+        'green': values[3:6],
+        'blue': values[6:10]
+    }
+
+def getHydricData(lines, indices):
+    ''' Retorna uma lista com os dois formulários do Balanço Hídrico de Reservatório. Formulários vazios ficam com None.
+    No segundo formulário, `area` é a área da base e os demais valores são níveis. No primeiro, `area` é None.
+    `base` guarda o primeiro campo como foi informado (volume útil ou área da base).
+    `curva` é None quando o formulário usa os dados de consumo de água. '''
+
+    if not '#hydric_start' in indices.keys():
+        return None
+
+    index = indices['#hydric_start']
+    forms = []
+
+    for i in range(0, 2):
+        values = [lines[j].strip() for j in range(index, index + 7)]
+        index += 7
+
+        if values[0] == '':
+            forms.append(None)
+            continue
+
+        words = values[3].split()
+        vazoes = values[6].split()[1:]
+
+        forms.append({
+            'area': float(values[0]) if i == 1 else None,
+            'base': float(values[0]),
+            'minimo': float(values[1]),
+            'maximo': float(values[2]),
+            'curva': None if words[0] == '-1' else [float(word) for word in words],
+            'diasSim': int(values[4]),
+            'inicial': float(values[5]),
+            'vazoes': [float(value) for value in vazoes]
+        })
+
+    return forms
+
+# Função de leitura de cada seção, usada por `LenhsDocument.getSection()`.
+LEITORES = {
+    'water_consumption': getWaterData,
+    'parameters': getParameters,
+    'parameters_pump': getPumpData,
+    'parameters_system': getSystemParameters,
+    'expenses': getExpenses,
+    'hydric': getHydricData
+}
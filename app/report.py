@@ -0,0 +1,405 @@
+"""
+report.py
+Geração do relatório em .PDF sem interface gráfica. Usado pela janela de exportação e pelo modo em lote de relatórios.
+Uso: python -m app.report PASTA [-o SAIDA] [-j PROCESSOS] [-f png|svg]
+"""
+
+import os
+import io
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fpdf import FPDF, XPos
+import app.project as project
+import app.calculations as calculations
+import app.batch as batch
+
+class PDF(FPDF):
+    def footer(self):
+        self.set_left_margin(0)
+        self.set_y(-15)
+        self.set_font("helvetica", "I", 12)
+        self.set_text_color(128)
+        self.cell(0, 10, f"Página {self.page_no()}", align="C")
+
+
+    def colored_table(self, headings, rows, col_widths=(80, 20, 40), fill_color=(255, 100, 0)):
+        # Colors, line width and bold font:
+        self.set_fill_color(fill_color[0], fill_color[1], fill_color[2])
+        self.set_text_color(255)
+        self.set_draw_color(fill_color[0], fill_color[1], fill_color[2])
+        self.set_line_width(0.3)
+        self.set_font(style="B")
+        for col_width, heading in zip(col_widths, headings):
+            self.cell(col_width, 7, heading, XPos.LEFT, XPos.RIGHT, align="C", fill=True)
+            # self.cell(60, 10, 'Powered by FPDF.', new_x=XPos.LMARGIN, new_y=YPos.NEXT, , align='C')
+
+        self.ln()
+        # Color and font restoration:
+        self.set_fill_color(224, 235, 255)
+        self.set_text_color(0)
+        self.set_font()
+        fill = False
+        for row in rows:
+            self.cell(col_widths[0], 6, row[0], "LR", fill=fill)
+            self.cell(col_widths[1], 6, row[1], "LR", fill=fill)
+            self.cell(col_widths[2], 6, row[2], "LR", fill=fill)
+            self.ln()
+            fill = not fill
+        self.cell(sum(col_widths), 0, "", "T")
+
+# Formatos aceitos para os gráficos embutidos no relatório. O FPDF não incorpora gráficos em .pdf, só em .svg.
+FORMATOS = ('png', 'svg')
+
+def initWorker():
+    ''' Executada ao iniciar cada processo. Sem janelas, o matplotlib precisa do backend Agg. '''
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+def formatValue(value):
+    ''' Retorna o valor como foi digitado: sem o '.0' de números inteiros e vazio se for None. '''
+
+    if value is None:
+        return ''
+    if float(value).is_integer():
+        return str(int(value))
+
+    return str(value)
+
+def checkProject(data):
+    ''' Levanta ValueError se faltar alguma seção necessária para o relatório. '''
+
+    names = {
+        'water': 'Consumo de Água',
+        'parameters': 'Parâmetros do Sistema',
+        'pump': 'Curva da Bomba',
+        'system': 'Curva do Sistema',
+        'expenses': 'Custos de Operação',
+        'hydric': 'Balanço Hídrico de Reservatório'
+    }
+
+    missing = [name for key, name in names.items() if not data[key]]
+    if missing:
+        raise ValueError(f'O arquivo não contém os dados completos. Seções ausentes: {", ".join(missing)}.')
+
+def renderFigures(data, formato='png'):
+    ''' Retorna um dicionário com os gráficos do relatório em memória (io.BytesIO), com as chaves water, pump, system,
+    operation, opt0 e opt1. `formato` é 'png' ou 'svg' (vetorial). Os gráficos de formulários hídricos vazios não são gerados. '''
+
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato de imagem inválido: {formato}.')
+
+    import matplotlib.pyplot as plt
+    import app.figures as figures
+
+    q, h = data['pump']
+    figs = {
+        'water': figures.getWaterSummaryFigure(data['water']),
+        'pump': figures.getPumpFigure(q, h),
+        'system': figures.getSystemFigure(q, data['system']),
+        'operation': figures.getOperationFigure(q, h, data['system'])[0]
+    }
+
+    for ID, formulario in enumerate(data['hydric']):
+        if formulario:
+            simulacao = calculations.simulateHydric(formulario, data['water'])
+            figs[f'opt{ID}'] = figures.getReservoirFigure(ID, simulacao)
+
+    images = {}
+    for name, fig in figs.items():
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=formato, bbox_inches='tight')
+        plt.close(fig)
+
+        buffer.seek(0)
+        images[name] = buffer
+
+    return images
+
+def getHydricFields(ID, formulario):
+    ''' Retorna as linhas da tabela de um formulário do Balanço Hídrico, como em `HydricBalance.getOpt1Fields()`. '''
+
+    if ID == 0:
+        labels = [('Volume útil', 'm³'), ('Volume mínimo', 'm³'), ('Volume máximo', 'm³'), ('Dias de simulação', ''),
+            ('Volume inicial', 'm³'), ('Soma da vazão das bombas', 'm³/s')]
+    else:
+        labels = [('Área da base', 'm²'), ('Nível mínimo', 'm'), ('Nível máximo', 'm'), ('Dias de simulação', ''),
+            ('Nível inicial', 'm'), ('Soma da vazão das bombas', 'm³/s')]
+
+    if formulario:
+        values = [formatValue(formulario['base']), formatValue(formulario['minimo']), formatValue(formulario['maximo']),
+            str(formulario['diasSim']), formatValue(formulario['inicial']), str(float(sum(formulario['vazoes'])))]
+    else:
+        values = ['', '', '', '', '', '0']
+
+    return [(label, unit, value) for (label, unit), value in zip(labels, values)]
+
+def getReportTables(data):
+    ''' Retorna um dicionário com as linhas (nome, unidade, valor) de cada tabela do relatório. '''
+
+    parametros = data['parameters']
+    expenses = data['expenses']
+    indicadores = calculations.getEnergyIndicators(parametros)
+
+    tables = {}
+    tables['parameters'] = [
+        ('Vazão Bombeada', 'm³/h', f"{parametros['vazaoBombeada']:.10f}"),
+        ('Altura Manométrica', 'm', f"{parametros['alturaNanometrica']:.10f}"),
+        ('Rendimento do Motor', '%', formatValue(parametros['rendimentoMotor'])),
+        ('Rendimento da Bomba', '%', formatValue(parametros['rendimentoBomba'])),
+        ('Bombas em paralelo', '', str(parametros['bombasParalelo'])),
+        ('Tempo dentro do Horário de Ponta', 'h/dia', formatValue(parametros['operacaoHorarioPonta'])),
+        ('Tempo fora do Horário de Ponta', 'h/dia', formatValue(parametros['operacaoHorarioForaPonta']))
+    ]
+
+    tables['energy'] = [
+        ('Consumo na ponta', 'kWh/mês', f"{indicadores['consumoPonta']:.2f}"),
+        ('Consumo fora da ponta', 'kWh/mês', f"{indicadores['consumoForaPonta']:.2f}"),
+        ('Consumo Total', 'kWh/mês', f"{indicadores['consumoTotal']:.2f}"),
+        ('Volume Bombeado', 'm³/mês', f"{indicadores['volumeBombeado']:.2f}"),
+        ('Consumo Específico', 'kWh/m³', f"{indicadores['consumoEspecifico']:.2f}"),
+        ('Consumo Específico Normalizado', 'kWh/m³/100m', f"{indicadores['consumoEspecificoNormalizado']:.2f}")
+    ]
+
+    aliquotas = [formatValue(value) for value in expenses['aliquotas']]
+    tables['taxes'] = [
+        ('Alíquota ICMS', '%', aliquotas[0]),
+        ('Alíquota PIS', '%', aliquotas[1]),
+        ('Alíquota CONFINS', '%', aliquotas[2]),
+    ]
+
+    green = [formatValue(value) for value in expenses['green']]
+    tables['greenTax'] = [
+        ('Energia Ponta', 'R$/kWh', green[0]),
+        ('Energia Fora Ponta', 'R$/kWh', green[1]),
+        ('Preço Demanda', 'R$', green[2]),
+    ]
+
+    blue = [formatValue(value) for value in expenses['blue']]
+    tables['blueTax'] = [
+        ('Demanda Ponta', 'R$/kWh', blue[0]),
+        ('Demanda Fora Ponta', 'R$/kWh', blue[1]),
+        ('Energia Ponta', 'R$/kWh', blue[2]),
+        ('Energia Fora Ponta', 'R$/kWh', blue[3]),
+    ]
+
+    # Assim como na janela de Custos, uma tarifa com campos vazios não tem resultados.
+    tables['greenResult'] = []
+    if None not in expenses['aliquotas'] and None not in expenses['green']:
+        result = calculations.getGreenTariff(parametros, expenses['aliquotas'], expenses['green'])
+        tables['greenResult'] = [
+            ('Custo de Energia Elétrica na Ponta', '(R$/mês)', f"{result['CEEP']:.2f}"),
+            ('Custo de Energia Elétrica Fora da Ponta', '(R$/mês)', f"{result['CEEFP']:.2f}"),
+            ('Custo da Demanda', '(R$/mês)', f"{result['CD']:.2f}"),
+            ('Custo Total de Energia Elétrica', '(R$/mês)', f"{result['CTEE']:.2f}"),
+            ('Custo Médio da Energia Elétrica', '(R$/mês)', f"{result['CMEE']:.2f}"),
+            ('Custo Médio por m³ de Água Bombeado', '(R$/m³)', f"{result['CMMB']:.2f}")
+        ]
+
+    tables['blueResult'] = []
+    if None not in expenses['aliquotas'] and None not in expenses['blue']:
+        result = calculations.getBlueTariff(parametros, expenses['aliquotas'], expenses['blue'])
+        tables['blueResult'] = [
+            ('Custo de Energia Elétrica na Ponta', '(R$/mês)', f"{result['CEEP']:.2f}"),
+            ('Custo de Energia Elétrica Fora da Ponta', '(R$/mês)', f"{result['CEEFP']:.2f}"),
+            ('Custo da Demanda na Ponta', '(R$/mês)', f"{result['CDP']:.2f}"),
+            ('Custo da Demanda Fora da Ponta', '(R$/mês)', f"{result['CDFP']:.2f}"),
+            ('Custo Total de Energia Elétrica', '(R$/mês)', f"{result['CTEE']:.2f}"),
+            ('Custo Médio da Energia Elétrica', '(R$/kWh)', f"{result['CMEE']:.2f}"),
+            ('Custo Médio por m³ de Água Bombeado', '(R$/m³)', f"{result['CMMB']:.2f}")
+        ]
+
+    tables['hydric1'] = getHydricFields(0, data['hydric'][0])
+    tables['hydric2'] = getHydricFields(1, data['hydric'][1])
+
+    return tables
+
+def buildReport(data, formato='png'):
+    ''' Constrói o relatório a partir do dicionário de `project.loadProject()`. Os gráficos são gerados em memória,
+    no `formato` de `renderFigures()`. Retorna o objeto FPDF. '''
+
+    checkProject(data)
+    images = renderFigures(data, formato)
+    tables = getReportTables(data)
+
+    headings = ['Parâmetro', 'Unidade', 'Valor']
+    pdf = PDF('L', 'mm', 'A3')
+
+    # Primeira página.
+    pdf.add_page()
+    pdf.image('assets/images/logo.png', 10, 10, 280)
+    pdf.image('assets/images/iph_logo.png', 300, 12, 60)
+    pdf.image('assets/images/lenhs_logo.png', 370, 9, 40)
+    pdf.image(images['water'], 30, 80, 350)
+
+    pdf.set_font("helvetica", "BI", 20)
+    pdf.cell(40, 100, "Relatório Geral")
+
+    # Segunda página
+    pdf.add_page()
+    pdf.set_left_margin(10)
+    pdf.set_font("Times", "", 14)
+    pdf.set_y(95)
+    pdf.colored_table(headings, tables['parameters'])
+
+    pdf.set_font("helvetica", "B", 32)
+    pdf.set_xy(10, 50)
+    pdf.cell(0, 0, "Parâmetros Operacionais")
+
+    pdf.image(images['operation'], 160, 20, 250)
+    pdf.image(images['pump'], 20, 180, 180)
+    pdf.image(images['system'], 220, 180, 180)
+
+    # Terceira página
+    pdf.add_page()
+    pdf.set_left_margin(10)
+    pdf.set_font("helvetica", "B", 32)
+    pdf.cell(10, 10, "Consumo Energético e")
+    pdf.cell(0, 40, "Indicadores Hidroenergéticos")
+    pdf.set_y(60)
+
+    pdf.set_font("Times", "", 16)
+    pdf.colored_table(headings, tables['energy'], (90, 40, 50))
+    pdf.set_xy(10, 100)
+
+    pdf.set_font("helvetica", "B", 32)
+    pdf.cell(10, 100, "Impostos")
+    pdf.set_y(180)
+    pdf.set_font("Times", "", 16)
+    pdf.colored_table(['Imposto', 'Unidade', 'Valor'], tables['taxes'], (90, 40, 50))
+
+    pdf.set_font("helvetica", "B", 26)
+    pdf.set_xy(200, 20)
+    pdf.cell(0, 0, "Custos de Operação e Indicadores Financeiros")
+
+    # Tarifa Verde
+    pdf.set_y(60)
+    pdf.set_left_margin(200)
+    pdf.set_font("helvetica", "BI", 20)
+    pdf.cell(10, 10, "Tarifa Verde")
+
+    pdf.set_font("Times", "", 12)
+    pdf.set_y(80)
+    pdf.colored_table(headings, tables['greenTax'], (40, 20, 25), (164, 237, 176))
+    pdf.set_left_margin(295)
+    pdf.set_y(80)
+    pdf.colored_table(headings, tables['greenResult'], (75, 20, 20), (164, 237, 176))
+
+    # Tarifa Azul
+    pdf.set_y(180)
+    pdf.set_left_margin(200)
+    pdf.set_font("helvetica", "BI", 20)
+    pdf.cell(10, 10, "Tarifa Azul")
+
+    pdf.set_font("Times", "", 12)
+    pdf.set_y(200)
+    pdf.colored_table(headings, tables['blueTax'], (40, 20, 25), (90, 142, 219))
+    pdf.set_left_margin(295)
+    pdf.set_y(200)
+    pdf.colored_table(headings, tables['blueResult'], (75, 20, 20), (90, 142, 219))
+
+    # Quarta página
+    pdf.add_page()
+    pdf.set_left_margin(15)
+    pdf.set_font("helvetica", "B", 32)
+    pdf.cell(400, 10, "Balanço Hídrico de Reservatório", align='C')
+
+    pdf.set_x(25)
+    pdf.set_font("helvetica", "BI", 20)
+    pdf.cell(25, 65, "Opção 1 - Dados de Volume do Reservatório")
+    pdf.set_y(70)
+    pdf.set_font("Times", "", 16)
+    pdf.colored_table(headings, tables['hydric1'], (90, 40, 50))
+
+    if data['hydric'][0]:
+        pdf.image(images['opt0'], 7, 140, 185)
+
+    # "Opção 2 - Dados de Níveis do Reservatório"
+    pdf.set_font("helvetica", "BI", 20)
+    pdf.set_left_margin(225)
+    pdf.set_xy(330, 30)
+    pdf.cell(50, 25, "Opção 2 - Dados de Nível do Reservatório", align='R')
+    pdf.set_y(70)
+    pdf.set_font("Times", "", 16)
+    pdf.colored_table(headings, tables['hydric2'], (90, 40, 50))
+
+    if data['hydric'][1]:
+        pdf.image(images['opt1'], 215, 140, 185)
+
+    return pdf
+
+def exportReport(projectPath, pdfPath, formato='png'):
+    ''' Gera o relatório do arquivo .lenhs em `projectPath` e o salva em `pdfPath`.
+    Nada além do próprio .pdf é escrito em disco, então várias chamadas podem rodar ao mesmo tempo. '''
+
+    data = project.loadProject(projectPath)
+    pdf = buildReport(data, formato)
+    pdf.output(pdfPath)
+
+    return pdfPath
+
+def exportJob(job):
+    ''' Executa um item do lote. Retorna a tupla (projectPath, pdfPath, erro); erro é '' em caso de sucesso. '''
+
+    projectPath, pdfPath, formato = job
+
+    try:
+        exportReport(projectPath, pdfPath, formato)
+    except Exception as e:
+        return (projectPath, pdfPath, f'{type(e).__name__}: {e}')
+
+    return (projectPath, pdfPath, '')
+
+def exportReports(paths, output, workers=None, progress=None, formato='png'):
+    ''' Gera, em paralelo, um relatório .pdf em `output` para cada arquivo .lenhs de `paths`, com os gráficos em `formato`.
+    `progress(feitos, total, projectPath, erro)` é chamada a cada relatório concluído.
+    Retorna a tupla (resultados, relatoriosPorMinuto), com os resultados na ordem de `paths`. '''
+
+    os.makedirs(output, exist_ok=True)
+    jobs = []
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        jobs.append((path, os.path.join(output, f'{name}.pdf'), formato))
+
+    start = time.perf_counter()
+    results = {}
+
+    # 'spawn' evita herdar o estado do wx e do matplotlib do processo principal.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initWorker) as executor:
+        futures = [executor.submit(exportJob, job) for job in jobs]
+
+        for future in as_completed(futures):
+            projectPath, pdfPath, erro = future.result()
+            results[projectPath] = (projectPath, pdfPath, erro)
+
+            if progress:
+                progress(len(results), len(jobs), projectPath, erro)
+
+    elapsed = time.perf_counter() - start
+    rate = len(jobs) / elapsed * 60 if elapsed > 0 else 0
+
+    return ([results[job[0]] for job in jobs], rate)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.report', description='Gera os relatórios .pdf de arquivos .lenhs sem interface gráfica.')
+    parser.add_argument('pasta', help='pasta com os arquivos .lenhs')
+    parser.add_argument('-o', '--saida', help='pasta onde os relatórios serão salvos (padrão: a própria pasta)')
+    parser.add_argument('-j', '--processos', type=int, help='quantidade de processos (padrão: número de CPUs)')
+    parser.add_argument('-f', '--formato', choices=FORMATOS, default='png', help='formato dos gráficos no relatório (padrão: png)')
+    args = parser.parse_args(argv)
+
+    def progress(done, total, path, erro):
+        status = f'erro: {erro}' if erro else 'ok'
+        print(f'[{done}/{total}] {os.path.basename(path)}: {status}')
+
+    files = batch.getProjectFiles(args.pasta)
+    results, rate = exportReports(files, args.saida or args.pasta, args.processos, progress, args.formato)
+    errors = sum(1 for result in results if result[2])
+
+    print(f'{len(results)} relatórios gerados ({rate:.1f} relatórios/min), {errors} com erro.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""
+reservoir.py
+Motor de simulação do Balanço Hídrico de Reservatório. Trabalha apenas com arrays do numpy, sem depender do wx.
+"""
+
+import math
+import numpy as np
+import app.water_series as water_series
+
+MINUTOS_DIA = 1440
+
+# Data usada como origem do eixo do tempo quando a demanda vem da curva de 24 valores.
+# É a mesma data que datetime.strptime("1 00:00", '%d %H:%M') retornava no cálculo antigo.
+ORIGEM_CURVA = np.datetime64('1900-01-01T00:00', 'm')
+
+# Diferença máxima aceita entre `simulate()` e `simulateEvents()`, relativa ao volume máximo.
+TOLERANCIA_VOLUME = 1e-6
+
+def getCurveDemand(curva, diasSim):
+    ''' Recebe a curva de demanda com 24 valores (m³/h) e retorna um array com a demanda de cada minuto
+    (m³/min) para `diasSim` dias. '''
+
+    porMinuto = np.repeat(np.asarray(curva, dtype=np.float64) / 60, 60)
+    return np.tile(porMinuto, diasSim)
+
+def getCurveTimes(length):
+    ''' Retorna o array de tempo (datetime64 em minutos) para uma simulação feita a partir da curva de demanda. '''
+
+    return ORIGEM_CURVA + np.arange(length, dtype=np.int64).astype('timedelta64[m]')
+
+def getDayOrder(days, diasSim):
+    ''' Retorna os índices dos dias usados em uma simulação de `diasSim` dias, repetindo os `days` dias disponíveis. '''
+
+    return np.arange(diasSim, dtype=np.int64) % days
+
+def getWaterDataDemand(agua, diasSim):
+    ''' Recebe os dados de consumo de água (WaterSeries ou a lista de dias de `dp.getTableReadyData()`)
+    e retorna uma tupla (demanda, tempo). `demanda` contém o consumo de cada minuto e `tempo` o horário correspondente
+    (datetime64 em minutos). Se `diasSim` for maior que a quantidade de dias, os dados são repetidos e o tempo continua
+    a partir do último dia. '''
+
+    serie = water_series.asWaterSeries(agua)
+    days = serie.getDaysCount()
+
+    # Cada medição vale para o intervalo até a próxima: a demanda por minuto é a medição dividida pelo intervalo.
+    intervalos = np.repeat(serie.getIntervals(), serie.getDailyCounts())
+    perfis = np.repeat(serie.valores.astype(np.float64) / intervalos, intervalos).reshape(days, MINUTOS_DIA)
+    demanda = perfis[getDayOrder(days, diasSim)].ravel()
+
+    inicios = serie.getDayStarts()
+    extras = np.arange(1, max(0, diasSim - days) + 1, dtype=np.int64) * MINUTOS_DIA
+    inicios = np.concatenate((inicios, inicios[-1] + extras.astype('timedelta64[m]')))[:diasSim]
+    tempo = (inicios[:, None] + np.arange(MINUTOS_DIA, dtype=np.int64).astype('timedelta64[m]')).ravel()
+
+    return (demanda, tempo)
+
+def simulate(demanda, volInicial, volMaximo, volMinimo, vazoesSum):
+    ''' Simula, minuto a minuto, a evolução do volume do reservatório e o funcionamento das bombas.
+
+    Parâmetros
+    ----------
+    `demanda` : array com o consumo de cada minuto (m³/min).
+    `volInicial`, `volMaximo`, `volMinimo` : volumes em m³.
+    `vazoesSum` : soma das vazões das bombas (m³/s).
+
+    Retorna uma tupla (volume, liga, minutosVazio): `volume` é um array float64, `liga` um array int8 com 1 quando as bombas
+    estão ligadas e `minutosVazio` a quantidade de minutos em que o reservatório não atendeu a demanda.
+
+    A bomba liga quando o volume, descontada a demanda do minuto, fica abaixo de `volMinimo` e desliga quando passa de `volMaximo`.
+    Em vez de percorrer cada minuto, o estado da bomba é mantido constante e o trecho até o próximo chaveamento
+    é calculado de uma vez com somas acumuladas. O volume nunca fica negativo. '''
+
+    demanda = np.ascontiguousarray(demanda, dtype=np.float64)
+    n = len(demanda)
+
+    volume = np.empty(n, dtype=np.float64)
+    liga = np.zeros(n, dtype=np.int8)
+    qBomba = vazoesSum * 60 # m³/min
+
+    minutosVazio = 0
+    estado = 0
+    anterior = float(volInicial)
+    janela = MINUTOS_DIA
+    i = 0
+
+    while i < n:
+        fim = min(n, i + janela)
+        d = demanda[i:fim]
+        q = qBomba if estado else 0.0
+
+        # Trajetória supondo que a bomba fique no estado atual por toda a janela.
+        # O corte em zero, v[k] = max(0, v[k - 1] + q - d[k]), tem solução fechada pela recursão de Lindley.
+        soma = anterior + np.cumsum(q - d)
+        traj = soma - np.minimum(np.minimum.accumulate(soma), 0)
+
+        vAnterior = np.empty(len(d))
+        vAnterior[0] = anterior
+        vAnterior[1:] = traj[:-1]
+        livre = vAnterior - d   # Volume descontada a demanda, antes da contribuição da bomba.
+
+        if estado:
+            troca = livre > volMaximo
+        else:
+            troca = livre < volMinimo
+
+        if troca.any():
+            k = int(troca.argmax())
+        else:
+            k = len(d)
+
+        volume[i : i + k] = traj[:k]
+        liga[i : i + k] = estado
+        minutosVazio += int(np.count_nonzero(livre[:k] + q < 0))
+
+        if k == len(d):
+            anterior = traj[-1]
+            janela = min(janela * 2, 1 << 20)
+            i = fim
+            continue
+
+        # Minuto do chaveamento.
+        estado = 1 - estado
+        valor = livre[k] + (qBomba if estado else 0.0)
+        if valor < 0:
+            valor = 0.0
+            minutosVazio += 1
+
+        volume[i + k] = valor
+        liga[i + k] = estado
+        anterior = valor
+
+        # Janelas menores quando a bomba chaveia com frequência.
+        janela = max(2 * (k + 1), 16)
+        i += k + 1
+
+    return (volume, liga, minutosVazio)
+
+def getCurveBlocks(curva, diasSim):
+    ''' Retorna a curva de demanda como blocos de demanda constante, no formato (demanda, duracao).
+    `demanda` contém o consumo por minuto (m³/min) de cada bloco e `duracao` a quantidade de minutos de cada bloco. '''
+
+    demanda = np.tile(np.asarray(curva, dtype=np.float64) / 60, diasSim)
+    duracao = np.full(len(demanda), 60, dtype=np.int64)
+
+    return (demanda, duracao)
+
+def getWaterDataBlocks(agua, diasSim):
+    ''' Mesmo que `getCurveBlocks()`, mas para os dados de consumo de água (WaterSeries ou a lista de dias de
+    `dp.getTableReadyData()`). Cada amostra dos dados de consumo vira um bloco com a duração do intervalo de amostragem. '''
+
+    serie = water_series.asWaterSeries(agua)
+    days = serie.getDaysCount()
+    duracoes = np.repeat(serie.getIntervals(), serie.getDailyCounts())
+    demandas = serie.valores.astype(np.float64) / duracoes
+
+    # Posições das medições de cada dia da simulação, na ordem em que os dias se repetem.
+    ordem = getDayOrder(days, diasSim)
+    counts = serie.getDailyCounts()[ordem]
+    posicoes = np.repeat(serie.inicios[ordem] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    return (demandas[posicoes], duracoes[posicoes])
+
+def simulateEvents(demanda, duracao, volInicial, volMaximo, volMinimo, vazoesSum):
+    ''' Alternativa a `simulate()` orientada a eventos. Recebe a demanda em blocos de demanda constante
+    (ver `getCurveBlocks()` e `getWaterDataBlocks()`) e, dentro de cada bloco, calcula diretamente o minuto
+    do próximo chaveamento da bomba ou do esvaziamento do reservatório, sem percorrer os minutos intermediários.
+    O custo é proporcional a quantidade de blocos mais a quantidade de chaveamentos.
+
+    Retorna uma tupla (pontos, trocas, minutosVazio):
+    `pontos` é um array (m, 2) com [minuto, volume]. Entre dois pontos o volume varia linearmente.
+    `trocas` é um array (s, 2) com [minuto, estado], onde `estado` é 1 quando as bombas passam a estar ligadas.
+    `minutosVazio` é o mesmo valor retornado por `simulate()`.
+
+    As regras de chaveamento são as mesmas de `simulate()`, portanto `expandEvents()` reproduz o resultado minuto a minuto
+    com diferença máxima de `TOLERANCIA_VOLUME` (relativa ao volume máximo), causada apenas por arredondamento. '''
+
+    pontos, trocas, minutosVazio = _simulateBlocks(np.asarray(demanda, dtype=np.float64).tolist(),
+        np.asarray(duracao, dtype=np.int64).tolist(), float(volInicial), float(volMaximo), float(volMinimo), vazoesSum * 60)
+
+    return (np.array(pontos, dtype=np.float64), np.array(trocas, dtype=np.int64), minutosVazio)
+
+def expandEvents(pontos, trocas, n):
+    ''' Converte o resultado de `simulateEvents()` para os arrays minuto a minuto (volume, liga) de `simulate()`. '''
+
+    volume = np.interp(np.arange(n, dtype=np.float64), pontos[:, 0], pontos[:, 1])
+
+    inicios = trocas[:, 0]
+    tamanhos = np.diff(np.append(inicios, n))
+    liga = np.repeat(trocas[:, 1].astype(np.int8), tamanhos)
+
+    return (volume, liga)
+
+def getTransitions(liga):
+    ''' Converte o array `liga` de `simulate()`, com um estado por minuto, para as trocas de estado no formato de
+    `simulateEvents()`: um array (s, 2) com [minuto, estado], começando no minuto 0. '''
+
+    liga = np.asarray(liga)
+    if not len(liga):
+        return np.empty((0, 2), dtype=np.int64)
+
+    inicios = np.concatenate(([0], np.flatnonzero(np.diff(liga)) + 1))
+    return np.column_stack((inicios, liga[inicios])).astype(np.int64)
+
+def _simulateBlocks(demanda, duracao, volInicial, volMaximo, volMinimo, qBomba):
+    ''' Laço de `simulateEvents()`. Trabalha só com listas e floats do Python, pois percorre poucos elementos.
+
+    Em um trecho com estado e demanda `d` constantes, o volume no fim do minuto j é v0 + j * r, com r = q - d.
+    A bomba chaveia no primeiro j em que v0 + (j - 1) * r - d passa do limite e o reservatório esvazia no primeiro j
+    em que v0 + j * r < 0. As duas condições são lineares em j e são resolvidas diretamente. '''
+
+    pontos = [[-1, volInicial]]
+    trocas = [[0, 0]]
+    minutosVazio = 0
+    estado = 0
+    v0 = volInicial
+    g0 = 0  # Índice global do primeiro minuto do trecho.
+
+    for d, duracaoBloco in zip(demanda, duracao):
+        resto = duracaoBloco
+        while resto > 0:
+            q = qBomba if estado else 0.0
+            r = q - d
+
+            jVazio = _firstEmptyMinute(v0, r, resto)
+            jTroca = _firstSwitchMinute(v0, r, d, estado, volMaximo, volMinimo, min(jVazio, resto))
+
+            if jTroca:
+                # Trecho linear até o minuto anterior ao chaveamento.
+                if jTroca > 1:
+                    pontos.append([g0 + jTroca - 2, v0 + (jTroca - 1) * r])
+
+                estado = 1 - estado
+                valor = v0 + (jTroca - 1) * r - d + (qBomba if estado else 0.0)
+                if valor < 0:
+                    valor = 0.0
+                    minutosVazio += 1
+
+                pontos.append([g0 + jTroca - 1, valor])
+                trocas.append([g0 + jTroca - 1, estado])
+                v0 = valor
+                g0 += jTroca
+                resto -= jTroca
+
+            elif jVazio <= resto:
+                if v0 == 0:
+                    # Reservatório vazio e sem chaveamento: fica vazio até o fim do bloco.
+                    minutosVazio += resto
+                    pontos.append([g0 + resto - 1, 0.0])
+                    g0 += resto
+                    resto = 0
+                else:
+                    if jVazio > 1:
+                        pontos.append([g0 + jVazio - 2, v0 + (jVazio - 1) * r])
+                    pontos.append([g0 + jVazio - 1, 0.0])
+                    minutosVazio += 1
+                    v0 = 0.0
+                    g0 += jVazio
+                    resto -= jVazio
+
+            else:
+                v0 = v0 + resto * r
+                pontos.append([g0 + resto - 1, v0])
+                g0 += resto
+                resto = 0
+
+    return (pontos, trocas, minutosVazio)
+
+def _firstEmptyMinute(v0, r, n):
+    ''' Retorna o primeiro minuto j (1 a n) em que v0 + j * r < 0 ou n + 1 se isso não acontecer. '''
+
+    if v0 + r < 0:
+        return 1
+    if r >= 0:
+        return n + 1
+
+    j = max(1, int(math.floor(v0 / -r)) + 1)
+    # Corrige possíveis erros de arredondamento do floor.
+    while j > 1 and v0 + (j - 1) * r < 0:
+        j -= 1
+    while j <= n and not (v0 + j * r < 0):
+        j += 1
+
+    return min(j, n + 1)
+
+def _firstSwitchMinute(v0, r, d, estado, volMaximo, volMinimo, n):
+    ''' Retorna o primeiro minuto j (1 a n) em que a bomba chaveia ou 0 se isso não acontecer.
+    Com a bomba ligada, chaveia quando v0 + (j - 1) * r - d > volMaximo. Com ela desligada, quando fica < volMinimo. '''
+
+    if n < 1:
+        return 0
+
+    if estado:
+        troca = lambda j: v0 + (j - 1) * r - d > volMaximo
+        inclinacao = r
+        distancia = volMaximo - (v0 - d)
+    else:
+        troca = lambda j: v0 + (j - 1) * r - d < volMinimo
+        inclinacao = -r
+        distancia = (v0 - d) - volMinimo
+
+    if troca(1):
+        return 1
+    if inclinacao <= 0:
+        return 0
+
+    # Menor j com (j - 1) * inclinacao > distancia.
+    j = max(1, int(math.floor(distancia / inclinacao)) + 2)
+    while j > 1 and troca(j - 1):
+        j -= 1
+    while j <= n and not troca(j):
+        j += 1
+
+    return j if j <= n else 0
@@ -0,0 +1,149 @@
+"""
+startup.py
+Importação adiada dos módulos pesados e medição da inicialização do programa.
+`lazyImport()` devolve um módulo cujo código só é executado no primeiro acesso a um atributo. Assim, as janelas podem
+declarar os módulos de cálculo, gráficos e relatório no topo do arquivo sem carregá-los antes da tela de boas vindas aparecer.
+
+Uso: python -m app.startup [--limite-importacao SEGUNDOS] [--limite-janela SEGUNDOS] [-n MÓDULOS]
+Mede, em processos novos, o tempo de importação de cada módulo da tela de boas vindas e o tempo até a primeira janela.
+Termina com código 1 se algum limite for ultrapassado ou se algum módulo de `PESADOS` for carregado na inicialização.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import importlib.util
+
+# Limites de tempo (s) da inicialização. Acima deles, a medição é considerada uma regressão.
+LIMITE_IMPORTACAO = 1.0
+LIMITE_JANELA = 2.5
+
+# Pacotes que não devem ser carregados antes da primeira janela.
+PESADOS = ('matplotlib', 'scipy', 'openpyxl', 'fpdf')
+
+# Módulo importado pelo ponto de entrada, `app.main()`.
+MODULO_INICIAL = 'app.windows.welcome_screen'
+
+# Os mesmos passos de `app.main()`. A janela é destruída assim que o wx processa os eventos pendentes da primeira exibição.
+CODIGO_JANELA = '''
+import time
+inicio = time.perf_counter()
+import wx
+from app.windows import welcome_screen
+import app.global_variables as gv
+
+app = wx.App()
+gv.welcome_screen = welcome_screen.WelcomeWindow(None, 'LOH / LENHS')
+gv.welcome_screen.CenterOnScreen()
+gv.welcome_screen.Show()
+
+def fim():
+    print(time.perf_counter() - inicio)
+    gv.welcome_screen.Destroy()
+
+wx.CallAfter(fim)
+app.MainLoop()
+'''
+
+def lazyImport(name):
+    ''' Retorna o módulo `name` sem executá-lo. O código do módulo é executado no primeiro acesso a um atributo.
+    Se o módulo já tiver sido importado, retorna o próprio módulo. O pacote pai é importado na hora, então submódulos de
+    pacotes pesados, como `scipy.optimize`, devem ser importados dentro da função que os usa. '''
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+
+    # Como faz o `import`, o módulo também fica acessível pelo pacote pai.
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, module)
+
+    return module
+
+def runPython(args, code):
+    ''' Executa o Python em um processo novo, na raiz do projeto, e retorna uma tupla (stdout, stderr, segundos). '''
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    inicio = time.perf_counter()
+    result = subprocess.run([sys.executable, *args, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+
+    return (result.stdout, result.stderr, time.perf_counter() - inicio)
+
+def getImportTimes(module=MODULO_INICIAL):
+    ''' Importa `module` em um processo novo com `-X importtime`. Retorna uma tupla (tempos, carregados): `tempos` é uma
+    lista de (módulo, próprio, acumulado), em segundos e na ordem de importação, e `carregados` são os pacotes de
+    `PESADOS` que ficaram em `sys.modules`. '''
+
+    code = f'import sys, json, {module}\nprint(json.dumps(sorted(set(m.split(".")[0] for m in sys.modules) & set({PESADOS!r}))))'
+    stdout, stderr, _ = runPython(['-X', 'importtime'], code)
+
+    tempos = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        proprio, acumulado, nome = line[len('import time:'):].split('|')
+        tempos.append((nome.strip(), int(proprio) / 1e6, int(acumulado) / 1e6))
+
+    return (tempos, json.loads(stdout))
+
+def getFirstFrameTime():
+    ''' Retorna uma tupla (janela, processo) em segundos: o tempo entre o início do script e a primeira exibição da
+    tela de boas vindas, e o tempo total do processo, incluindo a inicialização do interpretador. '''
+
+    stdout, _, processo = runPython([], CODIGO_JANELA)
+    return (float(stdout.split()[-1]), processo)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.startup', description='Mede a inicialização do programa.')
+    parser.add_argument('--limite-importacao', dest='limiteImportacao', type=float, default=LIMITE_IMPORTACAO,
+        help=f'tempo máximo (s) de importação da tela de boas vindas (padrão: {LIMITE_IMPORTACAO})')
+    parser.add_argument('--limite-janela', dest='limiteJanela', type=float, default=LIMITE_JANELA,
+        help=f'tempo máximo (s) até a primeira janela (padrão: {LIMITE_JANELA})')
+    parser.add_argument('-n', dest='modulos', type=int, default=15, help='quantidade de módulos listados (padrão: 15)')
+    args = parser.parse_args(argv)
+
+    tempos, carregados = getImportTimes()
+
+    # Apenas os módulos de primeiro nível de cada importação, ordenados pelo tempo acumulado.
+    topo = sorted((t for t in tempos if '.' not in t[0] or t[0].startswith('app.')), key=lambda t: t[2], reverse=True)
+    importacao = next((t[2] for t in tempos if t[0] == MODULO_INICIAL), 0)
+
+    print(f'Importação de {MODULO_INICIAL}: {importacao:.3f} s (limite: {args.limiteImportacao} s)')
+    print(f'{"módulo":<40} {"próprio (ms)":>13} {"acumulado (ms)":>15}')
+    for nome, proprio, acumulado in topo[:args.modulos]:
+        print(f'{nome:<40} {proprio * 1000:>13.1f} {acumulado * 1000:>15.1f}')
+
+    erros = []
+    if importacao > args.limiteImportacao:
+        erros.append(f'importação acima do limite ({importacao:.3f} s)')
+    if carregados:
+        erros.append(f'módulos pesados carregados na inicialização: {", ".join(carregados)}')
+
+    try:
+        janela, processo = getFirstFrameTime()
+        print(f'Primeira janela: {janela:.3f} s ({processo:.3f} s com o interpretador, limite: {args.limiteJanela} s)')
+
+        if janela > args.limiteJanela:
+            erros.append(f'primeira janela acima do limite ({janela:.3f} s)')
+
+    except subprocess.CalledProcessError as e:
+        print(f'Primeira janela: não medida, o wx não abriu a janela.\n{e.stderr.strip()}')
+
+    for erro in erros:
+        print(f'REGRESSÃO: {erro}')
+
+    return 1 if erros else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
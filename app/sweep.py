@@ -0,0 +1,183 @@
+"""
+sweep.py
+Varredura de parâmetros para dimensionamento: calcula ponto de operação, consumo mensal, consumo específico normalizado
+e custo da energia para todas as combinações de diâmetro, comprimento, rugosidade, singularidades, bombas em paralelo e
+horas de operação. Os cenários são calculados juntos, sobre arrays, e podem ser divididos entre processos.
+Uso: python -m app.sweep PROJETO [--diametro MM ...] [--bombas N ...] [-o SAIDA] [-j PROCESSOS]
+"""
+
+import os
+import csv
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import app.project as project
+import app.calculations as calculations
+
+# Parâmetros variados na grade, na ordem das colunas do resultado.
+PARAMETROS = ('diametro', 'comprimento', 'rugosidade', 'singularidades', 'bombas', 'horasPonta', 'horasForaPonta')
+
+# Cenários por bloco ao dividir a varredura entre processos.
+TAMANHO_BLOCO = 20000
+
+def getGrid(valores):
+    ''' Recebe um dicionário {parâmetro: lista de valores}, com todos os nomes de `PARAMETROS`, e retorna o produto
+    cartesiano como um dicionário {parâmetro: array}, com um elemento por cenário. '''
+
+    arrays = np.meshgrid(*(np.asarray(valores[name], dtype=np.float64) for name in PARAMETROS), indexing='ij')
+    return {name: array.ravel() for name, array in zip(PARAMETROS, arrays)}
+
+def getBase(data):
+    ''' Retorna os dados fixos da varredura a partir do dicionário de `project.loadProject()`: a Curva da Bomba ajustada,
+    o desnível, os rendimentos e os Custos de Operação. Levanta ValueError se faltar alguma seção necessária. '''
+
+    faltando = [name for name, key in (('Curva da Bomba', 'pump'), ('Curva do Sistema', 'system'), ('Parâmetros do Sistema', 'parameters')) if not data[key]]
+    if faltando:
+        raise ValueError(f'Seções obrigatórias para a varredura não preenchidas: {", ".join(faltando)}.')
+
+    q, h = data['pump']
+    P2, R2 = calculations.getPumpCurve(q, h)
+
+    return {
+        'P2': P2,
+        'qMax': float(max(q)),
+        'desnivel': data['system']['desnivel'],
+        'rendimentoMotor': data['parameters']['rendimentoMotor'],
+        'rendimentoBomba': data['parameters']['rendimentoBomba'],
+        'expenses': data['expenses']
+    }
+
+def getProjectValues(data):
+    ''' Retorna {parâmetro: [valor]} com os valores atuais do projeto, usados para os parâmetros que não forem variados. '''
+
+    sistema = data['system']
+    parametros = data['parameters']
+
+    return {
+        'diametro': [sistema['diametro']],
+        'comprimento': [sistema['comprimento']],
+        'rugosidade': [sistema['rugosidade']],
+        'singularidades': [sistema['singularidades']],
+        'bombas': [parametros['bombasParalelo']],
+        'horasPonta': [parametros['operacaoHorarioPonta']],
+        'horasForaPonta': [parametros['operacaoHorarioForaPonta']]
+    }
+
+def evaluate(cenarios, base):
+    ''' Calcula todos os cenários de uma vez. `cenarios` é o dicionário de `getGrid()` (ou uma fatia dele) e `base` o de
+    `getBase()`. Retorna um dicionário de arrays com os parâmetros do cenário e os resultados: vazao (m³/s), altura (m),
+    potencia (kW), consumoMensal (kWh), CEN e, se houver Custos de Operação, custoVerde e custoAzul (CTEE).
+    Cenários sem ponto de operação ficam com NaN. '''
+
+    sistema = {
+        'desnivel': base['desnivel'],
+        'comprimento': cenarios['comprimento'],
+        'diametro': cenarios['diametro'],
+        'rugosidade': cenarios['rugosidade'],
+        'singularidades': cenarios['singularidades']
+    }
+
+    vazao, altura = calculations.solveOperationPoints(base['P2'], sistema, base['qMax'], cenarios['bombas'])
+
+    # As fórmulas de calculations.py só usam operações aritméticas, então funcionam direto com os arrays.
+    parametros = {
+        'vazaoBombeada': vazao,
+        'alturaNanometrica': altura,
+        'rendimentoMotor': base['rendimentoMotor'],
+        'rendimentoBomba': base['rendimentoBomba'],
+        'bombasParalelo': cenarios['bombas'],
+        'operacaoHorarioPonta': cenarios['horasPonta'],
+        'operacaoHorarioForaPonta': cenarios['horasForaPonta']
+    }
+
+    result = dict(cenarios)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        indicadores = calculations.getEnergyIndicators(parametros)
+        result.update({
+            'vazao': vazao,
+            'altura': altura,
+            'potencia': calculations.potencia(parametros),
+            'consumoMensal': indicadores['consumoTotal'],
+            'CEN': indicadores['consumoEspecificoNormalizado']
+        })
+
+        expenses = base['expenses']
+        if expenses and None not in expenses['aliquotas']:
+            if None not in expenses['green']:
+                result['custoVerde'] = calculations.getGreenTariff(parametros, expenses['aliquotas'], expenses['green'])['CTEE']
+            if None not in expenses['blue']:
+                result['custoAzul'] = calculations.getBlueTariff(parametros, expenses['aliquotas'], expenses['blue'])['CTEE']
+
+    return result
+
+def evaluateJob(job):
+    ''' Função executada em cada processo. Recebe a tupla (cenarios, base) e retorna o resultado de `evaluate()`. '''
+
+    cenarios, base = job
+    return evaluate(cenarios, base)
+
+def runSweep(cenarios, base, workers=None, tamanhoBloco=TAMANHO_BLOCO):
+    ''' Calcula os cenários de `getGrid()`. Com mais de um bloco de `tamanhoBloco` cenários e `workers` diferente de 1,
+    os blocos são divididos entre processos. Retorna o mesmo dicionário de `evaluate()`, na ordem dos cenários. '''
+
+    n = len(cenarios['diametro'])
+    if workers == 1 or n <= tamanhoBloco:
+        return evaluate(cenarios, base)
+
+    jobs = [({name: array[i:i + tamanhoBloco] for name, array in cenarios.items()}, base) for i in range(0, n, tamanhoBloco)]
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        partes = list(executor.map(evaluateJob, jobs))
+
+    return {name: np.concatenate([parte[name] for parte in partes]) for name in partes[0].keys()}
+
+def writeCSV(result, path):
+    ''' Salva o resultado de `runSweep()` em um CSV, com uma linha por cenário. '''
+
+    columns = list(result.keys())
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*(result[name].tolist() for name in columns)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.sweep', description='Varredura de parâmetros de um arquivo .lenhs.')
+    parser.add_argument('projeto', help='arquivo .lenhs com a Curva da Bomba, a Curva do Sistema e os Parâmetros do Sistema')
+    parser.add_argument('--diametro', type=float, nargs='+', help='diâmetros internos da tubulação (mm)')
+    parser.add_argument('--comprimento', type=float, nargs='+', help='comprimentos da tubulação (m)')
+    parser.add_argument('--rugosidade', type=float, nargs='+', help='rugosidades do material')
+    parser.add_argument('--singularidades', type=float, nargs='+', help='somatórios dos coeficientes de singularidade')
+    parser.add_argument('--bombas', type=float, nargs='+', help='quantidades de bombas em paralelo')
+    parser.add_argument('--horas-ponta', dest='horasPonta', type=float, nargs='+', help='horas diárias de operação na ponta')
+    parser.add_argument('--horas-fora-ponta', dest='horasForaPonta', type=float, nargs='+', help='horas diárias de operação fora da ponta')
+    parser.add_argument('-o', '--saida', help='arquivo .csv de saída (padrão: varredura.csv ao lado do projeto)')
+    parser.add_argument('-j', '--processos', type=int, help='quantidade de processos (padrão: número de CPUs)')
+    args = parser.parse_args(argv)
+
+    data = project.loadProject(args.projeto)
+    base = getBase(data)
+
+    valores = getProjectValues(data)
+    for name in PARAMETROS:
+        if getattr(args, name):
+            valores[name] = getattr(args, name)
+    if args.diametro:
+        valores['diametro'] = [value / 1000 for value in args.diametro]
+
+    start = time.perf_counter()
+    cenarios = getGrid(valores)
+    result = runSweep(cenarios, base, args.processos)
+    t = time.perf_counter() - start
+
+    saida = args.saida or os.path.join(os.path.dirname(os.path.abspath(args.projeto)), 'varredura.csv')
+    writeCSV(result, saida)
+
+    semPonto = int(np.isnan(result['vazao']).sum())
+    print(f'{len(result["vazao"])} cenários calculados em {t:.2f} s, {semPonto} sem ponto de operação. Resultado em {saida}.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+water_cache.py
+Cache binário dos dados de consumo de água de um arquivo .lenhs, guardado em um arquivo .npz ao lado do projeto.
+O cache é gravado na primeira leitura dos dados e apagado (`removeCache()`) sempre que a janela de consumo grava a seção,
+inclusive com "Salvar como" sobre outro arquivo. Fechar o projeto não o apaga. Não depende do wx.
+"""
+
+import os
+import zipfile
+import hashlib
+import tempfile
+import numpy as np
+import app.water_series as water_series
+
+VERSAO = 1              # Muda quando o formato do cache muda. Caches de outra versão são ignorados.
+SUFIXO = '.agua.npz'
+
+def getCachePath(path):
+    ''' Retorna o caminho do cache do arquivo .lenhs em `path`. Ex: 'projeto.lenhs' -> 'projeto.lenhs.agua.npz'. '''
+
+    return f'{path}{SUFIXO}'
+
+def getFileKey(path):
+    ''' Retorna a tupla (mtime em ns, tamanho) do arquivo. Se ela não mudou, o arquivo não precisa ser lido. '''
+
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def getContentHash(data):
+    ''' Retorna o hash dos bytes da seção de consumo de água. Quebras de linha '\\r\\n' e '\\n' dão o mesmo hash. '''
+
+    return hashlib.blake2b(data.replace(b'\r\n', b'\n'), digest_size=16).hexdigest()
+
+def readCache(path):
+    ''' Lê o cache do arquivo .lenhs em `path`. Retorna o dicionário {'chave', 'hash', 'serie'},
+    ou None se o cache não existir, for de outra versão ou estiver corrompido. '''
+
+    try:
+        with np.load(getCachePath(path), allow_pickle=False) as npz:
+            versao, mtime, size = npz['chave'].tolist()
+            if versao != VERSAO:
+                return None
+
+            serie = water_series.WaterSeries.fromColumns(npz['datas'], npz['inicios'], npz['minutos'], npz['valores'])
+            return {'chave': (mtime, size), 'hash': str(npz['hash']), 'serie': serie}
+
+    except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+def writeCache(path, serie, chave, digest):
+    ''' Grava o cache da série `serie` do arquivo .lenhs em `path`. A gravação passa por um arquivo temporário,
+    então um cache pela metade nunca é lido. Erros de gravação (ex: pasta sem permissão) são ignorados. '''
+
+    cachePath = getCachePath(path)
+
+    try:
+        fd, tempPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cachePath)), suffix='.tmp')
+    except OSError:
+        return
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, chave=np.array([VERSAO, *chave], dtype=np.int64), hash=np.array(digest),
+                datas=serie.datas, inicios=serie.inicios, minutos=serie.minutos, valores=serie.valores)
+
+        os.replace(tempPath, cachePath)
+
+    except OSError:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+def loadWaterSeries(path, getSectionBytes, parse, useCache=True):
+    ''' Retorna a WaterSeries da seção de consumo de água do arquivo .lenhs em `path`.
+
+    `getSectionBytes()` retorna os bytes da seção e `parse(data)` converte esses bytes em WaterSeries (ou None).
+    Se o mtime e o tamanho do arquivo são os mesmos do cache, os arrays são lidos direto do cache, sem ler a seção.
+    Se mudaram, o hash da seção é comparado com o do cache: se a seção não mudou (ex: só outra seção foi salva), o cache
+    continua válido e só a chave é atualizada. Caso contrário, a seção é convertida e o cache é regravado.
+    Com `useCache=False`, a seção é sempre convertida e o cache não é lido nem gravado. '''
+
+    if not useCache:
+        return parse(getSectionBytes())
+
+    chave = getFileKey(path)
+    cache = readCache(path)
+
+    if cache and cache['chave'] == chave:
+        return cache['serie']
+
+    data = getSectionBytes()
+    digest = getContentHash(data)
+
+    if cache and cache['hash'] == digest:
+        serie = cache['serie']
+    else:
+        serie = parse(data)
+
+    if serie is not None:
+        writeCache(path, serie, chave, digest)
+
+    return serie
+
+def removeCache(path):
+    ''' Apaga o cache do arquivo .lenhs em `path`, se existir. '''
+
+    try:
+        os.remove(getCachePath(path))
+    except FileNotFoundError:
+        pass
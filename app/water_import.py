@@ -0,0 +1,324 @@
+"""
+water_import.py
+Importação em blocos de arquivos de consumo de água (.xlsx, .csv e .txt). Não depende do wx.
+Os dados são lidos linha a linha, convertidos em arrays (data ordinal, minuto do dia e vazão) a cada `TAMANHO_BLOCO`
+linhas e validados conforme chegam, sem montar a lista de dicionários com strings.
+"""
+
+import os
+import csv
+import datetime
+import numpy as np
+
+TAMANHO_BLOCO = 65536
+MINUTOS_DIA = 1440
+INTERVALOS = (60, 30, 15, 5, 1)   # Intervalos aceitos entre as medições, em minutos.
+HORARIOS = tuple(f'{minuto // 60:02d}:{minuto % 60:02d}' for minuto in range(0, MINUTOS_DIA))
+
+# Regras verificadas por `getWaterDataReport()` e a mensagem de cada uma.
+REGRAS = {
+    'formato': 'data ou horário em formato inválido.',
+    'data': 'a data precisa ser maior que a do dia anterior.',
+    'inicio': 'o primeiro horário do dia precisa ser 00:00.',
+    'intervalo': 'intervalo entre os horários não suportado (60, 30, 15, 5 ou 1 minutos).',
+    'uniforme': 'o intervalo entre os horários não é uniforme.',
+    'incompleto': 'o dia não está completo.'
+}
+
+def getDateOrdinal(value, cache):
+    ''' Converte a data `value` para o número ordinal do dia (`datetime.date.toordinal()`).
+    Aceita 'DD/MM/AAAA', 'AAAA-MM-DD...' (excel salvo como texto) e objetos date / datetime.
+    `cache` é um dicionário reaproveitado entre as chamadas, já que a mesma data se repete em todas as linhas do dia. '''
+
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+
+    ordinal = cache.get(value)
+    if ordinal is None:
+        text = value.strip()
+        if len(text) not in (10, 19):
+            raise ValueError(f'Data inválida: {value}')
+
+        if text[2:3] == '/':
+            date = datetime.date(int(text[6:10]), int(text[3:5]), int(text[0:2]))
+        else:
+            date = datetime.date(int(text[0:4]), int(text[5:7]), int(text[8:10]))
+
+        if date.year < 1901 or date.year > 2199:
+            raise ValueError(f'Data inválida: {value}')
+
+        ordinal = date.toordinal()
+        cache[value] = ordinal
+
+    return ordinal
+
+def getMinuteOfDay(value, cache):
+    ''' Converte o horário `value` ('HH:MM', 'HH:MM:SS' ou objetos time / datetime) para o minuto do dia. '''
+
+    if isinstance(value, (datetime.time, datetime.datetime)):
+        return value.hour * 60 + value.minute
+
+    minute = cache.get(value)
+    if minute is None:
+        text = value.strip()
+        hour = int(text[0:2])
+        minute = int(text[3:5])
+
+        if text[2:3] != ':' or len(text) not in (5, 8) or hour > 23 or minute > 59:
+            raise ValueError(f'Horário inválido: {value}')
+
+        minute += hour * 60
+        cache[value] = minute
+
+    return minute
+
+def getFloat(value):
+    ''' Converte o consumo para float. Aceita vírgula como separador decimal, comum em .csv separados por ';'. '''
+
+    if isinstance(value, str):
+        value = value.strip().replace(',', '.')
+
+    return float(value)
+
+def readXlsxRows(path):
+    ''' Percorre as três primeiras colunas da planilha ativa de um .xlsx, a partir da segunda linha, sem carregar o arquivo inteiro. '''
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        for row in sheet.iter_rows(min_row=2, max_col=3, values_only=True):
+            # Planilhas costumam ter linhas vazias no final.
+            if row[0] is None and row[1] is None and row[2] is None:
+                continue
+
+            yield row
+
+    finally:
+        workbook.close()
+
+def readCsvRows(path):
+    ''' Percorre as linhas de um .csv com cabeçalho. O delimitador (',', ';' ou tabulação) é detectado no início do arquivo. '''
+
+    with open(path, 'r', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+
+        reader = csv.reader(f, dialect)
+        next(reader, None)
+
+        for row in reader:
+            if row:
+                yield row
+
+def readTxtRows(path):
+    ''' Percorre as linhas de um .txt no formato 'DD/MM/AAAA HH:MM consumo'. Linhas vazias são ignoradas. '''
+
+    with open(path, 'r') as f:
+        for line in f:
+            words = line.split()
+            if words:
+                yield words
+
+def getRowReader(path):
+    ''' Retorna o leitor de linhas adequado à extensão do arquivo. '''
+
+    readers = {'.xlsx': readXlsxRows, '.csv': readCsvRows, '.txt': readTxtRows}
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension not in readers:
+        raise ValueError(f'Extensão de arquivo não suportada: {extension}')
+
+    return readers[extension]
+
+def readChunks(rows, chunkSize=TAMANHO_BLOCO):
+    ''' Converte as linhas (data, horário, consumo) de `rows` em blocos de até `chunkSize` linhas.
+    Cada bloco é uma tupla de arrays (ordinais, minutos, valores). '''
+
+    dateCache = {}
+    timeCache = {}
+    ordinais = np.empty(chunkSize, dtype=np.int32)
+    minutos = np.empty(chunkSize, dtype=np.int16)
+    valores = np.empty(chunkSize, dtype=np.float64)
+    i = 0
+    count = 0
+
+    for row in rows:
+        try:
+            ordinais[i] = getDateOrdinal(row[0], dateCache)
+            minutos[i] = getMinuteOfDay(row[1], timeCache)
+            valores[i] = getFloat(row[2])
+        except (ValueError, TypeError, IndexError, AttributeError) as e:
+            raise ValueError(f'Registro {count + i + 1}: {e}')
+
+        i += 1
+        if i == chunkSize:
+            yield (ordinais.copy(), minutos.copy(), valores.copy())
+            count += i
+            i = 0
+
+    if i > 0:
+        yield (ordinais[:i].copy(), minutos[:i].copy(), valores[:i].copy())
+
+def getWaterDataReport(ordinais, minutos, inicio=0, ultimaData=None):
+    ''' Verifica, de uma só vez, as regras dos dados de consumo de água para as datas ordinais e os minutos do dia de cada linha.
+    `inicio` é somado aos índices retornados e `ultimaData` é a data ordinal do dia anterior aos dados, se houver.
+
+    Retorna um dicionário {'ok': bool, 'erros': {regra: array de índices}, 'linhas': array de índices}, com as regras de
+    `REGRAS` que foram violadas e as linhas de cada uma. Erros de um dia inteiro (data, início, intervalo e dia incompleto)
+    apontam para a primeira linha do dia; erros de intervalo não uniforme apontam para a linha onde o intervalo muda. '''
+
+    ordinais = np.asarray(ordinais, dtype=np.int64)
+    minutos = np.asarray(minutos, dtype=np.int64)
+    n = len(ordinais)
+    erros = {}
+
+    if n > 0:
+        trocas = np.flatnonzero(np.diff(ordinais)) + 1
+        starts = np.concatenate(([0], trocas))
+        counts = np.diff(np.concatenate((starts, [n])))
+
+        # Datas estritamente crescentes, inclusive em relação ao dia anterior aos dados.
+        dates = ordinais[starts]
+        anteriores = np.concatenate(([ultimaData if ultimaData is not None else dates[0] - 1], dates[:-1]))
+        erros['data'] = starts[dates <= anteriores]
+
+        erros['inicio'] = starts[minutos[starts] != 0]
+
+        # O intervalo de cada dia é o dos dois primeiros horários.
+        segundos = np.minimum(starts + 1, n - 1)
+        intervalos = np.where(counts >= 2, minutos[segundos] - minutos[starts], 0)
+        validos = np.isin(intervalos, INTERVALOS)
+        erros['intervalo'] = starts[(counts >= 2) & ~validos]
+
+        # Dentro de cada dia, a diferença entre horários consecutivos precisa ser sempre a do início do dia.
+        # Dias com intervalo inválido já foram apontados e não são verificados aqui.
+        dentro = np.ones(n - 1, dtype=bool)
+        dentro[trocas - 1] = False
+        posicoes = np.flatnonzero(dentro)
+        diaDaPosicao = np.repeat(np.arange(len(starts)), counts - 1)
+        diferentes = (np.diff(minutos)[dentro] != intervalos[diaDaPosicao]) & validos[diaDaPosicao]
+        erros['uniforme'] = posicoes[diferentes] + 1
+
+        esperado = np.where(validos, MINUTOS_DIA // np.where(validos, intervalos, 1), 0)
+        erros['incompleto'] = starts[(counts != esperado) & (validos | (counts < 2))]
+
+    erros = {regra: indices + inicio for regra, indices in erros.items() if len(indices)}
+    linhas = np.unique(np.concatenate(list(erros.values()))) if erros else np.empty(0, dtype=np.int64)
+
+    return {'ok': not erros, 'erros': erros, 'linhas': linhas}
+
+def getReportMessage(report, limite=5):
+    ''' Retorna um texto com as regras violadas em `report` e as primeiras `limite` linhas de cada uma (numeradas a partir de 1). '''
+
+    texts = []
+    for regra, indices in report['erros'].items():
+        linhas = ', '.join(str(int(i) + 1) for i in indices[:limite])
+        if len(indices) > limite:
+            linhas += f' e mais {len(indices) - limite}'
+
+        texts.append(f'Registros {linhas}: {REGRAS[regra]}')
+
+    return '\n'.join(texts)
+
+def checkDays(ordinais, minutos, inicio=0, ultimaData=None):
+    ''' Verifica os arrays com `getWaterDataReport()`. Levanta ValueError apontando o primeiro registro com erro. '''
+
+    report = getWaterDataReport(ordinais, minutos, inicio, ultimaData)
+    if report['ok']:
+        return
+
+    primeiro = int(report['linhas'][0])
+    regra = next(regra for regra, indices in report['erros'].items() if primeiro in indices)
+    raise ValueError(f'Registro {primeiro + 1}: {REGRAS[regra]}')
+
+def parseDataList(data):
+    ''' Converte a lista de dicionários de `fm.copyWaterFileDataToList()` para a tupla (ordinais, minutos, invalidos),
+    convertendo cada data e horário apenas uma vez. O consumo não é verificado aqui (ver `table.checkConsumoValue()`).
+    `invalidos` contém os índices das linhas que não puderam ser convertidas;
+    nelas, a data e o minuto repetem os da linha anterior. '''
+
+    n = len(data)
+    ordinais = np.empty(n, dtype=np.int64)
+    minutos = np.empty(n, dtype=np.int64)
+    invalidos = []
+    dateCache = {}
+    timeCache = {}
+    ultimo = (0, 0)
+
+    for i, dic in enumerate(data):
+        try:
+            ultimo = (getDateOrdinal(dic['date'], dateCache), getMinuteOfDay(dic['time'], timeCache))
+        except (ValueError, TypeError, KeyError, AttributeError):
+            invalidos.append(i)
+
+        ordinais[i], minutos[i] = ultimo
+
+    return (ordinais, minutos, np.array(invalidos, dtype=np.int64))
+
+def validateChunks(chunks):
+    ''' Valida os blocos de `readChunks()` conforme chegam e os devolve contendo apenas dias completos.
+    O último dia de cada bloco, que pode continuar no próximo, fica guardado até a próxima leitura. '''
+
+    resto = None
+    inicio = 0
+    ultimaData = None
+
+    for chunk in chunks:
+        if resto is not None:
+            chunk = tuple(np.concatenate((a, b)) for a, b in zip(resto, chunk))
+
+        # O corte fica no início do último dia do bloco.
+        ordinais = chunk[0]
+        trocas = np.flatnonzero(ordinais[1:] != ordinais[:-1])
+        corte = int(trocas[-1]) + 1 if len(trocas) else 0
+        if corte == 0 and len(ordinais) > MINUTOS_DIA:
+            # Um "dia" maior que um dia completo já está errado; validamos tudo para acusar o erro.
+            corte = len(ordinais)
+
+        completo = tuple(a[:corte] for a in chunk)
+        resto = tuple(a[corte:] for a in chunk)
+
+        checkDays(completo[0], completo[1], inicio, ultimaData)
+        if corte > 0:
+            ultimaData = int(completo[0][-1])
+            inicio += corte
+            yield completo
+
+    if resto is not None and len(resto[0]):
+        checkDays(resto[0], resto[1], inicio, ultimaData)
+        yield resto
+
+def importWaterFile(path, chunkSize=TAMANHO_BLOCO):
+    ''' Importa um arquivo de consumo de água (.xlsx, .csv ou .txt) e retorna a tupla de arrays (ordinais, minutos, valores).
+    Levanta ValueError, com o número do registro, se o arquivo tiver dados inválidos. '''
+
+    rows = getRowReader(path)(path)
+    parts = list(validateChunks(readChunks(rows, chunkSize)))
+
+    if not parts:
+        return (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int16), np.empty(0, dtype=np.float64))
+
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+def formatValue(valor):
+    ''' Retorna o consumo `valor` como ele é gravado no arquivo: o menor texto que volta ao mesmo float, sem o '.0'
+    dos números inteiros. Ex: 12.0 -> '12', 12.9 -> '12.9'. '''
+
+    texto = repr(float(valor))
+    return texto[:-2] if texto.endswith('.0') else texto
+
+def toDataList(ordinais, minutos, valores):
+    ''' Converte os arrays para a lista de dicionários de `fm.copyWaterFileDataToList()`.
+    Exemplo: [{'date': '09/03/2021', 'time': '12:30', 'value': '12.9'}, ...] '''
+
+    dates = {int(ordinal): datetime.date.fromordinal(int(ordinal)).strftime('%d/%m/%Y') for ordinal in np.unique(ordinais)}
+
+    return [{'date': dates[o], 'time': HORARIOS[m], 'value': formatValue(v)}
+        for o, m, v in zip(ordinais.tolist(), minutos.tolist(), valores.tolist())]
@@ -0,0 +1,222 @@
+"""
+water_reference.py
+Banco de dados de perfis de consumo de água usados como referência, guardado em SQLite (assets/files/water_database.sqlite).
+Cada local tem o nome, a região, a descrição, o perfil horário e os 15 indicadores, os dois últimos como blobs de float64.
+A região tem um índice e o nome uma tabela FTS5, então a pesquisa e a abertura da janela não dependem da quantidade de locais.
+Os arquivos .json no formato de assets/files/water_database.json são fontes de importação. Se o banco não existir, ele
+é criado a partir desse arquivo. Não depende do wx.
+
+Uso: python -m app.water_reference ARQUIVO.json [ARQUIVO.json ...] [--banco CAMINHO]
+Importa os locais dos arquivos para o banco.
+"""
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import argparse
+import numpy as np
+
+PATH = 'assets/files/water_database.json'
+DATABASE_PATH = 'assets/files/water_database.sqlite'
+
+VERSAO = 1              # Muda quando o formato do banco muda. Bancos de outra versão são recriados.
+
+# Regiões do filtro de pesquisa. 'todas' não filtra.
+REGIOES = ('todas', 'norte', 'nordeste', 'centro-oeste', 'sudeste', 'sul', 'exterior')
+
+# Horário de ponta, em horas do perfil: das 18h00 às 20h59.
+PONTA_INICIO = 18
+PONTA_FIM = 21
+
+# Nome de cada coluna da matriz de indicadores, na ordem da tabela de resumo.
+INDICADORES = ('Média', 'Máximo', 'K2', 'FD', 'Volume Ponta', 'Volume Ponta/Volume Total', 'Tempo consumo ABM',
+    'Tempo consumo ACM', 'Volume Fora Ponta', 'Volume Fora Ponta/Volume Total', 'Volume Ponta/Volume Fora Ponta',
+    'Consumo ABM', 'Consumo ABM/Consumo Total', 'Consumo ACM', 'Consumo ACM/Consumo Total')
+
+# Horário de cada valor do perfil.
+HORARIOS = tuple(f'{hora:02d}:00' for hora in range(0, 24))
+
+# A pesquisa ignora maiúsculas e acentos: o tokenizador do FTS5 remove os acentos do nome e da pesquisa.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS perfis (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    regiao TEXT NOT NULL,
+    info TEXT NOT NULL,
+    perfil BLOB NOT NULL,
+    indicadores BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS perfis_regiao ON perfis (regiao);
+CREATE VIRTUAL TABLE IF NOT EXISTS perfis_nome USING fts5(
+    nome, content='perfis', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+'''
+
+# Banco aberto, compartilhado por todas as janelas.
+database = None
+
+def getIndicators(perfis):
+    ''' Recebe uma matriz locais × horas com os perfis de consumo e retorna uma matriz locais × `INDICADORES`.
+    Abaixo da média (ABM) conta os valores menores que a média. Acima da média (ACM) soma os valores maiores que
+    a média, mas o tempo ACM é o que sobra do tempo ABM. '''
+
+    horas = perfis.shape[1]
+    total = perfis.sum(axis=1)
+    maximo = perfis.max(axis=1)
+    media = total / horas
+
+    abaixo = perfis < media[:, None]
+    acima = perfis > media[:, None]
+
+    ponta = perfis[:, PONTA_INICIO:PONTA_FIM].sum(axis=1)
+    foraPonta = total - ponta
+    tempoABM = abaixo.sum(axis=1)
+    consumoABM = np.where(abaixo, perfis, 0).sum(axis=1)
+    consumoACM = np.where(acima, perfis, 0).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k2 = maximo / media
+
+        return np.column_stack((media, maximo, k2, 1 / k2, ponta, ponta / total, tempoABM, horas - tempoABM,
+            foraPonta, foraPonta / total, ponta / foraPonta, consumoABM, consumoABM / total, consumoACM, consumoACM / total))
+
+def getMatchQuery(query):
+    ''' Converte o texto digitado na pesquisa do FTS5: cada palavra é o início de uma palavra do nome.
+    Ex: 'campus va' -> '"campus"* "va"*'. Retorna uma string vazia se não houver palavras. '''
+
+    return ' '.join(f'"{palavra}"*' for palavra in re.findall(r'\w+', query))
+
+def parseItems(items):
+    ''' Recebe a lista de dicionários de um arquivo .json, ordenada pelo índice se houver, e retorna uma tupla
+    (linhas, perfis): as linhas (nome, regiao, info) e a matriz locais × horas dos perfis. '''
+
+    items = sorted(items, key=lambda item: item.get('index', 0))
+    linhas = [(item['name'], item['region'], item.get('info', 'Sem descrição.')) for item in items]
+
+    perfis = []
+    for item in items:
+        valores = item['data'].split(',') if isinstance(item['data'], str) else item['data']
+        if len(valores) != len(HORARIOS):
+            raise ValueError(f"Perfil de {item['name']} com {len(valores)} valores. São esperados {len(HORARIOS)}, um por hora.")
+
+        perfis.append([float(value) for value in valores])
+
+    return (linhas, np.array(perfis, dtype=np.float64).reshape(-1, len(HORARIOS)))
+
+class WaterReference:
+    ''' Banco de perfis de referência em um arquivo SQLite. Os locais são identificados pelo `id` do banco. '''
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != VERSAO:
+            self.connection.executescript('DROP TABLE IF EXISTS perfis_nome; DROP TABLE IF EXISTS perfis;')
+
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f'PRAGMA user_version = {VERSAO}')
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute('SELECT count(*) FROM perfis').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def importItems(self, items):
+        ''' Adiciona os locais da lista de dicionários de um arquivo .json. Os indicadores de todos são calculados de uma vez.
+        Retorna a quantidade de locais adicionados. '''
+
+        linhas, perfis = parseItems(items)
+        indicadores = getIndicators(perfis)
+
+        with self.connection:
+            self.connection.executemany('INSERT INTO perfis (nome, regiao, info, perfil, indicadores) VALUES (?, ?, ?, ?, ?)',
+                ((*linha, perfil.tobytes(), valores.tobytes()) for linha, perfil, valores in zip(linhas, perfis, indicadores)))
+            self.connection.execute("INSERT INTO perfis_nome (perfis_nome) VALUES ('rebuild')")
+
+        return len(linhas)
+
+    def importJSON(self, path):
+        ''' Adiciona os locais do arquivo .json em `path`. Retorna a quantidade de locais adicionados. '''
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return self.importItems(json.load(f))
+
+    def search(self, query='', region='todas'):
+        ''' Retorna a lista de tuplas (id, nome) dos locais da região `region` com alguma palavra do nome começando por cada
+        palavra de `query`, na ordem de importação. A comparação ignora maiúsculas e acentos. '''
+
+        match = getMatchQuery(query)
+        filtros, parametros = [], []
+
+        # Com um JOIN, o SQLite consulta o FTS5 uma vez por linha de `perfis`. A subconsulta o consulta uma vez só.
+        if match:
+            filtros.append('id IN (SELECT rowid FROM perfis_nome WHERE perfis_nome MATCH ?)')
+            parametros.append(match)
+
+        if region != 'todas':
+            filtros.append('regiao = ?')
+            parametros.append(region)
+
+        sql = 'SELECT id, nome FROM perfis'
+        if filtros:
+            sql += ' WHERE ' + ' AND '.join(filtros)
+
+        return self.connection.execute(sql + ' ORDER BY id', parametros).fetchall()
+
+    def getItem(self, id):
+        ''' Retorna uma tupla (nome, regiao, info, perfil, indicadores) do local `id`. '''
+
+        nome, regiao, info, perfil, indicadores = self.connection.execute(
+            'SELECT nome, regiao, info, perfil, indicadores FROM perfis WHERE id = ?', (id,)).fetchone()
+
+        return (nome, regiao, info, np.frombuffer(perfil, dtype=np.float64), np.frombuffer(indicadores, dtype=np.float64))
+
+    def getProfileMatrix(self):
+        ''' Retorna uma tupla (ids, perfis) com os ids de todos os locais e a matriz locais × horas dos perfis. '''
+
+        linhas = self.connection.execute('SELECT id, perfil FROM perfis ORDER BY id').fetchall()
+        ids = np.array([id for id, _ in linhas], dtype=np.int64)
+
+        return (ids, np.frombuffer(b''.join(perfil for _, perfil in linhas), dtype=np.float64).reshape(len(ids), len(HORARIOS)))
+
+    def getProfiles(self, ids):
+        ''' Retorna a lista de tuplas (nome, perfil) dos locais `ids`, na mesma ordem. '''
+
+        return [(nome, perfil) for nome, _, _, perfil, _ in map(self.getItem, ids)]
+
+def getDatabase(path=DATABASE_PATH, source=PATH):
+    ''' Retorna o banco de dados de referência, aberto apenas na primeira chamada. Se o banco estiver vazio,
+    os locais de `source` são importados. '''
+
+    global database
+
+    if database is None:
+        database = WaterReference(path)
+        if not len(database):
+            database.importJSON(source)
+
+    return database
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.water_reference', description='Importa perfis de consumo para o banco de dados de referência.')
+    parser.add_argument('arquivos', nargs='+', help='arquivos .json no formato de assets/files/water_database.json')
+    parser.add_argument('--banco', default=DATABASE_PATH, help=f'arquivo do banco de dados (padrão: {DATABASE_PATH})')
+    args = parser.parse_args(argv)
+
+    novo = not os.path.exists(args.banco)
+    store = getDatabase(args.banco)
+    if novo:
+        print(f'Banco criado em {args.banco} com {len(store)} locais de {PATH}.')
+
+    for path in args.arquivos:
+        print(f'{path}: {store.importJSON(path)} locais importados.')
+
+    print(f'Total: {len(store)} locais.')
+    store.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+water_series.py
+Série de consumo de água guardada em arrays do numpy, no lugar da lista de dicionários com strings.
+Não depende do wx.
+"""
+
+import datetime
+import numpy as np
+import app.water_import as water_import
+
+MINUTOS_DIA = 1440
+EPOCA = datetime.date(1970, 1, 1).toordinal()   # Dia zero do datetime64.
+
+class WaterSeries:
+    ''' Dados de consumo de água em colunas: dia, minuto do dia e vazão de cada medição.
+
+    `datas` contém a data ordinal (`datetime.date.toordinal()`) de cada dia e `inicios` a posição da primeira medição de
+    cada dia, com uma posição extra no final. As medições do dia `i` estão em `minutos[inicios[i]:inicios[i + 1]]` e
+    `valores[inicios[i]:inicios[i + 1]]`, então recortar um dia não copia nada. '''
+
+    def __init__(self, ordinais, minutos, valores, dtype=np.float64):
+        ''' Recebe um array com a data ordinal de cada medição, um com o minuto do dia e um com a vazão.
+        As medições precisam estar agrupadas por dia. `dtype` pode ser np.float32 para economizar memória. '''
+
+        ordinais = np.asarray(ordinais, dtype=np.int32)
+        trocas = np.flatnonzero(np.diff(ordinais)) + 1
+
+        self.datas = ordinais[np.concatenate(([0], trocas))] if len(ordinais) else np.empty(0, dtype=np.int32)
+        self.inicios = np.concatenate(([0], trocas, [len(ordinais)])).astype(np.int64) if len(ordinais) else np.zeros(1, dtype=np.int64)
+        self.minutos = np.asarray(minutos, dtype=np.int16)
+        self.valores = np.asarray(valores, dtype=dtype)
+
+    @classmethod
+    def fromColumns(cls, datas, inicios, minutos, valores):
+        ''' Cria a série direto dos arrays `datas`, `inicios`, `minutos` e `valores`, sem agrupar as medições de novo.
+        Usada para ler a série de um cache. '''
+
+        serie = cls.__new__(cls)
+        serie.datas = np.asarray(datas, dtype=np.int32)
+        serie.inicios = np.asarray(inicios, dtype=np.int64)
+        serie.minutos = np.asarray(minutos, dtype=np.int16)
+        serie.valores = np.asarray(valores)
+
+        return serie
+
+    @classmethod
+    def fromDataList(cls, data, dtype=np.float64):
+        ''' Cria a série a partir da lista de `fm.copyWaterFileDataToList()`.
+        Ex: [{'date': '09/03/2021', 'time': '12:30', 'value': '12.9'}, ...] '''
+
+        rows = ((dic['date'], dic['time'], dic['value']) for dic in data)
+        return cls.fromRows(rows, dtype)
+
+    @classmethod
+    def fromDaysList(cls, daysList, dtype=np.float64):
+        ''' Cria a série a partir da lista de dias de `dp.getTableReadyData()`. '''
+
+        rows = ((day['date'], x, y) for day in daysList for x, y in zip(*day['xyValues']))
+        return cls.fromRows(rows, dtype)
+
+    @classmethod
+    def fromFileLines(cls, lines, indices, dtype=np.float64):
+        ''' Cria a série a partir da seção de consumo de água das linhas de um arquivo .lenhs, sem passar pela lista de dicionários.
+        Retorna None se o arquivo não tiver dados de consumo. Levanta ValueError se alguma linha for inválida. '''
+
+        if not '#water_consumption_start' in indices.keys():
+            return None
+
+        end = indices.get('#water_consumption_end', len(lines))
+        rows = (line.split() for line in lines[indices['#water_consumption_start']:end] if line.strip() and line[0] != '#')
+        serie = cls.fromRows(rows, dtype)
+
+        return serie if len(serie) else None
+
+    @classmethod
+    def fromRows(cls, rows, dtype=np.float64):
+        ''' Cria a série a partir de linhas (data, horário, consumo), convertidas em blocos por `water_import.readChunks()`. '''
+
+        parts = list(water_import.readChunks(rows))
+        if not parts:
+            return cls([], [], [], dtype)
+
+        return cls(*(np.concatenate(arrays) for arrays in zip(*parts)), dtype=dtype)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def getDaysCount(self):
+        ''' Retorna a quantidade de dias da série. '''
+
+        return len(self.datas)
+
+    def getDay(self, i):
+        ''' Retorna uma tupla (minutos, valores) com as medições do dia `i`. Os arrays são fatias, não cópias. '''
+
+        inicio, fim = self.inicios[i], self.inicios[i + 1]
+        return (self.minutos[inicio:fim], self.valores[inicio:fim])
+
+    def getDate(self, i):
+        ''' Retorna a data do dia `i` no formato DD/MM/AAAA. '''
+
+        return datetime.date.fromordinal(int(self.datas[i])).strftime('%d/%m/%Y')
+
+    def getDates(self):
+        ''' Retorna a lista de datas no formato DD/MM/AAAA. '''
+
+        return [self.getDate(i) for i in range(0, self.getDaysCount())]
+
+    def getOrdinals(self):
+        ''' Retorna a data ordinal de cada medição. '''
+
+        return np.repeat(self.datas, self.getDailyCounts())
+
+    def getDayStarts(self):
+        ''' Retorna o início de cada dia como datetime64 em minutos. '''
+
+        return (self.datas.astype(np.int64) - EPOCA).astype('datetime64[D]').astype('datetime64[m]')
+
+    def getDailyCounts(self):
+        ''' Retorna a quantidade de medições de cada dia. '''
+
+        return np.diff(self.inicios)
+
+    def getIntervals(self):
+        ''' Retorna o intervalo entre as medições de cada dia, em minutos. '''
+
+        inicios = self.inicios[:-1]
+        return self.minutos[inicios + 1].astype(np.int64) - self.minutos[inicios]
+
+    def getDailySums(self):
+        ''' Retorna o consumo total de cada dia. '''
+
+        return np.add.reduceat(self.valores, self.inicios[:-1]) if len(self) else np.empty(0)
+
+    def getDailyMax(self):
+        ''' Retorna a maior vazão de cada dia. '''
+
+        return np.maximum.reduceat(self.valores, self.inicios[:-1]) if len(self) else np.empty(0)
+
+    def getDailyMin(self):
+        ''' Retorna a menor vazão de cada dia. '''
+
+        return np.minimum.reduceat(self.valores, self.inicios[:-1]) if len(self) else np.empty(0)
+
+    def getDailyMean(self):
+        ''' Retorna a vazão média de cada dia. '''
+
+        return self.getDailySums() / self.getDailyCounts() if len(self) else np.empty(0)
+
+    def getMemoryUsage(self):
+        ''' Retorna a memória ocupada pelos arrays da série, em bytes. '''
+
+        return self.datas.nbytes + self.inicios.nbytes + self.minutos.nbytes + self.valores.nbytes
+
+    def iterLines(self):
+        ''' Gera as linhas da seção de consumo de água de um arquivo .lenhs, uma por medição. Ex: '09/03/2021 12:30 12.9\n' '''
+
+        for i in range(0, self.getDaysCount()):
+            date = self.getDate(i)
+            minutos, valores = self.getDay(i)
+
+            for minuto, valor in zip(minutos.tolist(), valores.tolist()):
+                yield f'{date} {water_import.HORARIOS[minuto]} {water_import.formatValue(valor)}\n'
+
+    def toDataList(self):
+        ''' Visão de compatibilidade: retorna a lista de dicionários de `fm.copyWaterFileDataToList()`. '''
+
+        return water_import.toDataList(self.getOrdinals(), self.minutos, self.valores.astype(np.float64))
+
+    def toDaysList(self):
+        ''' Visão de compatibilidade: retorna a lista de dias de `dp.getTableReadyData()`. '''
+
+        times = [f'{minuto // 60:02d}:{minuto % 60:02d}' for minuto in range(0, MINUTOS_DIA)]
+        daysList = []
+
+        for i in range(0, self.getDaysCount()):
+            minutos, valores = self.getDay(i)
+            daysList.append({'date': self.getDate(i), 'xyValues': [[times[m] for m in minutos.tolist()], valores.tolist()]})
+
+        return daysList
+
+def asWaterSeries(data):
+    ''' Retorna `data` como WaterSeries. Aceita uma WaterSeries, a lista de dias de `dp.getTableReadyData()`
+    ou a lista de `fm.copyWaterFileDataToList()`. Uma WaterStore, que tem a mesma interface de leitura, é retornada como está. '''
+
+    if isinstance(data, WaterSeries) or hasattr(data, 'iterChunks'):
+        return data
+
+    if data and 'xyValues' in data[0]:
+        return WaterSeries.fromDaysList(data)
+
+    return WaterSeries.fromDataList(data)
@@ -0,0 +1,211 @@
+"""
+water_store.py
+Série de consumo de água fora da memória: as medições ficam em arquivos binários e são lidas por janelas de numpy.memmap.
+Para séries de vários anos, onde a WaterSeries inteira (e as listas da interface) não cabem com folga na memória.
+Não depende do wx.
+
+A série de um arquivo .lenhs fica na pasta de `getStorePath()`, ao lado do arquivo, e funciona como um cache:
+- `openStore()` a refaz, lendo a seção aos poucos, quando o arquivo mudou desde a última vez;
+- ao salvar os dados de consumo de um arquivo grande, ela é regravada a partir da série em memória (`WaterStore.fromSeries()`);
+- ao salvar um arquivo abaixo de `LIMITE_MEMORIA`, ela é apagada (`removeStore()`).
+Fechar o projeto não apaga a pasta, que é reaproveitada na próxima abertura. Com "Salvar como", a pasta do arquivo antigo
+continua válida para ele, e o arquivo novo ganha a sua.
+"""
+
+import os
+import shutil
+import datetime
+import numpy as np
+import app.water_import as water_import
+import app.water_series as water_series
+import app.water_cache as water_cache
+import app.project as project
+
+VERSAO = 1
+DIAS = 'dias.npz'           # Datas e início de cada dia. Pequeno: fica sempre em memória.
+MINUTOS = 'minutos.bin'     # int16, uma medição por posição.
+VALORES = 'valores.bin'     # float64 (ou float32), uma medição por posição.
+
+# Acima deste tamanho de arquivo .lenhs (bytes), a janela de consumo usa a série fora da memória.
+LIMITE_MEMORIA = 64 * 2**20
+
+class WaterStore:
+    ''' Série de consumo de água guardada na pasta `folder`, com a mesma interface de leitura da WaterSeries.
+
+    Só `datas` e `inicios` (um valor por dia) ficam em memória. As medições são lidas do disco por janelas de memmap que
+    são fechadas logo depois, então a memória usada para percorrer a série não depende da quantidade de anos. Os totais
+    diários são calculados uma vez, em blocos de dias inteiros, e guardados. '''
+
+    def __init__(self, folder):
+        self.folder = folder
+
+        with np.load(os.path.join(folder, DIAS), allow_pickle=False) as npz:
+            self.datas = npz['datas']
+            self.inicios = npz['inicios']
+            self.dtype = np.dtype(str(npz['dtype']))
+            self.chave = tuple(npz['chave'].tolist())
+
+        self.stats = None
+
+    @classmethod
+    def build(cls, folder, chunks, chave=(0, 0), dtype=np.float64):
+        ''' Cria a série em `folder` a partir dos blocos (ordinais, minutos, valores) de `water_import.readChunks()`.
+        Os blocos são validados e gravados conforme chegam; levanta ValueError se os dados forem inválidos.
+        `chave` é guardada para saber se a série ainda corresponde ao arquivo de origem. '''
+
+        os.makedirs(folder, exist_ok=True)
+        dias = os.path.join(folder, DIAS)
+
+        # Sem o arquivo dos dias, uma série pela metade nunca é aberta.
+        if os.path.exists(dias):
+            os.remove(dias)
+
+        datas = []
+        inicios = []
+        total = 0
+
+        with open(os.path.join(folder, MINUTOS), 'wb') as fMinutos, open(os.path.join(folder, VALORES), 'wb') as fValores:
+            # validateChunks() só devolve dias completos, então cada bloco começa em um dia novo.
+            for ordinais, minutos, valores in water_import.validateChunks(chunks):
+                trocas = np.concatenate(([0], np.flatnonzero(np.diff(ordinais)) + 1))
+                datas.append(ordinais[trocas])
+                inicios.append(trocas + total)
+
+                minutos.astype(np.int16).tofile(fMinutos)
+                valores.astype(dtype).tofile(fValores)
+                total += len(ordinais)
+
+        datas = np.concatenate(datas).astype(np.int32) if datas else np.empty(0, dtype=np.int32)
+        inicios = np.concatenate(inicios + [[total]]).astype(np.int64)
+
+        with open(dias, 'wb') as f:
+            np.savez(f, datas=datas, inicios=inicios, dtype=np.array(np.dtype(dtype).str),
+                chave=np.array([VERSAO, *chave], dtype=np.int64))
+
+        return cls(folder)
+
+    @classmethod
+    def fromSeries(cls, folder, serie, chave=(0, 0)):
+        ''' Grava uma WaterSeries, já validada, em `folder`, sem ler o arquivo de origem de novo. '''
+
+        return cls.build(folder, [(serie.getOrdinals(), serie.minutos, serie.valores)], chave, serie.valores.dtype)
+
+    def __len__(self):
+        return int(self.inicios[-1])
+
+    def readRange(self, name, inicio, fim):
+        ''' Retorna uma cópia das medições [inicio, fim) da coluna `name` (MINUTOS ou VALORES).
+        A janela do memmap é fechada ao sair, então as páginas lidas não ficam presas à série. '''
+
+        dtype = np.dtype(np.int16) if name == MINUTOS else self.dtype
+        if fim <= inicio:
+            return np.empty(0, dtype=dtype)
+
+        janela = np.memmap(os.path.join(self.folder, name), dtype=dtype, mode='r', offset=int(inicio) * dtype.itemsize, shape=(int(fim - inicio),))
+        dados = np.array(janela)
+        del janela  # Fecha a janela.
+
+        return dados
+
+    def iterChunks(self, tamanho=water_import.TAMANHO_BLOCO):
+        ''' Percorre a série em blocos de dias inteiros com até `tamanho` medições (um dia nunca é dividido).
+        Gera tuplas (primeiroDia, fimDia, minutos, valores), onde os arrays contêm os dias [primeiroDia, fimDia). '''
+
+        dia = 0
+        n = self.getDaysCount()
+
+        while dia < n:
+            inicio = self.inicios[dia]
+            fimDia = int(np.searchsorted(self.inicios, inicio + tamanho, side='right')) - 1
+            fimDia = min(max(fimDia, dia + 1), n)
+            fim = self.inicios[fimDia]
+
+            yield (dia, fimDia, self.readRange(MINUTOS, inicio, fim), self.readRange(VALORES, inicio, fim))
+            dia = fimDia
+
+    def getDailyStats(self, tamanho=water_import.TAMANHO_BLOCO):
+        ''' Retorna o dicionário {'somas', 'maximos', 'minimos'} com um valor por dia, calculado em blocos. '''
+
+        if self.stats is None:
+            n = self.getDaysCount()
+            stats = {'somas': np.empty(n), 'maximos': np.empty(n), 'minimos': np.empty(n)}
+
+            for primeiro, fimDia, minutos, valores in self.iterChunks(tamanho):
+                inicios = self.inicios[primeiro:fimDia] - self.inicios[primeiro]
+                stats['somas'][primeiro:fimDia] = np.add.reduceat(valores, inicios)
+                stats['maximos'][primeiro:fimDia] = np.maximum.reduceat(valores, inicios)
+                stats['minimos'][primeiro:fimDia] = np.minimum.reduceat(valores, inicios)
+
+            self.stats = stats
+
+        return self.stats
+
+    def getDaysCount(self):
+        return len(self.datas)
+
+    def getDay(self, i):
+        ''' Retorna uma tupla (minutos, valores) com as medições do dia `i`. '''
+
+        inicio, fim = self.inicios[i], self.inicios[i + 1]
+        return (self.readRange(MINUTOS, inicio, fim), self.readRange(VALORES, inicio, fim))
+
+    def getDate(self, i):
+        return datetime.date.fromordinal(int(self.datas[i])).strftime('%d/%m/%Y')
+
+    def getDates(self):
+        return [self.getDate(i) for i in range(0, self.getDaysCount())]
+
+    def getDayStarts(self):
+        return (self.datas.astype(np.int64) - water_series.EPOCA).astype('datetime64[D]').astype('datetime64[m]')
+
+    def getDailyCounts(self):
+        return np.diff(self.inicios)
+
+    def getDailySums(self):
+        return self.getDailyStats()['somas']
+
+    def getDailyMax(self):
+        return self.getDailyStats()['maximos']
+
+    def getDailyMin(self):
+        return self.getDailyStats()['minimos']
+
+    def getDailyMean(self):
+        return self.getDailySums() / self.getDailyCounts() if len(self) else np.empty(0)
+
+    def getMemoryUsage(self):
+        ''' Retorna a memória ocupada pelos arrays que ficam em memória, em bytes. As medições não contam. '''
+
+        stats = sum(a.nbytes for a in self.stats.values()) if self.stats else 0
+        return self.datas.nbytes + self.inicios.nbytes + stats
+
+def getStorePath(path):
+    ''' Retorna a pasta da série fora da memória do arquivo .lenhs em `path`. Ex: 'projeto.lenhs' -> 'projeto.lenhs.agua'. '''
+
+    return f'{path}.agua'
+
+def removeStore(path):
+    ''' Apaga a pasta da série fora da memória do arquivo .lenhs em `path`, se existir. '''
+
+    shutil.rmtree(getStorePath(path), ignore_errors=True)
+
+def openStore(path):
+    ''' Retorna a WaterStore dos dados de consumo de água do arquivo .lenhs em `path`, ou None se não houver dados.
+    A série é refeita, lendo a seção aos poucos, apenas se o arquivo mudou desde a última vez. '''
+
+    folder = getStorePath(path)
+    chave = water_cache.getFileKey(path)
+
+    if os.path.exists(os.path.join(folder, DIAS)):
+        store = WaterStore(folder)
+        if store.chave == (VERSAO, *chave):
+            return store if len(store) else None
+
+    doc = project.LenhsDocument(path)
+    if not doc.hasSection('water_consumption'):
+        return None
+
+    rows = (line.split() for line in doc.iterSectionLines('water_consumption') if line.strip() and line[0] != '#')
+    store = WaterStore.build(folder, water_import.readChunks(rows), chave)
+
+    return store if len(store) else None
@@ -0,0 +1,72 @@
+'''
+charts.py
+Janelas de gráfico embutidas no wx com FigureCanvasWxAgg, no lugar de uma nova janela do `plt.show()` a cada gráfico.
+Cada gráfico tem uma chave e uma única janela, criada no primeiro desenho e reaproveitada nos seguintes: a figura,
+o eixo e o canvas continuam os mesmos e fechar a janela apenas a esconde. As figuras não passam pelo pyplot, então não
+se acumulam no gerenciador de figuras dele. As janelas são destruídas junto com a janela principal que as abriu.
+'''
+
+import wx
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg, NavigationToolbar2WxAgg
+import app.figures as figures
+
+# Janela de cada gráfico, pela chave.
+charts = {}
+
+class ChartFrame(wx.Frame):
+    ''' Janela com um canvas do matplotlib e a barra de ferramentas de zoom e navegação. '''
+
+    def __init__(self, parent, title):
+        wx.Frame.__init__(self, parent, wx.ID_ANY, title)
+
+        self.figure = Figure(figsize=figures.TAMANHO)
+        self.canvas = FigureCanvasWxAgg(self, wx.ID_ANY, self.figure)
+        self.toolbar = NavigationToolbar2WxAgg(self.canvas)
+        self.toolbar.Realize()
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.canvas, 1, wx.EXPAND)
+        sizer.Add(self.toolbar, 0, wx.EXPAND)
+        self.SetSizerAndFit(sizer)
+
+        self.Bind(wx.EVT_CLOSE, self.OnClose)
+
+    def OnClose(self, event):
+        ''' Esconde a janela para ser reaproveitada. Se o fechamento não puder ser vetado, a janela é destruída. '''
+
+        if event.CanVeto():
+            self.Hide()
+            event.Veto()
+        else:
+            self.Destroy()
+
+    def draw(self, function, *args, **kwargs):
+        ''' Desenha `function(*args, fig=self.figure, **kwargs)`, uma função de `app/figures.py`, e mostra a janela.
+        Retorna o que `function` retornar. '''
+
+        result = function(*args, fig=self.figure, **kwargs)
+        self.canvas.draw_idle()
+
+        self.Show()
+        self.Raise()
+
+        return result
+
+def getChart(parent, key, title):
+    ''' Retorna a janela do gráfico `key`, criando-a se ainda não existir ou se já tiver sido destruída. '''
+
+    frame = charts.get(key)
+    if not frame:
+        frame = ChartFrame(wx.GetTopLevelParent(parent), title)
+        charts[key] = frame
+    else:
+        frame.SetTitle(title)
+
+    return frame
+
+def showChart(parent, key, title, function, *args, **kwargs):
+    ''' Desenha um gráfico de `app/figures.py` na janela `key` e a mostra. `parent` é qualquer janela da tela que pediu o gráfico.
+    Retorna o que `function` retornar. '''
+
+    return getChart(parent, key, title).draw(function, *args, **kwargs)
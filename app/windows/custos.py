@@ -11,6 +11,7 @@ import app.windows.conversor as conversor
 import app.global_variables as gv
 import app.file_manager as fm
 import app.data_processing as dp
+import app.project as project
 
 GREEN = '#8e9c91'
 BLUE = '#9fa3e0'
@@ -437,59 +438,30 @@ class Custos(wx.Frame):
     def WriteDataToFile(self):
         ''' Salva todos os dados para o arquivo. '''
 
-        if '#expenses_start' in gv.fileStartIndices.keys():
-            index = gv.fileStartIndices['#expenses_start']
-
-            if self.isGreenMode:
-                gv.fileLines[index] = 'green\n'
-            else:
-                gv.fileLines[index] = 'blue\n'
-
-            index += 1
-            # Agora começaremos com os dados em si.
-            # Os dados das alíquotas são obrigatórios, então podemos escrevê-los com calma.
-            for field in self.inputAliFields:
-                gv.fileLines[index] = f'{field.GetValue()}\n'
-                index += 1
-
-            # Iremos agora guardar os dados das tarifas. O usuário é obrigado a preencher os dados de pelo menos uma delas.
-            # Agora os dados das tarifas verdes.
-            for field in self.inputGreenFields:
-                gv.fileLines[index] = f'{field.GetValue()}\n'
-                index += 1
-
-            # Agora os dados das tarifas azuis.
-            for field in self.inputBlueFields:
-                gv.fileLines[index] = f'{field.GetValue()}\n'
-                index += 1
-
+        if self.isGreenMode:
+            lines = ['green\n']
         else:
-            gv.fileLines.append('#expenses_start\n')
-            gv.fileStartIndices['#expenses_start'] = len(gv.fileLines)
+            lines = ['blue\n']
 
-            if self.isGreenMode:
-                gv.fileLines.append('green\n')
-            else:
-                gv.fileLines.append('blue\n')
-
-            for field in self.inputAliFields:
-                gv.fileLines.append(f'{field.GetValue()}\n')
+        # Agora começaremos com os dados em si.
+        # Os dados das alíquotas são obrigatórios, então podemos escrevê-los com calma.
+        for field in self.inputAliFields:
+            lines.append(f'{field.GetValue()}\n')
 
-            for field in self.inputGreenFields:
-                gv.fileLines.append(f'{field.GetValue()}\n')
+        # Iremos agora guardar os dados das tarifas. O usuário é obrigado a preencher os dados de pelo menos uma delas.
+        # Agora os dados das tarifas verdes.
+        for field in self.inputGreenFields:
+            lines.append(f'{field.GetValue()}\n')
 
-            for field in self.inputBlueFields:
-                gv.fileLines.append(f'{field.GetValue()}\n')
+        # Agora os dados das tarifas azuis.
+        for field in self.inputBlueFields:
+            lines.append(f'{field.GetValue()}\n')
 
-            gv.fileLines.append('#expenses_end\n')
-
-        # Fechamos o arquivo e o apagamos totalmente.
-        gv.opened_file.close()
-        gv.opened_file = open(gv.file_path, 'w')
+        fm.replaceSection('expenses', lines)
 
-        # Reescrevemos do zero.
-        gv.opened_file.write(''.join(gv.fileLines))
+        # Fechamos o arquivo e gravamos apenas esta seção. O resto do arquivo é copiado sem ser reescrito.
         gv.opened_file.close()
+        project.saveSection(gv.file_path, 'expenses', fm.getSectionLines('expenses'))
 
         # Reabrimos em modo de leitura.
         gv.opened_file = open(gv.file_path, 'r')
@@ -7,10 +7,14 @@ database.py
 import wx
 import wx.richtext as rt
 import wx.grid as gridlib
-import matplotlib.pyplot as plt
 import json
 import app.windows.water_database as water_database
 import app.global_variables as gv
+import app.startup as startup
+
+# Carregados apenas no primeiro gráfico.
+figures = startup.lazyImport('app.figures')
+charts = startup.lazyImport('app.windows.charts')
 
 class Database(wx.Frame):
     def __init__(self, parent):
@@ -442,35 +446,13 @@ class Rendimento(wx.Dialog):
         else:
             key = '4polos'
 
-        fig, ax = plt.subplots(figsize=(11, 6))
-
-        # Informacoes do grafico.
-        ax.set_xlabel('Potência do Motor (kW)')
-        ax.set_ylabel('Rendimento Nominal (%)')
-
-        plt.suptitle(f'{ID} Polos', x=0.07, y=0.98, ha='left', fontsize=15)
-
-        # remove spines
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-
-        # estiliza o grid
-        ax.set_axisbelow(True)
-        ax.yaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
-        ax.xaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
-
         x, y = [], []
         data = self.RENDIMENTOS
         for index in range(0, len(data)):
             x.append(float(data[index]['kW']))
             y.append(float(data[index][key]))
 
-        plt.plot(x, self.getRendimento(ID, x), label=f"{self.getEquation(ID)}")
-        plt.plot(x, y, 'o', label='Ponto [kW, Rendimento]')
-
-        ax.legend(loc='lower right')
-        plt.tight_layout()
-        plt.show()
+        charts.showChart(self, f'rendimento{ID}', f'Rendimento - {ID} Polos', figures.getEfficiencyFigure, ID, x, y, self.getRendimento(ID, x), self.getEquation(ID))
 
     def getEquation(self, polo):
         ''' Retorna a equação (str) da equação do ajuste @`polo`. '''
@@ -9,6 +9,7 @@ import app.windows.conversor as conversor
 import app.windows.database as database
 import app.file_manager as fm
 import app.global_variables as gv
+import app.calculations as calculations
 import app.windows.tooltip_frame as tf
 
 class EnergyConsumption(wx.Frame):
@@ -358,19 +359,24 @@ class EnergyConsumption(wx.Frame):
 
         return color
 
+    def getParametros(self):
+        ''' Retorna os Parâmetros do Sistema carregados na janela no formato de `calculations`. '''
+
+        return {
+            'vazaoBombeada': self.vazaoBombeada,
+            'alturaNanometrica': self.alturaNanometrica,
+            'rendimentoMotor': self.rendimentoMotor,
+            'rendimentoBomba': self.rendimentoBomba,
+            'bombasParalelo': self.bombasParalelo,
+            'operacaoHorarioPonta': self.operacaoHorarioPonta,
+            'operacaoHorarioForaPonta': self.operacaoHorarioForaPonta
+        }
+
     def energiaPonta(self, isIn):
         """ Retorna o consumo de energia na ponta.
         @``isIn`` é True para Operacao dentro da Ponta, False caso contrario. """
 
-        num = 9.81 * self.vazaoBombeada * self.alturaNanometrica # Numerador
-        den = (self.rendimentoMotor / 100) * (self.rendimentoBomba / 100) # Denominador
-
-        if isIn:
-            result = (num / den) * self.operacaoHorarioPonta * 30
-        else:
-            result = (num / den) * self.operacaoHorarioForaPonta * 30
-
-        return result
+        return calculations.energiaPonta(self.getParametros(), isIn)
 
     def consumoTotal(self):
         """ Retorna o consumo de energia total. """
@@ -380,7 +386,7 @@ class EnergyConsumption(wx.Frame):
     def volumeBombeado(self):
         ''' Retorna o volume bombeado. '''
 
-        return self.vazaoBombeada * (self.operacaoHorarioPonta + self.operacaoHorarioForaPonta) * 30 * 3600
+        return calculations.volumeBombeado(self.getParametros())
 
     def consumoEspecifico(self):
         """ Retorna o consumo especifico. """
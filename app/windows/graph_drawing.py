@@ -4,22 +4,138 @@ graph_drawing.py
 """
 
 import wx
-import wx.lib.scrolledpanel as scrolled
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime
+import numpy as np
 import app.data_processing as dp
+import app.indicators as indicators
+import app.global_variables as gv
+import app.startup as startup
+
+# Carregados apenas no primeiro gráfico ou na primeira comparação com os perfis de referência.
+figures = startup.lazyImport('app.figures')
+charts = startup.lazyImport('app.windows.charts')
+matching = startup.lazyImport('app.matching')
+water_reference = startup.lazyImport('app.water_reference')
+
+class DayCalendar(wx.VListBox):
+    ''' Calendário virtual: uma linha por mês, com os dias desenhados como células coloridas pelo consumo diário.
+    Só os meses visíveis são desenhados e não há um widget por dia, então abrir e rolar o calendário leva o mesmo tempo
+    com um mês ou com dez anos de dados. O clique em um dia é localizado pela posição e repassado a `onDayClicked(i)`. '''
+
+    COLUNAS = 7
+    CELULA = (36, 20)
+    ESPACO = 3
+    TITULO = 22
+    MARGEM = 6
+    COR_MINIMA = (222, 235, 247)    # Dia de menor consumo.
+    COR_MAXIMA = (8, 81, 156)       # Dia de maior consumo.
+
+    def __init__(self, parent, onDayClicked, size):
+        wx.VListBox.__init__(self, parent, wx.ID_ANY, size=size, style=wx.SUNKEN_BORDER)
+
+        self.onDayClicked = onDayClicked
+        self.meses = np.empty(0, dtype='datetime64[M]')
+        self.dias = np.empty((0, 31), dtype=np.int64)  # Índice na série de cada dia do mês, ou -1.
+        self.cores = []
+        self.destaque = -1
+
+        self.Bind(wx.EVT_LEFT_DOWN, self.OnLeftDown)
+
+    def setData(self, serie, consumo, destaque):
+        ''' Organiza os dias de `serie` por mês. `consumo` tem o total de cada dia e `destaque` é o dia de maior consumo. '''
+
+        datas = serie.getDayStarts().astype('datetime64[D]')
+        meses = datas.astype('datetime64[M]')
+        self.meses, linha = np.unique(meses, return_inverse=True)
+
+        self.dias = np.full((len(self.meses), 31), -1, dtype=np.int64)
+        self.dias[linha, (datas - meses).astype(np.int64)] = np.arange(len(datas))
+
+        self.destaque = destaque
+        self.SetItemCount(len(self.meses))
+        self.ScrollToRow(0)
+        self.setColours(consumo)
+
+    def setColours(self, valores):
+        ''' Colore cada dia proporcionalmente ao seu valor em `valores`, entre o menor e o maior. Dias sem valor (NaN) ficam com a cor mínima. '''
+
+        valores = np.asarray(valores, dtype=np.float64)
+        finitos = valores[np.isfinite(valores)]
+        minimo = finitos.min() if len(finitos) else 0
+        faixa = finitos.max() - minimo if len(finitos) else 0
+
+        t = np.nan_to_num((valores - minimo) / faixa, nan=0, posinf=1, neginf=0) if faixa > 0 else np.zeros(len(valores))
+        rgb = np.outer(1 - t, self.COR_MINIMA) + np.outer(t, self.COR_MAXIMA)
+        self.cores = [wx.Colour(*cor) for cor in rgb.astype(int).tolist()]
+
+        self.Refresh()
+
+    def getCellRect(self, celula):
+        ''' Retorna o retângulo da célula `celula` (dia do mês - 1), relativo ao topo da linha do mês. '''
+
+        w, h = self.CELULA
+        coluna, linha = celula % self.COLUNAS, celula // self.COLUNAS
+        return wx.Rect(self.MARGEM + coluna * (w + self.ESPACO), self.TITULO + linha * (h + self.ESPACO), w, h)
+
+    def OnMeasureItem(self, n):
+        linhas = (31 + self.COLUNAS - 1) // self.COLUNAS
+        return self.TITULO + linhas * (self.CELULA[1] + self.ESPACO) + self.MARGEM
+
+    def OnDrawBackground(self, dc, rect, n):
+        pass    # Sem destaque de seleção: a linha inteira é um mês, não um item.
+
+    def OnDrawItem(self, dc, rect, n):
+        mes = self.meses[n].astype(object)
+        dc.SetFont(self.GetFont())
+        dc.SetTextForeground(wx.BLACK)
+        dc.DrawText(f'{dp.getMonthName(mes.month)} de {mes.year}', rect.x + self.MARGEM, rect.y + 4)
+
+        for celula, i in enumerate(self.dias[n].tolist()):
+            if i < 0:
+                continue
+
+            cell = self.getCellRect(celula)
+            cell.Offset(rect.x, rect.y)
+            cor = self.cores[i]
+
+            dc.SetBrush(wx.Brush(cor))
+            dc.SetPen(wx.Pen(wx.RED, 2) if i == self.destaque else wx.Pen(wx.Colour(160, 160, 160)))
+            dc.DrawRectangle(cell)
+
+            escuro = cor.Red() * 0.299 + cor.Green() * 0.587 + cor.Blue() * 0.114 < 140
+            dc.SetTextForeground(wx.WHITE if escuro else wx.BLACK)
+            dc.DrawLabel(str(celula + 1), cell, wx.ALIGN_CENTER)
+
+    def OnLeftDown(self, event):
+        ''' Localiza o dia clicado pela posição do mouse. '''
+
+        n = self.VirtualHitTest(event.GetY())
+        if n == wx.NOT_FOUND:
+            return
+
+        rect = self.GetItemRect(n)
+        x, y = event.GetX() - rect.x, event.GetY() - rect.y
+
+        for celula, i in enumerate(self.dias[n].tolist()):
+            if i >= 0 and self.getCellRect(celula).Contains(x, y):
+                self.onDayClicked(i)
+                return
 
 class GraphCalendar(wx.Panel):
+    ''' Calendário dos dias de consumo. `data` é uma WaterSeries ou uma WaterStore (série fora da memória). '''
+
+    # Indicadores pelos quais o calendário pode ser colorido: (rótulo, coluna de `indicators.COLUNAS`).
+    CORES = (('Consumo diário', 'consumo'), ('Fator K2', 'k2'), ('Consumo na ponta (%)', 'percentualPonta'),
+        ('Horas acima da vazão média', 'horasAcima'))
+
     def __init__(self, parent, data):
         style = wx.DEFAULT_FRAME_STYLE & (~wx.MAXIMIZE_BOX) & (~wx.RESIZE_BORDER)
         wx.Panel.__init__(self, parent, style=style)
 
         self.SetBackgroundColour('#e3e3e8')
-        self.isSaveToDisk = False
-        self.path = ''
 
         self.data = data
+        self.indicadores = {}
+        self.semelhantes = None
         self.consumption = []
         self.index = -1
         self.value = 0
@@ -29,58 +145,42 @@ class GraphCalendar(wx.Panel):
         self.summaryBtn = wx.Button(self, wx.ID_ANY, 'Gráfico Geral de Consumo')
         self.summaryBtn.Bind(wx.EVT_BUTTON, self.OnSummary)
 
+        self.colourChoice = wx.Choice(self, wx.ID_ANY, choices=[label for label, _ in self.CORES])
+        self.colourChoice.SetSelection(0)
+        self.colourChoice.Bind(wx.EVT_CHOICE, self.OnColourChoice)
+
+        self.exportBtn = wx.Button(self, wx.ID_ANY, 'Exportar indicadores (CSV)')
+        self.exportBtn.Bind(wx.EVT_BUTTON, self.OnExportIndicators)
+
+        self.matchBtn = wx.Button(self, wx.ID_ANY, 'Perfis de referência semelhantes')
+        self.matchBtn.SetToolTip('Compara o dia típico com os perfis de consumo do banco de dados')
+        self.matchBtn.Bind(wx.EVT_BUTTON, self.OnMatch)
+
         self.text = wx.StaticText(self, wx.ID_ANY)
-        self.scrollPanel = scrolled.ScrolledPanel(self, wx.ID_ANY, size=((290, 435)), style=wx.SUNKEN_BORDER)
-        self.scrollPanel.ShowScrollbars(False, True)
-        self.scrollPanel.SetupScrolling()
+        self.calendar = DayCalendar(self, self.OnDayClicked, size=((290, 435)))
 
         self.topVerticalBox = wx.BoxSizer(wx.VERTICAL)
-        self.sp_vbox1 = wx.BoxSizer(wx.VERTICAL)
 
-        self.scrollPanel.SetSizer(self.sp_vbox1)
+        colourBox = wx.BoxSizer(wx.HORIZONTAL)
+        colourBox.Add(wx.StaticText(self, wx.ID_ANY, 'Colorir por:'), flag=wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, border=5)
+        colourBox.Add(self.colourChoice, 1)
 
         self.topVerticalBox.Add(self.text, flag=wx.EXPAND | wx.LEFT, border=5)
         self.topVerticalBox.Add(self.summaryBtn, flag=wx.ALIGN_CENTER | wx.ALL, border=3)
-        self.topVerticalBox.AddSpacer(10)
-        self.topVerticalBox.Add(self.scrollPanel, flag=wx.EXPAND)
+        self.topVerticalBox.Add(self.exportBtn, flag=wx.ALIGN_CENTER | wx.ALL, border=3)
+        self.topVerticalBox.Add(self.matchBtn, flag=wx.ALIGN_CENTER | wx.ALL, border=3)
+        self.topVerticalBox.Add(colourBox, flag=wx.EXPAND | wx.ALL, border=3)
+        self.topVerticalBox.AddSpacer(5)
+        self.topVerticalBox.Add(self.calendar, flag=wx.EXPAND)
 
         self.SetSizerAndFit(self.topVerticalBox)
 
     def OrganizeData(self):
 
-        self.sp_vbox1.Clear(True)
-        self.consumption.clear()
-
-        currentMonth = ''
-
-        for i in range(0, len(self.data)):
-            # words -> [0]dia, [1]mes and [2]ano.
-            words = self.data[i]['date'].split('/')
-
-            if currentMonth != words[1]:
-                if currentMonth != '':
-                    self.sp_vbox1.Add(vBox)
-
-                currentMonth = words[1]
-                text = wx.StaticText(self.scrollPanel, wx.ID_ANY, f"{dp.getMonthName(int((words[1])))} de {words[2]}")
-
-                # Grid onde os botões dos dias serão adicionados
-                gridSizer = wx.GridSizer(rows=5, cols=4, hgap=5, vgap=5)
-
-                vBox = wx.BoxSizer(wx.VERTICAL)
-                vBox.Add(text, flag=wx.ALL, border=5)
-                vBox.Add(gridSizer, flag=wx.ALL, border=5)
-
-            # Cria o botão para o dia e o adiciona ao grid.
-            button = wx.Button(self.scrollPanel, 1000 + i, label=words[0], size=((60, 20)))
-            button.Bind(wx.EVT_BUTTON, self.OnButtonClicked)
-            gridSizer.Add(button, border=5)
-
-            dayConsumption = sum(self.data[i]['xyValues'][1])
-            self.consumption.append(dayConsumption)
-
-        self.sp_vbox1.Add(vBox)
-        self.sp_vbox1.Layout()
+        # Indicadores de todos os dias em uma passada. Uma WaterStore é percorrida em blocos, sem carregar a série inteira.
+        self.indicadores = indicators.getDailyIndicators(self.data)
+        self.semelhantes = None
+        self.consumption = self.indicadores['consumo'].tolist()
 
         # O gráfico fica bugado se tiver apenas um dia.
         if len(self.consumption) == 1:
@@ -89,185 +189,136 @@ class GraphCalendar(wx.Panel):
             self.summaryBtn.Enable(True)
 
         # Comeca a escrever os dados do gráfico de maior consumo.
-        bigger = dp.getBiggerValue(self.consumption)
-        self.index = bigger[0]
-        self.value = bigger[1]
+        self.index, self.value, self.k2, self.fd = indicators.getMaxDay(self.indicadores)
+        self.calendar.setData(self.data, self.indicadores[self.CORES[self.colourChoice.GetSelection()][1]], self.index)
 
-        self.k2 = dp.get_day_k2_factor(self.data[self.index]['xyValues'][1])
-        self.fd = dp.get_fd(self.k2)
-
-        msg = f"O dia de maior consumo foi em {self.data[self.index]['date']} com {'{:.2f}'.format(self.value)} m³/h.\n"
+        msg = f"O dia de maior consumo foi em {self.data.getDate(self.index)} com {'{:.2f}'.format(self.value)} m³/h.\n"
         msg += f"O fator K2 é de {'{:.2f}'.format(self.k2)} e o FD de {'{:.2f}'.format(self.fd)}"
         self.text.SetLabelText(msg)
 
-    def OnButtonClicked(self, event):
-        """ Chamada quando um botão é apertado. """
+    def OnDayClicked(self, ID):
+        """ Chamada quando um dia do calendário é clicado. `ID` é o índice do dia na série. """
 
-        ID = event.GetEventObject().Id
-        ID -= 1000
+        # Se for o gráfico escolhido for o de maior consumo, os fatores K2 e de demanda também são escritos.
+        self._plot_graph(ID, ID == self.index)
 
-        if ID == self.index:    # Se for o gráfico escolhido for o de maior consumo...
-            self._plot_graph(self.data[ID], f"{self.data[ID]['date']}", True, index=ID)
-        else:
-            self._plot_graph(self.data[ID], f"{self.data[ID]['date']}", False, index=ID)
+    def OnColourChoice(self, event):
+        ''' Chamada quando o usuário escolhe outro indicador para colorir o calendário. '''
 
+        if self.indicadores:
+            self.calendar.setColours(self.indicadores[self.CORES[self.colourChoice.GetSelection()][1]])
 
+    def OnExportIndicators(self, event):
+        ''' Salva a tabela de indicadores diários em um arquivo .csv. '''
 
-    def OnSummary(self, event):
-        """ Chamada quando o usuário clica no botão para desenhar o gráfico geral. """
+        dialog = wx.FileDialog(self, 'Escolha um nome para o arquivo .csv', gv.file_dir, 'indicadores.csv', '*.csv', wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
 
-        x_val = []
+        if dialog.ShowModal() == wx.ID_OK:
+            indicators.writeCSV(self.indicadores, dialog.GetPath())
 
-        for dic in self.data:
-            x_val.append(dic['date'])
+        dialog.Destroy()
 
-        xy_val = [x_val, self.consumption]
-        self._plot_graph(xy_val, 'Gráfico Geral de Consumo', False, isSummary=True)
+    def getMatches(self):
+        ''' Retorna o resultado de `matching.matchDays()` para a série, calculado no primeiro uso. '''
 
-    def _plot_graph(self, data, title, isBigger, isSummary=False, index=None):
-        """
-        Plota o gráfico. Cria uma nova janela. isBigger é um bool que sinaliza se o dia foi o de maior consumo.
+        if self.semelhantes is None:
+            with wx.BusyCursor():
+                self.semelhantes = matching.matchDays(self.data)
 
-        Parâmetros
-        ----------
-        ``isBigger`` : indica se o dia é o de maior consumo, portanto fatores KD e de demanda são escritos.
-        ``isSummary`` : indica se o gráfico é o de consumo geral.
-        ``index`` : é usado em _draw_graph_info() para buscar as horas abaixo e acima da vazão média.
-        """
+        return self.semelhantes
 
-        fig, ax = plt.subplots(figsize=(11, 6))
-        ax.xaxis.set_tick_params(rotation=30, labelsize=10)
+    def OnMatch(self, event):
+        ''' Desenha o dia típico medido junto com os perfis de referência mais próximos dele, todos em Q/Qmédia. '''
 
-        # Informacoes do gráfico.
-        ax.set_xlabel('Hora')
-        ax.set_ylabel('Consumo (m³/dia)')
+        semelhantes = self.getMatches()
+        x = list(water_reference.HORARIOS)
 
-        plt.suptitle(title, x=0.07, y=0.98, ha='left', fontsize=15)
+        # As horas sem medição ficam em branco no gráfico.
+        tipico = np.where(semelhantes['tipicoValidos'], semelhantes['tipico'], np.nan)
+        perfis = [('Dia típico medido', x, tipico.tolist())]
 
-        x = []
-        # Define a formatacao do eixo Y.
-        if isSummary:
-            for date in data[0]:
-                x.append(datetime.strptime(date, '%d/%m/%Y'))
+        locais = water_reference.getDatabase().getProfiles(semelhantes['tipicoIds'].tolist())
+        for (nome, perfil), distancia in zip(locais, semelhantes['tipicoDistancias'].tolist()):
+            perfis.append((f'{nome} (distância {distancia:.3f})', x, (perfil / perfil.mean()).tolist()))
 
-            fmt = mdates.DateFormatter('%d/%m/%Y')
-            y = self.consumption
+        charts.showChart(self, 'semelhantes', 'Perfis de referência semelhantes ao dia típico', figures.getWaterProfilesFigure, perfis)
 
-        else:
-            date = data['date']
-            for hour in data['xyValues'][0]:
-                x.append(datetime.strptime(date + hour, '%d/%m/%Y%H:%M'))
+    def getMatchNames(self, index):
+        ''' Retorna os nomes dos perfis de referência mais próximos do dia ``index``, separados por vírgula. '''
 
-            fmt = mdates.DateFormatter('%H:%M')
-            y = data['xyValues'][1]
+        semelhantes = self.getMatches()
+        database = water_reference.getDatabase()
 
-        plt.plot(x, y, '-r', lw=2, label='Consumo')
-        ax.xaxis.set_major_formatter(fmt)  # Aplica a formatacao.
-        fig.autofmt_xdate()  # Aplica a 'organizacao'.
+        return ', '.join(database.getItem(id)[0] for id in semelhantes['ids'][index].tolist() if id >= 0)
 
-        # remove spines
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
+    def OnSummary(self, event):
+        """ Chamada quando o usuário clica no botão para desenhar o gráfico geral. """
 
-        # estiliza o grid
-        ax.set_axisbelow(True)
-        ax.yaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
-        ax.xaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
+        charts.showChart(self, 'resumo', 'Gráfico Geral de Consumo', figures.getWaterSummaryFigure, self.data)
 
-        self._draw_graph_info(ax, fig, y, isBigger, isSummary, index)
-        if self.isSaveToDisk:
-            plt.savefig(self.path, bbox_inches='tight')
-        else:
-            plt.show()
+    def _plot_graph(self, index, isBigger):
+        """
+        Plota o gráfico do dia ``index``. A janela do gráfico do dia é a mesma para todos os dias e só as linhas e os textos são atualizados.
 
-    def _draw_graph_info(self, ax, fig, y_list, isBigger, isSummary, index):
-        """ Imprime informacoes no gráfico.
+        Parâmetros
+        ----------
+        ``isBigger`` : indica se o dia é o de maior consumo, portanto fatores KD e de demanda são escritos.
+        """
+
+        minutos, valores = self.data.getDay(index)
+        x = self.data.getDayStarts()[index] + minutos.astype('timedelta64[m]')
+        title = self.data.getDate(index)
+
+        charts.showChart(self, 'dia', f'Consumo de {title}', figures.getDayFigure, x, valores, title, self._draw_graph_info(valores, isBigger, index))
+
+    def _draw_graph_info(self, y, isBigger, index):
+        """ Retorna as informacoes escritas no gráfico.
         - Vazao maxima, media e minima,
         - Volume medio diario de consumo
         - Fator K2
         - Fator de Demanda
-        - Imprime a linha de vazao media.
+        - Horas e consumo acima e abaixo da vazão média, e consumo na ponta e fora da ponta.
         """
 
         # Calculo dos parametros.
-        vazao_maxima = "{:.2f}".format(max(y_list))
-        vazao_media = float("{:.2f}".format(sum(y_list) / len(y_list)))
-        vazao_minima = "{:.2f}".format(min(y_list))
-        volume_diario = "{:.2f}".format(sum(y_list))
+        vazao_maxima = "{:.2f}".format(y.max())
+        vazao_media = float("{:.2f}".format(y.mean()))
+        vazao_minima = "{:.2f}".format(y.min())
+        volume_diario = "{:.2f}".format(y.sum())
         fator_k2 = "{:.2f}".format(self.k2)
         fator_demanda = "{:.2f}".format(dp.get_fd(float(fator_k2)))
 
         # Contrucao da string com os resultados.
-        if isSummary:
-            string = f"Vazão Máxima: {vazao_maxima} | Vazão Média: {vazao_media} | Vazão Mínima: {vazao_minima}"
-
+        if isBigger:
+            string = f"Vazão Máxima: {vazao_maxima} | Vazão Média: {vazao_media} | Vazão Mínima: {vazao_minima} | Volume Diário: {volume_diario} | Fator K2: {fator_k2} | Fator de Demanda: {fator_demanda}"
         else:
-            if isBigger:
-                string = f"Vazão Máxima: {vazao_maxima} | Vazão Média: {vazao_media} | Vazão Mínima: {vazao_minima} | Volume Diário: {volume_diario} | Fator K2: {fator_k2} | Fator de Demanda: {fator_demanda}"
-            else:
-                string = f"Vazão Máxima: {vazao_maxima} | Vazão Média: {vazao_media} | Vazão Mínima: {vazao_minima} | Volume Diário: {volume_diario}"
+            string = f"Vazão Máxima: {vazao_maxima} | Vazão Média: {vazao_media} | Vazão Mínima: {vazao_minima} | Volume Diário: {volume_diario}"
 
-            infos = self.getUsageHours(self.data[index], vazao_media)
-            string += f"\nHoras acima da vazão média: {infos[0]}, com consumo de {infos[6]} | Horas abaixo da vazão média: {infos[1]}, com consumo de {infos[7]}\n"
-            string += f"Volume consumido no horário -> Ponta: {infos[2]} ({infos[3]}%), Fora da Ponta: {infos[4]} ({infos[5]}%)"
+        infos = self.getUsageHours(index)
+        string += f"\nHoras acima da vazão média: {infos[0]}, com consumo de {infos[6]} | Horas abaixo da vazão média: {infos[1]}, com consumo de {infos[7]}\n"
+        string += f"Volume consumido no horário -> Ponta: {infos[2]} ({infos[3]}%), Fora da Ponta: {infos[4]} ({infos[5]}%)"
 
-            # Adicionando o eixo da vazao media.
-            ax.axhline(y=vazao_media, color='g', label='Vazão Média')
+        # Os perfis semelhantes só são escritos depois que a comparação foi pedida pelo botão.
+        if self.semelhantes is not None:
+            string += f"\nPerfis de referência semelhantes: {self.getMatchNames(index)}"
 
-        # Adicionando o texto ao gráfico.
-        plt.title(string, loc='left', fontsize=10)
-        ax.legend(loc='best')
+        return string
 
-        plt.tight_layout()
-
-    def getUsageHours(self, xyValues, vazao_media):
-        ''' Funcao recebe ``xyValues``, que e um list com os valores X e Y do gráfico, respectivamente e retorna,
-        em uma tupla, alguns indicadores do dia.
+    def getUsageHours(self, index):
+        ''' Retorna, em uma tupla de strings, alguns indicadores do dia ``index``, lidos da tabela de indicadores diários.
 
          Exemplo: (hoursAbove, hoursBelow, pontaConsumo, pontaPercent, foraPontaConsumo, foraPontaPercent, consumoAboveVazao, consumoBelowVazao) '''
 
-        above = 0
-        below = 0
-        consumoTotal = 0
-        pontaConsumo = 0
-        foraPontaConsumo = 0
-        consumoAboveVazao = 0
-        consumoBelowVazao = 0
-
-        lastTime = xyValues['xyValues'][0][0]
-
-        for i in range(0, len(xyValues['xyValues'][1])):
-            value = xyValues['xyValues'][1][i]
-            now = xyValues['xyValues'][0][i]
-            h, m = now.split(':')
-
-            consumoTotal += value
-
-            if int(h) >= 18 and int(h) <= 20:
-                pontaConsumo += value
-            else:
-                foraPontaConsumo += value
-
-            if value >= vazao_media:
-                consumoAboveVazao += value
-            else:
-                consumoBelowVazao += value
-
-            if value >= vazao_media:
-                above += dp.getTimesDifference(lastTime, now)
-            else:
-                below += dp.getTimesDifference(lastTime, now)
-
-            lastTime = xyValues['xyValues'][0][i]
+        dia = {name: float(self.indicadores[name][index]) for name in indicators.COLUNAS[1:-1]}
 
         # transformação dos floats em strings com definição das casas decimais.
-        outAbove = '{:.1f}'.format(above)
-        outBelow = '{:.1f}'.format(below)
-        outPontaConsumo = '{:.2f}'.format(pontaConsumo)
-        outPontaPercent = '{:.1f}'.format((pontaConsumo / consumoTotal) * 100)
-        outForaPontaConsumo = '{:.2f}'.format(foraPontaConsumo)
-        outForaPontaPercent = '{:.1f}'.format((foraPontaConsumo / consumoTotal) * 100)
-        outConsumoAboveVazao = '{:.2f}'.format(consumoAboveVazao)
-        outConsumoBelowVazao = '{:.2f}'.format(consumoBelowVazao)
-
-        return (outAbove, outBelow, outPontaConsumo, outPontaPercent, outForaPontaConsumo, outForaPontaPercent, outConsumoAboveVazao, outConsumoBelowVazao)
\ No newline at end of file
+        outAbove = '{:.1f}'.format(dia['horasAcima'])
+        outBelow = '{:.1f}'.format(dia['horasAbaixo'])
+        outPontaConsumo = '{:.2f}'.format(dia['consumoPonta'])
+        outPontaPercent = '{:.1f}'.format(dia['percentualPonta'])
+        outForaPontaConsumo = '{:.2f}'.format(dia['consumoForaPonta'])
+        outForaPontaPercent = '{:.1f}'.format(dia['percentualForaPonta'])
+        outConsumoAboveVazao = '{:.2f}'.format(dia['consumoAcima'])
+        outConsumoBelowVazao = '{:.2f}'.format(dia['consumoAbaixo'])
+
+        return (outAbove, outBelow, outPontaConsumo, outPontaPercent, outForaPontaConsumo, outForaPontaPercent, outConsumoAboveVazao, outConsumoBelowVazao)
@@ -7,26 +7,29 @@ import os
 import wx
 import wx.lib.scrolledpanel as scrolled
 import wx.grid as gridlib
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime, timedelta
 import app.global_variables as gv
 import app.data_processing as dp
 import app.file_manager as fm
+import app.project as project
+import app.startup as startup
 import app.windows.conversor as conversor
 import app.windows.database as database
 import app.windows.water_database as water_database
 
+# Módulos científicos e de gráficos, carregados apenas na primeira simulação ou gráfico.
+calculations = startup.lazyImport('app.calculations')
+figures = startup.lazyImport('app.figures')
+charts = startup.lazyImport('app.windows.charts')
+tax_window = startup.lazyImport('app.windows.tax_window')
+
 class HydricBalance(wx.Frame):
     """ Cria a janela de `Balanço Hídrico de Reservatório`. """
 
-    def __init__(self, parent, isToSave=False, path=''):
+    def __init__(self, parent):
         style = wx.DEFAULT_FRAME_STYLE & (~wx.MAXIMIZE_BOX) & (~wx.RESIZE_BORDER)
         super().__init__(parent, style=style)
 
         self.parent = parent
-        self.isToSave = isToSave
-        self.path = path
         self.WINDOW_NAME = 'Balanço Hídrico de Reservatório'
 
         self.menu = wx.MenuBar()
@@ -47,8 +50,9 @@ class HydricBalance(wx.Frame):
         self.opt1Curva = []
         self.opt2Curva = []
 
-        self.data1 = []
-        self.data2 = []
+        # Última simulação, no formato de `calculations.simulateHydric()`.
+        self.data1 = {}
+        self.data2 = {}
 
         self.conversorWindow = None
         self.waterWindow = None
@@ -217,7 +221,12 @@ class HydricBalance(wx.Frame):
             volumeBtn = wx.Button(self, option + 1000, 'Desenhar Gráfico', size=(162, 23))
             volumeBtn.Bind(wx.EVT_BUTTON, self.OnVolume)
 
+            costsBtn = wx.Button(self, option + 1000, 'Custos da Operação', size=(162, 23))
+            costsBtn.SetToolTip('Consumo de energia e custos das tarifas com as horas de bombeamento simuladas')
+            costsBtn.Bind(wx.EVT_BUTTON, self.OnCosts)
+
             sizer.Add(volumeBtn, flag=wx.ALIGN_CENTER)
+            sizer.Add(costsBtn, flag=wx.ALIGN_CENTER | wx.TOP, border=5)
 
             if option == 0:
                 self.leftBox.Add(sizer, flag=wx.ALL | wx.EXPAND, border=10)
@@ -417,9 +426,11 @@ class HydricBalance(wx.Frame):
         if option == 0:
             curList = self.opt1Fields
             curvaList = self.opt1Curva
+            waterData = self.isUsingWaterData1
         else:
             curList = self.opt2Fields
             curvaList = self.opt2Curva
+            waterData = self.isUsingWaterData2
 
         isAllEmpty = True
         for i in range(0, 7):
@@ -437,7 +448,7 @@ class HydricBalance(wx.Frame):
                 else:
                     dp.colorField(curList[i][0], False)
 
-        if curvaList:
+        if curvaList or waterData[0]:
             isAllEmpty = False
         else:
             dp.colorField(curList[3], False)
@@ -505,10 +516,8 @@ class HydricBalance(wx.Frame):
                     elif j == 3:
                         words = gv.fileLines[index].strip().split()
                         if words[0] == '-1':
-                            temp = fm.copyWaterFileDataToList()
-                            temp = dp.getTableReadyData(temp)
+                            # Os dados de consumo de água são lidos do arquivo apenas na simulação.
                             curvas[i].clear()
-                            curvas[i].extend(temp)
                             opts[i][j].SetLabel('Salvo: Cons. Água')
 
                             waterData[i][0] = True
@@ -541,24 +550,13 @@ class HydricBalance(wx.Frame):
         ''' Salva as informações no arquivo. '''
 
         if not '#hydric_start' in gv.fileStartIndices.keys():
-            gv.fileStartIndices['#hydric_start'] = len(gv.fileLines) + 1
-            gv.fileLines.append('#hydric_start\n')
-
-            for _ in range(0, 14):   # Espaço para os dois formulários.
-                gv.fileLines.append('\n')
-
-            gv.fileLines.append('#hydric_end\n')
-            gv.fileStartIndices['#hydric_end'] = len(gv.fileLines) - 1
+            fm.replaceSection('hydric', ['\n'] * 14)   # Espaço para os dois formulários.
 
         self.flushData()
 
-        # Fechamos o arquivo e o apagamos totalmente.
-        gv.opened_file.close()
-        gv.opened_file = open(gv.file_path, 'w')
-
-        # Reescrevemos do zero.
-        gv.opened_file.write(''.join(gv.fileLines))
+        # Fechamos o arquivo e gravamos apenas esta seção. O resto do arquivo é copiado sem ser reescrito.
         gv.opened_file.close()
+        project.saveSection(gv.file_path, 'hydric', fm.getSectionLines('hydric'))
 
         # Reabrimos em modo de leitura.
         gv.opened_file = open(gv.file_path, 'r')
@@ -655,8 +653,9 @@ class HydricBalance(wx.Frame):
             ('Soma da vazão das bombas', 'm³/s', str(soma_vazao)),
         ]
 
-    def gatherData(self, ID):
-        ''' Prepara os dados para exibição. '''
+    def simulate(self, ID):
+        ''' Simula o formulário `ID` e guarda o resultado em `self.data1`. Avisa se a demanda não foi atendida.
+        Retorna False se a simulação não pôde ser feita. '''
 
         # [0] Volume útil (m³)
         # [1] Volume mínimo (m³)
@@ -666,292 +665,101 @@ class HydricBalance(wx.Frame):
         # [5] Volume inicial (m³)
         # [6] Número de bombas
 
-        vazoes = [self.bombsVazao1, self.bombsVazao2]
+        opts = [self.opt1Fields, self.opt2Fields]
+        curvas = [self.opt1Curva, self.opt2Curva]
         waterData = [self.isUsingWaterData1, self.isUsingWaterData2]
 
-        area = None
-        if ID == 0:
-            volMinimo = float(self.opt1Fields[1].GetValue())
-            volMaximo = float(self.opt1Fields[2].GetValue())
-            diasSim = int(self.opt1Fields[4].GetValue())
-            volInicial = float(self.opt1Fields[5].GetValue())
-        else:
-            # Deveríamos mudar os nomes das variáveis para areaMinima, areaInicial, etc.
-            # Vamos deixar assim pra reduzir a necessidade de criar mais linhas de código.
-            area = float(self.opt2Fields[0].GetValue())
-            volMinimo = float(self.opt2Fields[1].GetValue()) / area
-            volMaximo = float(self.opt2Fields[2].GetValue()) / area
-            diasSim = int(self.opt2Fields[4].GetValue())
-            volInicial = float(self.opt2Fields[5].GetValue()) / area
-
-        vazoesSum = 0
-        for field in vazoes[ID]:
-            vazoesSum += float(field.GetValue())
-
-        if waterData[ID][0]:
-            minsBelowZero = self.calculateFromWaterData(ID, volInicial, volMaximo, volMinimo, vazoesSum, diasSim, area)
-        else:
-            minsBelowZero = self.calculateData(ID, volInicial, volMaximo, volMinimo, vazoesSum, diasSim, area)
-
-        self.plotGraphVolume(ID, volMaximo, minsBelowZero)
+        # Mesmo formato de `project.getHydricData()`. Na opção 2, os campos são níveis e o primeiro é a área da base.
+        formulario = {
+            'area': float(opts[ID][0].GetValue()) if ID == 1 else None,
+            'minimo': float(opts[ID][1].GetValue()),
+            'maximo': float(opts[ID][2].GetValue()),
+            'curva': None if waterData[ID][0] else curvas[ID],
+            'diasSim': int(opts[ID][4].GetValue()),
+            'inicial': float(opts[ID][5].GetValue()),
+            'vazoes': [float(value) for value in self.getVazaoValues(ID)]
+        }
 
-    def OnVolume(self, event):
-        ''' Chamada quando o usuário clica no botão para desenhar o gráfico de volume instantâneo. '''
-
-        ID = event.GetEventObject().Id
-        ID -= 1000
-
-        if self.isFormEmpty(ID):
-            dlg = wx.MessageDialog(self, 'Por favor, preencha os campos antes de continuar.', 'Formulário vazio', wx.ICON_ERROR)
-            dlg.ShowModal()
-            return
-
-        if self.checkErrors(ID):
-            dlg = wx.MessageDialog(self, 'Por favor, corrige os erros antes de continuar.', 'Erros encontrados', wx.ICON_ERROR)
+        try:
+            agua = fm.getWaterSeries() if waterData[ID][0] else None
+            self.data1 = calculations.simulateHydric(formulario, agua)
+        except ValueError as e:
+            dlg = wx.MessageDialog(self, f'{e}', 'Erro na simulação', wx.ICON_ERROR)
             dlg.ShowModal()
-            return
-
-        self.gatherData(ID)
-
-    def calculateFromWaterData(self, ID, volInicial, volMaximo, volMinimo, vazoesSum, diasSim, area=None):
-        ''' Preenche a lista de dicionários pronta para o plot do gráfico a partir dos dados de consumo de água. (self.data1).
-        Ex: [{'time': datetime.datetime(2021, 7, 19, 0, 0), 'volume': 1809.7759602911945, 'liga': 1}] '''
-
-        data = self.opt1Curva
-        self.data1.clear()
-        days = len(data)
-        isRepeating = False
-        date = ''
-        minutos = []
-        i = 0
-
-        while diasSim != 0:
-            x = data[i]['xyValues'][0]
-            y = data[i]['xyValues'][1]
-            interval = int(dp.getTimesDifference(x[0], x[1]) * 60)
-
-            if not isRepeating:
-                date = data[i]['date']
-                now = datetime.strptime(f"{date} 00:00", '%d/%m/%Y %H:%M')
-
-            for j in range(0, len(y)):
-                valueDiv = y[j] / interval
-
-                for _ in range(0, interval):
-                    dic = {}
-                    dic['time'] = now
-                    minutos.append(valueDiv)
-                    self.data1.append(dic)
-
-                    now += timedelta(minutes=1)
-
-            i += 1
-            diasSim -= 1
-
-            # Se o usuário colocar mais dias de simulação que existe nos dados, o bool abaixo
-            # e a última adição ao now, usando o timedelta, fez pular para o dia seguinte.
-            # Agora, com isRepeating = True, não vamos ficar repetindo datas.
-            if i == days:
-                i = 0
-                isRepeating = True
-
-        ### Segunda parte ###
-
-        LIGA = []
-        VAI = []
-        wereBelowZero = False
-        minutesBelowZero = 0
-
-        # Calcula a evolução do reservatório e da bomba
-        for i in range(0, len(minutos)):
-            if i == 0:
-                if (volInicial - minutos[i]) >= volMinimo and (volInicial - minutos[i]) <= volMaximo:
-                    Qbomba_total = vazoesSum * 0
-                    LIGA.append(0)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + volInicial)
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + volInicial) / area )
-
-                if (volInicial - minutos[i]) < volMinimo:
-                    Qbomba_total = vazoesSum * 60
-                    LIGA.append(1)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + volInicial)
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + volInicial) / area )
-
-            else:
-                if ((VAI[i - 1] - minutos[i] < volMinimo) and (LIGA[i - 1] == 0)) or ((LIGA[i - 1] == 1) and (VAI[i - 1] - minutos[i] < volMaximo)):
-                    Qbomba_total = vazoesSum * 60
-                    LIGA.append(1)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + VAI[i - 1])
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + VAI[i - 1]) / area)
-
-                if ((VAI[i - 1] - minutos[i] > volMinimo) and (LIGA[i - 1] == 0)) or (LIGA[i - 1] == 1 and (VAI[i - 1] - minutos[i] > volMaximo)):
-                    Qbomba_total = vazoesSum * 0
-                    LIGA.append(0)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + VAI[i - 1])
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + VAI[i - 1]) / area)
+            return False
 
-                if VAI[i] < 0:
-                    VAI[i] = 0
-                    minutesBelowZero += 1
-                    wereBelowZero = True
+        minutesBelowZero = self.data1['minutosVazio']
 
-        if wereBelowZero and not self.isToSave:
+        if minutesBelowZero > 0:
             dlg = wx.MessageDialog(self, f'A vazão bombeada não conseguiu atender a demanda do consumo de água por {(minutesBelowZero / 60):.1f} horas.',
             'Vazão insuficiente', wx.ICON_INFORMATION)
             dlg.ShowModal()
 
-        # Formata os dados para a plot dos gráficos.
-        for i in range(0, len(minutos)):
-            self.data1[i]['volume'] = VAI[i]
-            value = LIGA[i]
-            if value == 0:
-                self.data1[i]['liga'] = volMinimo
-            else:
-                self.data1[i]['liga'] = volMaximo
+        return True
 
-        return minutesBelowZero
+    def gatherData(self, ID):
+        ''' Prepara os dados para exibição. '''
 
-    def calculateData(self, ID, volInicial, volMaximo, volMinimo, vazoesSum, diasSim, area):
-        ''' Preenche a lista de dicionários pronta para o plot do gráfico (self.data1).
-        Ex: [{'time': datetime.datetime(1900, 1, 1, 0, 0), 'volume': 1809.7759602911945, 'liga': 1}] '''
+        if self.simulate(ID):
+            self.plotGraphVolume(ID)
 
-        minutos = []
-        LIGA = []
-        VAI = []
+    def isFormReady(self, ID):
+        ''' Retorna True se o formulário `ID` estiver preenchido e sem erros. Caso contrário, avisa o usuário. '''
 
-        for value in self.opt1Curva:
-            valueDiv = value / 60
-            for _ in range(0, 60):
-                minutos.append(valueDiv)
+        if self.isFormEmpty(ID):
+            dlg = wx.MessageDialog(self, 'Por favor, preencha os campos antes de continuar.', 'Formulário vazio', wx.ICON_ERROR)
+            dlg.ShowModal()
+            return False
 
-        minutos *= diasSim
+        if self.checkErrors(ID):
+            dlg = wx.MessageDialog(self, 'Por favor, corrige os erros antes de continuar.', 'Erros encontrados', wx.ICON_ERROR)
+            dlg.ShowModal()
+            return False
 
-        wereBelowZero = False
-        minutesBelowZero = 0
+        return True
 
-        # Calcula a evolução do reservatório e da bomba
-        for i in range(0, len(minutos)):
-            if i == 0:
-                if (volInicial - minutos[i]) >= volMinimo and (volInicial - minutos[i]) <= volMaximo:
-                    Qbomba_total = vazoesSum * 0
-                    LIGA.append(0)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + volInicial)
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + volInicial) / area )
+    def OnVolume(self, event):
+        ''' Chamada quando o usuário clica no botão para desenhar o gráfico de volume instantâneo. '''
 
-                if (volInicial - minutos[i]) < volMinimo:
-                    Qbomba_total = vazoesSum * 60
-                    LIGA.append(1)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + volInicial)
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + volInicial) / area )
+        ID = event.GetEventObject().Id
+        ID -= 1000
 
-            else:
-                if ((VAI[i - 1] - minutos[i] < volMinimo) and (LIGA[i - 1] == 0)) or ((LIGA[i - 1] == 1) and (VAI[i - 1] - minutos[i] < volMaximo)):
-                    Qbomba_total = vazoesSum * 60
-                    LIGA.append(1)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + VAI[i - 1])
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + VAI[i - 1]) / area)
+        if self.isFormReady(ID):
+            self.gatherData(ID)
 
-                if ((VAI[i - 1] - minutos[i] > volMinimo) and (LIGA[i - 1] == 0)) or (LIGA[i - 1] == 1 and (VAI[i - 1] - minutos[i] > volMaximo)):
-                    Qbomba_total = vazoesSum * 0
-                    LIGA.append(0)
-                    if ID == 0:
-                        VAI.append(Qbomba_total - minutos[i] + VAI[i - 1])
-                    else:
-                        VAI.append( (Qbomba_total - minutos[i] + VAI[i - 1]) / area)
+    def OnCosts(self, event):
+        ''' Chamada quando o usuário clica no botão de custos. Calcula o consumo de energia e os custos das tarifas com as
+        horas de bombeamento na ponta e fora da ponta da simulação, no lugar das horas dos Parâmetros do Sistema. '''
 
-                if VAI[i] < 0:
-                    VAI[i] = 0
-                    minutesBelowZero += 1
-                    wereBelowZero = True
+        ID = event.GetEventObject().Id
+        ID -= 1000
 
-        if wereBelowZero and not self.isToSave:
-            dlg = wx.MessageDialog(self, f'A vazão bombeada não conseguiu atender a demanda do consumo de água por {(minutesBelowZero / 60):.1f} horas.',
-            'Vazão insuficiente', wx.ICON_INFORMATION)
+        if not self.isFormReady(ID):
+            return
+
+        parametros = project.getParameters(gv.fileLines, gv.fileStartIndices) if gv.opened_file else None
+        if not parametros:
+            dlg = wx.MessageDialog(self, 'Por favor, preencha e salve os Parâmetros do Sistema antes de calcular os custos.',
+            'Parâmetros não encontrados', wx.ICON_ERROR)
             dlg.ShowModal()
+            return
 
-        # Formata os dados para a plot dos gráficos.
-        now = datetime.strptime("1 00:00", '%d %H:%M')
-        self.data1.clear()
-        for i in range(0, len(minutos)):
-            dic = {}
-
-            dic['time'] = now
-            dic['volume'] = VAI[i]
-            value = LIGA[i]
-            if value == 0:
-                dic['liga'] = volMinimo
-            else:
-                dic['liga'] = volMaximo
+        if not self.simulate(ID):
+            return
 
-            self.data1.append(dic)
-            now += timedelta(minutes=1)
+        if not self.data1['trocas'][:, 1].any():
+            dlg = wx.MessageDialog(self, 'As bombas não foram ligadas durante a simulação.', 'Sem bombeamento', wx.ICON_INFORMATION)
+            dlg.ShowModal()
+            return
 
-        return minutesBelowZero
+        resultado = calculations.getScheduleCosts(parametros, self.data1, project.getExpenses(gv.fileLines, gv.fileStartIndices))
+        window = tax_window.ScheduleResultWindow(self, f'Custos da Operação Simulada - Opção {ID + 1}', resultado)
+        window.Show()
 
-    def plotGraphVolume(self, ID, volMaximo, minsBelowZero):
+    def plotGraphVolume(self, ID):
         ''' Plota o gráfico da análise de volume. '''
 
-        x = []
-        y = []
-        yBomb = []
-        for dic in self.data1:
-            x.append(dic['time'])
-            y.append(dic['volume'])
-            yBomb.append(dic['liga'])
-
-        fig, ax = plt.subplots(figsize=(11, 6))
-        ax.xaxis.set_tick_params(rotation=30, labelsize=10)
-
-        # Informacoes do gráfico.
-        if minsBelowZero > 0:
-            plt.title(f'Quantidade de horas com reservatório vazio: {(minsBelowZero / 60):.1f}', loc='left', fontsize=10)
-
-        plt.suptitle('Análise do volume do reservatório', x=0.07, y=0.98, ha='left', fontsize=15)
-        ax.set_xlabel('Dia')
-
-        if ID == 0:
-            yLabel = 'Volume (m³)'
-        else:
-            yLabel = 'Nível (m)'
-        ax.set_ylabel(yLabel)
-
-        # estiliza o grid
-        ax.set_axisbelow(True)
-        ax.yaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
-        ax.xaxis.grid(color='gray', linestyle='dashed', alpha=0.2)
-
-        # remove spines
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-
-        fmt = mdates.DateFormatter('%d/%m')
-        ax.xaxis.set_major_formatter(fmt)  # Aplica a formatacao.
-        fig.autofmt_xdate()  # Aplica a 'organizacao'.
-
-        plt.plot(x, y, label='Nível')
-        ax.axhline(y=volMaximo, color='grey', alpha=0.4, label='Volume Máximo')
-        ax.plot(x, yBomb, '--', color='red', alpha=0.4, label='Funcionamento da bomba')
-        plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), fancybox=True, shadow=True, ncol=3)
-        plt.tight_layout()
-
-        if self.isToSave:
-            plt.savefig(f'{self.path}\\opt{ID}.png', bbox_inches='tight')
-        else:
-            plt.show()
+        charts.showChart(self, f'reservatorio{ID}', 'Análise do volume do reservatório', figures.getReservoirFigure, ID, self.data1)
 
     def OnBombs(self, event):
         ''' Chamada quando é digitado qualquer coisa nos campos de número de bombas. '''
@@ -1423,7 +1231,7 @@ class HydricGrid(wx.Frame):
         return isOK
 
     def setWaterData(self, ID):
-        ''' Pega os dados de consumo de água no arquivo e atribui as variáveis data1 ou data2. '''
+        ''' Limpa a curva digitada da opção `ID`. Com os dados de consumo de água, a simulação os lê do arquivo (`fm.getWaterSeries()`). '''
 
         if ID == 0:
             data = self.parent.opt1Curva
@@ -1431,9 +1239,6 @@ class HydricGrid(wx.Frame):
             data = self.parent.opt2Curva
 
         data.clear()
-        dics = fm.copyWaterFileDataToList()
-        dics = dp.getTableReadyData(dics)
-        data = dics[:]
 
     def OnDatabase(self, event):
         ''' Abre o database direto em Consumo de Água. '''
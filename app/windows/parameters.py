@@ -9,6 +9,7 @@ import app.windows.database as database
 import app.global_variables as gv
 import app.file_manager as fm
 import app.data_processing as dp
+import app.project as project
 import app.global_variables as gv
 import app.windows.conversor as conversor
 import app.windows.tooltip_frame as tf
@@ -434,7 +435,6 @@ class ParametersWindow(wx.Frame):
         # Se a ID do Modal for OK, significa que o usuário escolheu um arquivo.
         if dialog.ShowModal() == wx.ID_OK:
             fm.openAndUpdateFileVariables(dialog)
-            self.data = fm.copyWaterFileDataToList()
 
             if fm.isFileIntegrityOK():
                 self.grabParametersDataFromFile()
@@ -567,33 +567,14 @@ class ParametersWindow(wx.Frame):
     def writeParametersDataToFile(self):
         """ Salvas as variaveis para o arquivo de texto. """
 
-        count = 0
+        lines = [f'{self.textBoxesRefs[i].GetValue().strip()}\n' for i in range(0, 7)]
 
-        # Os os dados de parametros ja existirem, apenas o substituimos. Se nao, colocamos no final usando .append().
-        if '#parameters_start' in gv.fileStartIndices.keys():
-            start = gv.fileStartIndices['#parameters_start']
-
-            for i in range(start, start + 7):
-                gv.fileLines[i] = f'{self.textBoxesRefs[count].GetValue().strip()}\n'
-                count += 1
-
-        else:
-            gv.fileLines.append('#parameters_start\n')
-            gv.fileStartIndices['#parameters_start'] = len(gv.fileLines)
+        # Os os dados de parametros ja existirem, apenas o substituimos. Se nao, colocamos no final.
+        fm.replaceSection('parameters', lines)
 
-            for i in range(0, 7):
-                gv.fileLines.append(f'{self.textBoxesRefs[count].GetValue().strip()}\n')
-                count += 1
-
-            gv.fileLines.append('#parameters_end\n')
-
-        # Fechamos o arquivo e o apagamos totalmente.
-        gv.opened_file.close()
-        gv.opened_file = open(gv.file_path, 'w')
-
-        # Reescrevemos do zero.
-        gv.opened_file.write(''.join(gv.fileLines))
+        # Fechamos o arquivo e gravamos apenas esta seção. O resto do arquivo é copiado sem ser reescrito.
         gv.opened_file.close()
+        project.saveSection(gv.file_path, 'parameters', lines)
 
         # Reabrimos em modo de leitura.
         gv.opened_file = open(gv.file_path, 'r')
@@ -712,13 +693,6 @@ class ParametersWindow(wx.Frame):
             self.databaseWindow = database.Database(self)
             self.databaseWindow.Show()
 
-    def SaveAllGraphs(self, path):
-        ''' Salva todos os gráficos. '''
-
-        self.pumpRef.plotGraph(True, f'{path}\\pump.png')
-        self.systemRef.plotGraph(None, True, f'{path}\\system.png')
-        self.operationRef.plotGraph(True, f'{path}\\operation.png')
-
     def OnPump(self, event):
         ''' Chamada quando o usuário clicar no botão ``Curva da Bomba`` na parte inferior da janela. '''
 
@@ -6,12 +6,16 @@ parameters_windows.py
 import wx
 import wx.grid as gridlib
 import numpy as np
-from scipy.optimize import curve_fit
-from intersect import intersection
-import matplotlib.pyplot as plt
 import app.global_variables as gv
 import app.file_manager as fm
 import app.data_processing as dp
+import app.project as project
+import app.startup as startup
+
+# Módulos científicos e de gráficos, carregados apenas no primeiro cálculo ou gráfico.
+calculations = startup.lazyImport('app.calculations')
+figures = startup.lazyImport('app.figures')
+charts = startup.lazyImport('app.windows.charts')
 
 class PumpWindow(wx.Panel):
     ''' Classe responsavel pela janela de `Curva da Bomba`. '''
@@ -297,34 +301,19 @@ class PumpWindow(wx.Panel):
     def writePumpDataToFile(self):
         ''' Escreve as modificações da tabela no arquivo. '''
 
-        before = []
-
-        # Sempre vamos colocar nossos dados no início do arquivo. Se dados de água ja existirem, vamos apagá-lo totalmente e reescrever os de agora.
-        # Se não, vamos colocar esses dados no início e todo o resto depois.
-        if '#parameters_pump_start' in gv.fileStartIndices.keys():
-            before = gv.fileLines[ : gv.fileStartIndices['#parameters_pump_start'] - 1]
-            after = gv.fileLines[gv.fileStartIndices['#parameters_pump_end'] + 1 : ] # O índice de fim aponta exatamente para o indicador.
-        else:
-            after = gv.fileLines
-
-        outText = before
-        outText += ['#parameters_pump_start\n']
+        lines = []
 
         # Se a lista não estiver vazia, vamos escrever os dados.
         if self.q:
             for line in zip(self.q, self.h):
-                outText.append(f"{line[0]} {line[1]}\n")
-
-        outText += '#parameters_pump_end\n'
-        outText += after
+                lines.append(f"{line[0]} {line[1]}\n")
 
-        # Fechamos o arquivo e o apagamos totalmente.
-        gv.opened_file.close()
-        gv.opened_file = open(gv.file_path, 'w')
+        # Se os dados ja existirem, apenas os substituimos. Se não, vamos colocá-los no início do arquivo.
+        fm.replaceSection('parameters_pump', lines, atStart=True)
 
-        # Reescrevemos do zero.
-        gv.opened_file.write(''.join(outText))
+        # Fechamos o arquivo e gravamos apenas esta seção. O resto do arquivo é copiado sem ser reescrito.
         gv.opened_file.close()
+        project.saveSection(gv.file_path, 'parameters_pump', lines, atStart=True)
 
         # Reabrimos em modo de leitura.
         gv.opened_file = open(gv.file_path, 'r')
@@ -429,53 +418,11 @@ class PumpWindow(wx.Panel):
         self.valeur_min = np.array(self.h)
         self.P2 = np.polyfit(self.valeur_T, self.valeur_min, 2)
 
-    def plotGraph(self, isToSave=False, path=''):
+    def plotGraph(self):
         ''' Desenha o gráfico. '''
 
-        if isToSave:
-            self.checkAndTransferToLists()
-
         self.calcultaP2()
-        p = np.poly1d(self.P2)
-        yhat = p(self.valeur_T)
-        ybar = sum(self.valeur_min) / len(self.valeur_min)
-        SST = sum((self.valeur_min - ybar) ** 2)
-        SSreg = sum((yhat - ybar) ** 2)
-
-        R2 = SSreg/SST
-
-        fig, ax = plt.subplots(figsize=(11, 6))
-        plt.suptitle('Curva da Bomba', x=0.06, y=0.98, ha='left', fontsize=15)
-
-        # Informacoes do gráfico.
-        ax.set_xlabel('Vazão (m³/s)')
-        ax.set_ylabel('Altura Manométrica (m)')
-
-        # remove spines
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-
-        a = "{:.2f}".format(self.P2[0])
-        b = "{:.2f}".format(self.P2[1])
-        c = "{:.2f}".format(self.P2[2])
-        R2 = "{:.2f}".format(R2)
-
-        eq = f'f(x) = {a}x² + {b}x + {c}\n'
-        eq += f'R²: {R2}'
-        plt.title(eq, loc='left', fontsize=10)
-
-        arr = dp.smoothGraph(np.array(self.valeur_T), np.array(self.valeur_min))
-
-        plt.plot(arr[0], arr[1], '-', label='Curva da bomba', color='b')
-        plt.plot(self.valeur_T, np.polyval(self.P2, self.valeur_T), 'o', label='Ponto [Q, H]')
-        plt.legend(loc='best')
-
-        plt.tight_layout()
-
-        if isToSave:
-            plt.savefig(path, bbox_inches='tight')
-        else:
-            plt.show()
+        charts.showChart(self, 'bomba', 'Curva da Bomba', figures.getPumpFigure, self.q, self.h)
 
 
 class SystemWindow(wx.Panel):
@@ -839,26 +786,9 @@ class SystemWindow(wx.Panel):
             dlg = wx.MessageDialog(self, 'Por favor, corriga os erros antes de continuar.', 'Erros encontrados', wx.OK | wx.ICON_ERROR)
             dlg.ShowModal()
 
-    def getATMValues(self, q):
-        ''' Preenche a lista self.h com os valores ATM. '''
-
-        self.h = []
-        for vazao in q:
-            if vazao == 0:
-                self.h.append(self.HG)
-            else:
-                self.h.append(self.calculateAMT(vazao))
-
-
-    def plotGraph(self, q, isToSave=False, path=''):
+    def plotGraph(self, q):
         ''' Desenha o gráfico. '''
 
-        if isToSave:
-            win = PumpWindow(self)
-            win.checkAndTransferToLists()
-            q = win.q
-            win.Destroy()
-
         self.HG = float(self.geoInput.GetValue())   # Desnivel geometrico (m)
         self.L = float(self.tubInput.GetValue())    # Comprimento da tubulação (m)
         self.D = float(self.diaTubInput.GetValue()) # Diametro interno da tubulação (m)
@@ -873,81 +803,18 @@ class SystemWindow(wx.Panel):
 
         self.D = self.D / 1000
 
-        self.getATMValues(q)
-
-        fig, ax = plt.subplots(figsize=(11, 6))
-        plt.suptitle('Curva do Sistema', x=0.06, y=0.98, ha='left', fontsize=15)
-
-        # Informacoes do gráfico.
-        ax.set_xlabel('Vazão (m³/s)')
-        ax.set_ylabel('Altura Nanométrica (m)')
-
-        # remove spines
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-
-        arr = dp.smoothGraph(np.array(q), np.array(self.h))
-
-        plt.plot(arr[0], arr[1], '-', label='Curva do Sistema', color='r')
-        plt.legend(loc='best')
-        plt.tight_layout()
-
-        if isToSave:
-            plt.savefig(path, bbox_inches='tight')
-        else:
-            plt.show()
-
-    def calculateAMT(self, vazao):
-        ''' Calcula o valor da altura nanometrica. '''
-
-        G = 9.81    # Aceleracao da gravidade (m/s²)
-        V = vazao / (np.pi * (pow(self.D, 2) / 4))  # Velocidade (m/s)
-        reynolds = (V * self.D) / 0.000001
-        F = self.calculatePerdaCarga(self.rug, self.D, reynolds)  # Fator perda de carga
-
-        return self.HG + ( (F * self.L * pow(V, 2)) / (2 * G * self.D) ) + self.KS * ( (pow(V, 2)) / (2 * G) )
+        charts.showChart(self, 'sistema', 'Curva do Sistema', figures.getSystemFigure, q, self.getSistema())
 
-    def calculatePerdaCarga(self, rugosidade, diametro, reynolds):
-        ''' Calcula o fator perda de carga. '''
+    def getSistema(self):
+        ''' Retorna as variáveis da Curva do Sistema no formato de `project.getSystemParameters()`. '''
 
-        if reynolds < 2300:
-            result = 64 / reynolds
-
-        else:
-            f0 = 0.000001
-            f1 = (1 / 4) * pow(np.log10(rugosidade / (3.706 * diametro) + 2.51 / (reynolds * np.sqrt(f0))), -2)
-            k = abs((f1 - f0) / f1)
-
-            while k > 0.000001:
-                f1 = (1 / 4) * pow(np.log10(rugosidade / (3.706 * diametro) + 2.51 / (reynolds * np.sqrt(f0))), -2)
-                k = abs((f1 - f0) / f1)
-                f0 = f1
-
-            result = f1
-
-        return result
+        return {'desnivel': self.HG, 'comprimento': self.L, 'diametro': self.D, 'rugosidade': self.rug, 'singularidades': self.KS}
 
     def getSumInputValue(self):
         ''' Chamada para conseguir um valor para o somatório dos coeficientes de singularidade, quando este
         não for preenchido. '''
 
-        self.KS = 0
-
-        for i in range(0, 7):
-            if i == 0:
-                self.KS += int(self.sumInputs[i].GetValue()) * 0.2  # Curvas 45 graus
-            elif i == 1:
-                self.KS += int(self.sumInputs[i].GetValue()) * 0.4  # Curvas 90 graus
-            elif i == 2:
-                self.KS += int(self.sumInputs[i].GetValue()) * 10   # Registros globo
-            elif i == 3:
-                self.KS += int(self.sumInputs[i].GetValue()) * 0.2  # Registros gaveta
-            elif i == 4:
-                self.KS += int(self.sumInputs[i].GetValue()) * 5    # Registros esfera
-            elif i == 5:
-                self.KS += int(self.sumInputs[i].GetValue()) * 10   # Valvula de retencao
-            elif i == 6:
-                self.KS += int(self.sumInputs[i].GetValue()) * 3    # Valvula pe com crivo
+        self.KS = calculations.getSingularidadesSum([field.GetValue() for field in self.sumInputs])
 
     def clearFields(self):
         ''' Limpa os campos de texto. '''
@@ -993,13 +860,9 @@ class SystemWindow(wx.Panel):
         index = gv.fileStartIndices['#parameters_system_start']
         self.flushFields(index)
 
-        # Fechamos o arquivo e o apagamos totalmente.
-        gv.opened_file.close()
-        gv.opened_file = open(gv.file_path, 'w')
-
-        # Reescrevemos do zero.
-        gv.opened_file.write(''.join(gv.fileLines))
+        # Fechamos o arquivo e gravamos apenas esta seção. O resto do arquivo é copiado sem ser reescrito.
         gv.opened_file.close()
+        project.saveSection(gv.file_path, 'parameters_system', fm.getSectionLines('parameters_system'))
 
         # Reabrimos em modo de leitura.
         gv.opened_file = open(gv.file_path, 'r')
@@ -1080,19 +943,14 @@ class SystemWindow(wx.Panel):
 
         if self.isAllBlank():
             if self.isThereSystemData():    # Se a tabela estover vazia e existe dados ali, então só precisamos apagar tudo.
-                for _ in range(0, 15):
-                    del gv.fileLines[index]
-
-                gv.fileStartIndices['#parameters_system_end'] -= 15
+                fm.replaceSection('parameters_system', [])
                 return
             else:
                 return
 
         else:
             if not self.isThereSystemData(): # Se a tabela contém dados, mas o arquivo tá sem, precisamos criar espaço.
-                for _ in range(0, 15):
-                    gv.fileLines.insert(index, '\n')
-                gv.fileStartIndices['#parameters_system_end'] += 15
+                fm.replaceSection('parameters_system', ['\n'] * 15)
 
         gv.fileLines[index] = f'{self.geoInput.GetValue().strip()}\n'
         index += 1
@@ -1231,22 +1089,7 @@ class OperationPoint(wx.Panel):
         não estiver preenchido no arquivo. '''
 
         start = gv.fileStartIndices['#parameters_system_start'] + 8
-
-        for i in range(0, 7):
-            if i == 0:
-                self.KS += int(gv.fileLines[i + start]) * 0.2  # Curvas 45 graus
-            elif i == 1:
-                self.KS += int(gv.fileLines[i + start]) * 0.4  # Curvas 90 graus
-            elif i == 2:
-                self.KS += int(gv.fileLines[i + start]) * 10   # Registros globo
-            elif i == 3:
-                self.KS += int(gv.fileLines[i + start]) * 0.2  # Registros gaveta
-            elif i == 4:
-                self.KS += int(gv.fileLines[i + start]) * 5    # Registros esfera
-            elif i == 5:
-                self.KS += int(gv.fileLines[i + start]) * 10   # Valvula de retencao
-            elif i == 6:
-                self.KS += int(gv.fileLines[i + start]) * 3    # Valvula pe com crivo
+        self.KS += calculations.getSingularidadesSum(gv.fileLines[start : start + 7])
 
     def getSystemVariables(self):
         ''' Pega as variáveis de Curva do Sistema no arquivo. '''
@@ -1267,7 +1110,7 @@ class OperationPoint(wx.Panel):
 
         self.D = self.D / 1000
 
-    def plotGraph(self, isToSave=False, path=''):
+    def plotGraph(self):
         ''' Desenha o gráfico. '''
 
         self.getSystemVariables()
@@ -1278,120 +1121,17 @@ class OperationPoint(wx.Panel):
         self.yData = np.array(win.h)
         win.Destroy()
 
-        fig, ax = plt.subplots(figsize=(11, 6))
-        plt.suptitle('Análise do Ponto de Operação', x=0.06, y=0.98, ha='left', fontsize=15)
-
-        # Informacoes do gráfico.
-        ax.set_xlabel('Vazão (m³/s)')
-        ax.set_ylabel('Altura Nanométrica (m)')
-
-        # remove spines
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-
-        self.getATMValues(isToSave)
-
-        if isToSave:
-            plt.savefig(path, bbox_inches='tight')
-        else:
-            plt.show()
-
-    def calculateReynolds(self, vazao):
-        ''' Calcula o valor da altura nanometrica. '''
-
-        V = vazao / (np.pi * (pow(self.D, 2) / 4))  # Velocidade (m/s)
-        reynolds = (V * self.D) / 0.000001
-        F = self.calculatePerdaCarga(self.rug, self.D, reynolds)  # Fator perda de carga
-
-        return F
-
-    def calculatePerdaCarga(self, rugosidade, diametro, reynolds):
-        ''' Calcula o fator perda de carga. '''
-
-        if reynolds < 2300:
-            result = 64 / reynolds
-
-        else:
-            f0 = 0.000001
-            f1 = (1 / 4) * pow(np.log10(rugosidade / (3.706 * diametro) + 2.51 / (reynolds * np.sqrt(f0))), -2)
-            k = abs((f1 - f0) / f1)
-
-            while k > 0.000001:
-                f1 = (1 / 4) * pow(np.log10(rugosidade / (3.706 * diametro) + 2.51 / (reynolds * np.sqrt(f0))), -2)
-                k = abs((f1 - f0) / f1)
-                f0 = f1
-
-            result = f1
-
-        return result
-
-    def curveFitHelper(self, X, C, d):
-        return C * pow(X, d)
-
-    def getATMValues(self, isToSave=False):
-        ''' Gera um dado na lista operation_Y para cada valor na lista q (Curva da Bomba). '''
-
-        self.HPL = []
-        for X in self.xData:
-            if X == 0:
-                self.HPL.append(X)
-                continue
-
-            vel = ( X ) / (0.25 * np.pi * pow(self.D, 2))
-
-            B = self.KS / (2 * self.G * pow(0.25, 2) * pow(np.pi, 2) * pow(self.D, 4))
-            hps = B * pow(X, 2)
+        sistema = {'desnivel': self.HG, 'comprimento': self.L, 'diametro': self.D, 'rugosidade': self.rug, 'singularidades': self.KS}
+        fig, ponto, mensagem = charts.showChart(self, 'operacao', 'Ponto de Operação', figures.getOperationFigure, self.xData, self.yData, sistema)
+        if ponto:
+            self.intersect = ponto
+            self.updateVazaoAltura()
 
-            self.F = self.calculateReynolds(X)
-            hpl = ( self.F * self.L * pow(vel, 2) ) / ( 2 * self.G * self.D )
-
-            self.HPL.append(hpl)
-
-        xDataCopy = self.xData[:]
-        yDataCopy = self.yData[:]
-
-        self.yData = np.array(self.HPL)
-        initialGuess = [1.0, 1.0]
-
-        popt, pcov = curve_fit(self.curveFitHelper, self.xData[1:], self.yData[1:], initialGuess) # Tirando os primeiros zeros da lista.
-        AMT = self.HG + (popt[0] * pow(self.xData, popt[1]) + (B * pow(self.xData, 2)))
-
-        # plt.plot(self.xData, self.yData, 'r', label='fit params: a=%5.3f, d=%5.3f' % tuple(popt))
-
-        self.systemEq = (B, popt[0], popt[1], self.HG)
-        B = "{:.2f}".format(B)
-        C = "{:.2f}".format(popt[0])
-        d = "{:.3f}".format(popt[1])
-        HG = "{:.2f}".format(self.HG)
-
-        # Curva da Bomba
-        arrPump = dp.smoothGraph(xDataCopy, yDataCopy)
-        eq = self.getPumpCurveEquation()
-        newX = dp.cutLastPieceGraph(arrPump[0], 5)
-        newY = dp.cutLastPieceGraph(arrPump[1], 5)
-        plt.plot(newX, newY, '-', label=eq, color='b')
-
-        # Curva do Sistema
-        arrSystem = dp.smoothGraph(self.xData, AMT)
-
-        plt.plot(arrSystem[0], arrSystem[1], '-', color='r', label=f'{B}Q² + {C}Q^{d} + {HG}')
-        plt.plot(self.xData, AMT, 'o', color='black')
-
-        try:
-            x, y = intersection(arrPump[0], arrPump[1], arrSystem[0], arrSystem[1])
-            plt.plot(x, y, 'ro', label=f'Interseção [{"{:.4f}".format(x[0])}, {"{:.4f}".format(y[0])}]', color='green')
-            plt.annotate('Ponto de operação', xy=(x[0], y[0]), xycoords='data', xytext=(0.8, 0.95),
-            textcoords='axes fraction', arrowprops=dict(facecolor='green', shrink=0.05), horizontalalignment='right', verticalalignment='top')
-
-            self.intersect = (x[0], y[0])
-            self.updateVazaoAltura(isToSave)
-        except:
-            pass
-
-        plt.legend(loc='lower right')
-        plt.tight_layout()
+        if not ponto:
+            dlg = wx.MessageDialog(self, mensagem, 'Ponto de operação não encontrado', wx.OK | wx.ICON_WARNING)
+            dlg.ShowModal()
 
-    def updateVazaoAltura(self, isToSave=False):
+    def updateVazaoAltura(self):
         ''' Atualiza o campos de Vazao Bombeada e Altura Nanometrica em Parametros do Sistema. '''
 
         textRef_0 = self.parent.textBoxesRefs[0]
@@ -1411,29 +1151,6 @@ class OperationPoint(wx.Panel):
             self.parent.isSaved = False
             self.parent.updateTitleName()
 
-        if not isToSave:
-            dlg = wx.MessageDialog(self, 'As variáveis Vazão Bombeada e Altura Nanométrica em Parâmetros do Sistema foram atualizadas com os valores do ponto de interseção.',
-            'Informações atualizadas', wx.ICON_INFORMATION)
-            dlg.ShowModal()
-
-
-    def getPumpCurveEquation(self):
-        ''' Retorna a string da equacao da bomba do sistema. Retorna uma string vazia em caso de erro. '''
-
-        if '#parameters_pump_start' in gv.fileStartIndices.keys():
-            win = PumpWindow(self)
-            win.checkAndTransferToLists()
-            win.calcultaP2()
-            P2 = win.P2
-            win.Destroy()
-
-            a = "{:.2f}".format(P2[0])
-            b = "{:.2f}".format(P2[1])
-            c = "{:.2f}".format(P2[2])
-            self.pumpEq = (P2[0], P2[1], P2[2])
-            eq = f'f(x) = {a}x² + {b}x + {c}\n'
-
-            return eq
-
-        else:
-            return ''
\ No newline at end of file
+        dlg = wx.MessageDialog(self, 'As variáveis Vazão Bombeada e Altura Nanométrica em Parâmetros do Sistema foram atualizadas com os valores do ponto de interseção.',
+        'Informações atualizadas', wx.ICON_INFORMATION)
+        dlg.ShowModal()
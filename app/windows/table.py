@@ -4,9 +4,190 @@ Arquivo contem a classe responsável pela tabela.
 '''
 
 import wx
+import datetime
 import wx.grid as gridlib
+import numpy as np
 import app.data_processing as dp
 import app.global_variables as gv
+import app.water_import as water_import
+import app.water_series as water_series
+import app.indicators as indicators
+
+COLUNAS = ('Data', 'Horário', 'Consumo')
+
+class WaterTable(gridlib.GridTableBase):
+    ''' Tabela virtual do grid de consumo de água. Cada fileira é uma medição, guardada em arrays do numpy como na
+    WaterSeries: a data ordinal, o minuto do dia e a vazão. O texto de uma célula só é montado quando o grid a desenha.
+
+    Células vazias têm data 0, minuto -1 e vazão nan. Um consumo digitado que não é um número fica em `textos`
+    ({fileira: texto}), com vazão nan, até ser corrigido; só essas células guardam texto.
+    As colunas Data e Horário são apenas de leitura pelo atributo da coluna, e a cor de erro vem do array `erros`,
+    com uma linha por coluna. Nenhuma célula guarda atributo próprio. '''
+
+    def __init__(self, rows):
+        gridlib.GridTableBase.__init__(self)
+
+        self.ordinais = np.zeros(rows, dtype=np.int32)
+        self.minutos = np.full(rows, -1, dtype=np.int16)
+        self.valores = np.full(rows, np.nan)
+        self.textos = {}
+        self.erros = np.zeros((len(COLUNAS), rows), dtype=bool)
+
+        # Texto de cada data já exibida, pela data ordinal.
+        self.datas = {}
+
+        # Atributos indexados por [apenas leitura][erro].
+        self.atributos = [[self.createAttr(False, False), self.createAttr(False, True)],
+            [self.createAttr(True, False), self.createAttr(True, True)]]
+
+    def createAttr(self, readOnly, error):
+        ''' Cria um atributo de célula apenas de leitura e/ou com a cor de erro. '''
+
+        attr = gridlib.GridCellAttr()
+        attr.SetReadOnly(readOnly)
+        if error:
+            attr.SetBackgroundColour(gv.RED_ERROR)
+
+        return attr
+
+    def GetNumberRows(self):
+        return len(self.valores)
+
+    def GetNumberCols(self):
+        return len(COLUNAS)
+
+    def GetColLabelValue(self, col):
+        return COLUNAS[col]
+
+    def IsEmptyCell(self, row, col):
+        return self.GetValue(row, col) == ''
+
+    def GetValue(self, row, col):
+        if col == 0:
+            ordinal = int(self.ordinais[row])
+            if ordinal == 0:
+                return ''
+
+            if ordinal not in self.datas:
+                self.datas[ordinal] = datetime.date.fromordinal(ordinal).strftime('%d/%m/%Y')
+
+            return self.datas[ordinal]
+
+        if col == 1:
+            minuto = int(self.minutos[row])
+            return water_import.HORARIOS[minuto] if minuto >= 0 else ''
+
+        if row in self.textos:
+            return self.textos[row]
+
+        valor = self.valores[row]
+        return '' if np.isnan(valor) else water_import.formatValue(valor)
+
+    def SetValue(self, row, col, value):
+        if col == 0:
+            self.ordinais[row] = getOrdinal(value)
+        elif col == 1:
+            self.minutos[row] = getMinute(value)
+        else:
+            self.setConsumo(row, value)
+
+    def setConsumo(self, row, value):
+        ''' Guarda o consumo digitado na fileira `row`. Números vão para `valores`; qualquer outro texto vai para `textos`. '''
+
+        text = value.strip()
+        self.textos.pop(row, None)
+
+        try:
+            valor = float(text) if text else np.nan
+        except ValueError:
+            valor = np.nan
+
+        if text and not np.isfinite(valor):
+            self.textos[row] = value
+
+        self.valores[row] = valor
+
+    def GetAttr(self, row, col, kind):
+        ''' Data e Horário são apenas de leitura. A cor de fundo depende apenas de `erros`. '''
+
+        attr = self.atributos[col < 2][int(self.erros[col, row])]
+        attr.IncRef()
+
+        return attr
+
+    def Clear(self):
+        ''' Chamada por `grid.ClearGrid()`. Apaga os valores e os erros sem mudar a quantidade de fileiras. '''
+
+        self.ordinais[:] = 0
+        self.minutos[:] = -1
+        self.valores[:] = np.nan
+        self.textos.clear()
+        self.erros[:] = False
+
+    def AppendRows(self, numRows=1):
+        ''' Chamada por `grid.AppendRows()`. Aumenta os arrays e avisa o grid. '''
+
+        self.ordinais = np.concatenate((self.ordinais, np.zeros(numRows, dtype=np.int32)))
+        self.minutos = np.concatenate((self.minutos, np.full(numRows, -1, dtype=np.int16)))
+        self.valores = np.concatenate((self.valores, np.full(numRows, np.nan)))
+        self.erros = np.concatenate((self.erros, np.zeros((len(COLUNAS), numRows), dtype=bool)), axis=1)
+
+        msg = gridlib.GridTableMessage(self, gridlib.GRIDTABLE_NOTIFY_ROWS_APPENDED, numRows)
+        self.GetView().ProcessTableMessage(msg)
+
+        return True
+
+    def DeleteRows(self, pos=0, numRows=1):
+        ''' Chamada por `grid.DeleteRows()`. Remove as fileiras dos arrays e avisa o grid. '''
+
+        fileiras = np.arange(pos, min(pos + numRows, self.GetNumberRows()))
+        if not len(fileiras):
+            return False
+
+        self.ordinais = np.delete(self.ordinais, fileiras)
+        self.minutos = np.delete(self.minutos, fileiras)
+        self.valores = np.delete(self.valores, fileiras)
+        self.erros = np.delete(self.erros, fileiras, axis=1)
+
+        # Os textos das fileiras seguintes sobem junto.
+        fim = pos + len(fileiras)
+        self.textos = {row if row < pos else row - len(fileiras): text for row, text in self.textos.items() if not pos <= row < fim}
+
+        msg = gridlib.GridTableMessage(self, gridlib.GRIDTABLE_NOTIFY_ROWS_DELETED, pos, len(fileiras))
+        self.GetView().ProcessTableMessage(msg)
+
+        return True
+
+    def getFilledRows(self):
+        ''' Retorna a quantidade de fileiras antes da primeira fileira com alguma célula vazia. '''
+
+        semValor = np.isnan(self.valores)
+        semValor[list(self.textos)] = False
+        vazias = (self.ordinais == 0) | (self.minutos < 0) | semValor
+
+        return int(np.argmax(vazias)) if vazias.any() else len(vazias)
+
+    def getInvalidValues(self, start, end):
+        ''' Retorna um array booleano com True para cada valor de consumo, de `start` até `end`, vazio, que não é número ou negativo. '''
+
+        # Vazios e textos têm vazão nan, e nan >= 0 é False.
+        return ~(self.valores[start:end] >= 0)
+
+def getOrdinal(value):
+    ''' Retorna a data ordinal do texto `value`, ou 0 (célula vazia) se não for uma data. '''
+
+    try:
+        return water_import.getDateOrdinal(value, {})
+    except (ValueError, TypeError, AttributeError):
+        return 0
+
+def getMinute(value):
+    ''' Retorna o minuto do dia do horário `value`, ou -1 (célula vazia) se não for um horário. '''
+
+    try:
+        return water_import.getMinuteOfDay(value, {})
+    except (ValueError, TypeError, AttributeError):
+        return -1
 
 class Table(wx.Frame):
 
@@ -18,7 +199,8 @@ class Table(wx.Frame):
         self.panel = wx.Panel(parent, wx.ID_ANY)
         self.panel.SetMinSize((475, 490))
         self.grid = gridlib.Grid(self.panel)
-        self.grid.CreateGrid(row, col)
+        self.gridTable = WaterTable(row)
+        self.grid.SetTable(self.gridTable, True)
         self.grid.ShowScrollbars(False, True)
         self.grid.SetDefaultCellAlignment(wx.ALIGN_CENTRE, wx.ALIGN_CENTRE)
 
@@ -27,17 +209,12 @@ class Table(wx.Frame):
         self.grid.SetColSize(1, 125)
         self.grid.SetColSize(2, 125)
 
-        self.grid.SetColLabelValue(0, 'Data')
-        self.grid.SetColLabelValue(1, 'Horário')
-        self.grid.SetColLabelValue(2, 'Consumo')
-
         # A fileira comeca do índice 0, mas o número é atualizado com a quantidade de dados, ou seja, aponta para a fileira seguinte da última inserção.
         # Usamos disso para inserir os próximos dados exatamente em self.lastFilledRow.
         self.lastFilledRow = 0
         self.rowLength = row
         self.curRow = 0
         self.currentlySelectedCell = (0, 0)
-        self.makeCellsReadOnly()
 
         self.grid.Bind(gridlib.EVT_GRID_EDITOR_CREATED, self.onCellEdit)
         self.grid.Bind(gridlib.EVT_GRID_SELECT_CELL, self.onRowSelected)
@@ -158,86 +335,44 @@ class Table(wx.Frame):
         ''' Copia o `text` extraido do Clipboard para a tabela. '''
 
         row = self.curRow
+        lines = [line.strip() for line in text.splitlines()[:self.rowLength - row]]
 
-        for line in text.splitlines():
-            if row < self.rowLength:
-                self.grid.SetCellValue(row, 2, line.strip())
-            else:
-                break
+        for i, line in enumerate(lines):
+            self.gridTable.setConsumo(row + i, line)
 
-            row += 1
+        self.grid.ForceRefresh()
 
         self.parent.isSaved = False
         self.parent.updateTitleName()
 
-    def transferTableToList(self, out_list):
-        """ Transfere os dados da tabela para a lista ``list`` no formato:
-        [{'date': '09/03/2021', 'time': '12:30', 'value': '12.9'}, ...]
-        """
-
-        out_list.clear()
-
-        empytStrFound = False
-        i = 0
-        j = 0
-        dic = {}
-
-        while i < self.rowLength:
-            if empytStrFound:
-                break
-
-            while j < 3:
-                data = self.grid.GetCellValue(i, j)
+    def transferTableToSeries(self):
+        """ Retorna os dados da tabela como WaterSeries, até a primeira fileira com alguma célula vazia.
+        Os valores de consumo precisam ter sido verificados antes (ver `checkConsumoValues()`). """
 
-                # Se encontrar uma célula vazia, para.
-                if data == '':
-                    empytStrFound = True
-                    break
+        end = self.gridTable.getFilledRows()
+        tabela = self.gridTable
 
-                if j == 0:
-                    dic['date'] = data
-                elif j == 1:
-                    dic['time'] = data
-                else:
-                    dic['value'] = data
+        return water_series.WaterSeries(tabela.ordinais[:end].copy(), tabela.minutos[:end].copy(), tabela.valores[:end].copy())
 
-                j += 1
 
-            i += 1
-            j = 0
-
-            if not empytStrFound:
-                out_list.append(dic)
-                dic = {}
-
-
-    def transferListToTable(self, in_list):
-        """ Transfere os dados da ``in_list`` para as tabelas. """
+    def transferSeriesToTable(self, serie):
+        """ Transfere os dados de ``serie`` (WaterSeries ou WaterStore) para a tabela. Uma WaterStore é lida em blocos. """
 
         self.grid.ClearGrid()
 
-        i = 0
-        j = 0
-        length = len(in_list)
-
-        while i < length:
-            while j < 3:
-                if j == 0:
-                    date = in_list[i]['date']
-                    self.grid.SetCellValue(i, j, date)
-                elif j == 1:
-                    self.grid.SetCellValue(i, j, in_list[i]['time'])
-                else:
-                    self.grid.SetCellValue(i, j, in_list[i]['value'])
+        length = len(serie)
+        if length == 0:
+            return
 
-                j += 1
+        for primeiro, fimDia, minutos, valores in indicators.iterDayBlocks(serie, water_import.TAMANHO_BLOCO):
+            inicio, fim = serie.inicios[primeiro], serie.inicios[fimDia]
 
-            if i == length - 1:
-                self.parent.lastDate = date
-                self.lastFilledRow = length
+            self.gridTable.ordinais[inicio:fim] = np.repeat(serie.datas[primeiro:fimDia], np.diff(serie.inicios[primeiro:fimDia + 1]))
+            self.gridTable.minutos[inicio:fim] = minutos
+            self.gridTable.valores[inicio:fim] = valores
 
-            i += 1
-            j = 0
+        self.parent.lastDate = serie.getDate(serie.getDaysCount() - 1)
+        self.lastFilledRow = length
 
     def clearTable(self):
         """ Limpa toda a tabela. """
@@ -245,38 +380,38 @@ class Table(wx.Frame):
         self.grid.ClearGrid()
         self.lastFilledRow = 0
         self.deleteRows(self.rowLength - self.parent.defaultRowSize)
-        self.makeCellsReadOnly()
 
 
     def checkConsumoValue(self, row):
         """ Analiza a célula por erros. Se algum erro for encontrado, retorna True. """
 
-        value = self.grid.GetCellValue(row, 2)
+        erro = bool(self.gridTable.getInvalidValues(row, row + 1)[0])
+        self.gridTable.erros[2, row] = erro
 
-        if value == '':
-            self.grid.SetCellBackgroundColour(row, 2, gv.RED_ERROR)
-            return True
+        return erro
 
-        if not dp.isFloat(self.grid.GetCellValue(row, 2)):
-            self.grid.SetCellBackgroundColour(row, 2, gv.RED_ERROR)
-            return True
+    def checkConsumoValues(self):
+        """ Analiza todas as células de consumo até self.lastFilledRow. Retorna um array com as fileiras com erro. """
 
-        else:
-            if float(self.grid.GetCellValue(row, 2)) < 0:
-                self.grid.SetCellBackgroundColour(row, 2, gv.RED_ERROR)
-                return True
-            else:
-                self.grid.SetCellBackgroundColour(row, 2, wx.NullColour)
-                return False
+        erros = self.gridTable.getInvalidValues(0, self.lastFilledRow)
+        self.gridTable.erros[2, :self.lastFilledRow] = erros
 
+        return np.flatnonzero(erros)
 
     def paintAllBlank(self):
-        """ Descolore todas as células de consumo. Geralmente chamada quando um arquivo e aberto. """
+        """ Descolore todas as células. Geralmente chamada quando um arquivo e aberto. """
 
-        i = 0
-        while i < self.rowLength:
-            self.grid.SetCellBackgroundColour(i, 2, wx.NullColour)
-            i += 1
+        self.gridTable.erros[:] = False
+        self.grid.ForceRefresh()
+
+    def paintDateTimeErrors(self, rows):
+        """ Colore as células de data e horário das fileiras ``rows``, vindas de `fm.getWaterDataReport()`. """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        self.gridTable.erros[0:2, rows] = True
+
+        if len(rows):
+            self.grid.MakeCellVisible(int(rows[0]), 0)
 
         self.grid.ForceRefresh()
 
@@ -307,18 +442,18 @@ class Table(wx.Frame):
 
         interval = int(24 * (60 / interval))# Quantos dados terao que ser inseridos.
 
-        for i in range(self.lastFilledRow, self.lastFilledRow + interval):
-            self.grid.SetCellValue(i, 0, date)
+        self.gridTable.ordinais[self.lastFilledRow:self.lastFilledRow + interval] = water_import.getDateOrdinal(date, {})
+        self.grid.ForceRefresh()
 
 
     def generateTime(self, interval):
         """ Funcao preenche os campos da tabela com horarios. """
 
         rowsNumber = int(24 * (60 / interval))  # Quantos dados terao que ser inseridos.
-        hm = [0, 0]
+        minutos = np.arange(0, rowsNumber) * int(interval)
 
-        for i in range(self.lastFilledRow, self.lastFilledRow + rowsNumber):
-            self.grid.SetCellValue(i, 1, dp.addMinutes(hm, interval))
+        self.gridTable.minutos[self.lastFilledRow:self.lastFilledRow + rowsNumber] = minutos % water_import.MINUTOS_DIA
+        self.grid.ForceRefresh()
 
 
     def rearrangeRows(self, rowsNeeded):
@@ -342,10 +477,11 @@ class Table(wx.Frame):
     def generateRows(self, number):
         """ Funcao cria mais ``number`` fileiras na tabela. """
 
-        oldLength = self.rowLength
+        if number <= 0:
+            return
+
         self.grid.AppendRows(number)
         self.rowLength += number
-        self.makeCellsReadOnly(oldLength)
 
 
     def deleteRows(self, number, start=0):
@@ -357,10 +493,3 @@ class Table(wx.Frame):
         self.grid.DeleteRows(start, number)
         self.rowLength -= number
 
-
-    def makeCellsReadOnly(self, startOffset=0):
-        ''' Faz as células Data e Horário ficarem apenas no modo leitura. Usa self.rowLength para saber onde parar. '''
-
-        for row in range(0 + startOffset, self.rowLength):
-            for col in range(0, 2):
-                self.grid.SetReadOnly(row, col)
@@ -1,7 +1,8 @@
 from pydoc import isdata
 import wx
-import app.windows.energy_consumption as energy_consumption
-import app.windows.parameters as parameters
+import app.global_variables as gv
+import app.project as project
+import app.calculations as calculations
 
 class ResultWindow(wx.Frame):
     ''' Classe responsavel pela criacao das janelas de calculo das Tarifas Verdes e Azuis. '''
@@ -79,16 +80,13 @@ class ResultWindow(wx.Frame):
 
         self.SetTitle('Resultados: Tarifa Verde')
 
-        CEEP = self.consumoPonta * self.greenFields[0] / (1 - (self.aliFields[0] - self.aliFields[1] - self.aliFields[2]) / 100)
-        CEEFP = self.consumoForaPonta * self.greenFields[1] / (1 - (self.aliFields[0] - self.aliFields[1] - self.aliFields[2]) / 100)
-
-        num = 9.81 * self.vazaoBombeada * self.alturaNanometrica / ( (self.rendimentoMotor / 100) * (self.rendimentoBomba / 100) ) * self.greenFields[2]
-        den = 1 - (self.aliFields[0] - self.aliFields[1] - self.aliFields[2]) / 100
-        CD = num / den
-
-        CTEE = CEEP + CEEFP + CD
-        CMEE = CTEE / self.consumoTotal
-        CMMB = CTEE / self.volumeBombeado
+        result = calculations.getGreenTariff(self.parametros, self.aliFields, self.greenFields)
+        CEEP = result['CEEP']
+        CEEFP = result['CEEFP']
+        CD = result['CD']
+        CTEE = result['CTEE']
+        CMEE = result['CMEE']
+        CMMB = result['CMMB']
 
         if self.isDataOnly:
             self.greenResult = [
@@ -115,19 +113,14 @@ class ResultWindow(wx.Frame):
 
         self.SetTitle('Resultados: Tarifa Azul')
 
-        CEEP = self.consumoPonta * self.blueFields[2] / (1 - (self.aliFields[0] - self.aliFields[1] - self.aliFields[2]) / 100)
-        CEEFP = self.consumoForaPonta * self.blueFields[3] / (1 - (self.aliFields[0] - self.aliFields[1] - self.aliFields[2]) / 100)
-
-        num = 9.81 * self.vazaoBombeada * self.alturaNanometrica / ( (self.rendimentoMotor / 100) * (self.rendimentoBomba / 100)) * self.blueFields[0]
-        den = 1 - (self.aliFields[0] - self.aliFields[1] - self.aliFields[2]) / 100
-        CDP = num / den
-
-        num = 9.81 * self.vazaoBombeada * self.alturaNanometrica / ( (self.rendimentoMotor / 100) * (self.rendimentoBomba / 100)) * self.blueFields[1]
-        CDFP = num / den
-
-        CTEE = CEEP + CEEFP + CDP + CDFP
-        CMEE = CTEE / self.consumoTotal
-        CMMB = CTEE / self.volumeBombeado
+        result = calculations.getBlueTariff(self.parametros, self.aliFields, self.blueFields)
+        CEEP = result['CEEP']
+        CEEFP = result['CEEFP']
+        CDP = result['CDP']
+        CDFP = result['CDFP']
+        CTEE = result['CTEE']
+        CMEE = result['CMEE']
+        CMMB = result['CMMB']
 
         if self.isDataOnly:
             self.blueResult = [
@@ -156,41 +149,10 @@ class ResultWindow(wx.Frame):
         ''' Funcao retira todas as informações necessárias do arquivo e retorna True se todas as variaveis e informações necessarias
         estão presentes. '''
 
-        # Os item dentro da lista correspondem ao botao Parametros do Sistema, ja convertidos em float, em ordem...
-        # [0] --> Vazao Bombeada
-        # [1] --> Altura nanometrica
-        # [2] --> Rendimento do Motor
-        # [3] --> Rendimento da Bomba
-        # [4] --> Numero de bombas em paralelo
-        # [5] --> Tempo de operacao no horario da ponta
-        # [6] --> Tempo de operacao no horario fora da ponta
-        self.parametersValues = []
-
-        par = parameters.ParametersWindow(None)
-        for i in range(0, len(par.textBoxesRefs)):
-            value = float(par.textBoxesRefs[i].GetValue().strip())
-            self.parametersValues.append(value)
-        par.Destroy()
-
-        # Essas sao as variaveis de "Parametros do Sistema"
-        self.vazaoBombeada = self.parametersValues[0]
-        self.alturaNanometrica = self.parametersValues[1]
-        self.rendimentoMotor = self.parametersValues[2]
-        self.rendimentoBomba = self.parametersValues[3]
-        self.bombasParalelo = self.parametersValues[4]
-        self.operacaoDentroPonta = self.parametersValues[5]
-        self.operacaoForaPonta = self.parametersValues[6]
-
-        # Estas variaveis sao calculadas em "Consumo de Energia e Indicadores Hidroenergeticos" com as
-        # variaveis de "Parametros do Sistema"
-        energy = energy_consumption.EnergyConsumption(None)
-        self.consumoPonta = energy.energiaPonta(True) # Consumo de Energia dentro da Ponta
-        self.consumoForaPonta = energy.energiaPonta(False) # Consumo de Energia Fora da Ponta
-        self.consumoTotal = energy.consumoTotal() # Consumo de Energia Total
-        self.volumeBombeado = energy.volumeBombeado() # Volume Bombeado
-        self.consumoEspecifico = energy.consumoEspecifico() # Consumo Específico
-        self.consumoEspecificoNor = energy.consumoEspecificoNormalizado() # Consumo Especifico Normalizado
-        energy.Destroy()
+        # Os Parâmetros do Sistema são lidos direto do arquivo, sem criar as janelas de Parâmetros e de Consumo de Energia.
+        self.parametros = project.getParameters(gv.fileLines, gv.fileStartIndices)
+        if not self.parametros:
+            return False
 
         return True
 
@@ -207,4 +169,66 @@ class ResultWindow(wx.Frame):
         elif self.color == 'BLUE':
             self.parent.blueResultWindow = None
 
-        self.Destroy()
\ No newline at end of file
+        self.Destroy()
+
+
+class ScheduleResultWindow(wx.Frame):
+    ''' Janela com o consumo de energia e os custos calculados com a operação das bombas simulada no Balanço Hídrico.
+    `resultado` é o dicionário de `calculations.getScheduleCosts()`. '''
+
+    # Linhas de cada parte do resultado: (chave, descrição, unidade).
+    OPERACAO = (
+        ('operacaoHorarioPonta', 'Operação no Horário de Ponta', 'h/dia'),
+        ('operacaoHorarioForaPonta', 'Operação no Horário Fora de Ponta', 'h/dia'),
+    )
+    ENERGIA = (
+        ('consumoPonta', 'Consumo de Energia na Ponta', 'kWh/mês'),
+        ('consumoForaPonta', 'Consumo de Energia Fora da Ponta', 'kWh/mês'),
+        ('consumoTotal', 'Consumo Total de Energia', 'kWh/mês'),
+        ('volumeBombeado', 'Volume Bombeado', 'm³/mês'),
+    )
+    TARIFAS = (
+        ('CEEP', 'Custo de Energia Elétrica na Ponta', 'R$/mês'),
+        ('CEEFP', 'Custo de Energia Elétrica Fora da Ponta', 'R$/mês'),
+        ('CD', 'Custo da Demanda', 'R$/mês'),
+        ('CDP', 'Custo da Demanda na Ponta', 'R$/mês'),
+        ('CDFP', 'Custo da Demanda Fora da Ponta', 'R$/mês'),
+        ('CTEE', 'Custo Total de Energia Elétrica', 'R$/mês'),
+        ('CMEE', 'Custo Médio da Energia Elétrica', 'R$/kWh'),
+        ('CMMB', 'Custo Médio por m³ de Água Bombeado', 'R$/m³'),
+    )
+
+    def __init__(self, parent, title, resultado):
+        style = wx.DEFAULT_FRAME_STYLE & (~wx.MAXIMIZE_BOX)
+        wx.Frame.__init__(self, parent, style=style)
+
+        self.SetTitle(title)
+        self.parent = parent
+
+        rows = [(f'{texto} ({unidade})', resultado['operacao'][key]) for key, texto, unidade in self.OPERACAO]
+        rows += [(f'{texto} ({unidade})', resultado['energia'][key]) for key, texto, unidade in self.ENERGIA]
+
+        for tarifa, nome in (('verde', 'Tarifa Verde'), ('azul', 'Tarifa Azul')):
+            if tarifa in resultado:
+                rows += [(f'{nome}: {texto} ({unidade})', resultado[tarifa][key]) for key, texto, unidade in self.TARIFAS
+                    if key in resultado[tarifa]]
+
+        listCtrl = wx.ListCtrl(self, -1, size=(560, 25 + 21 * len(rows)), style=wx.LC_REPORT | wx.SUNKEN_BORDER)
+        listCtrl.InsertColumn(0, 'Indicador', width=430)
+        listCtrl.InsertColumn(1, 'Valor', width=110, format=wx.LIST_FORMAT_RIGHT)
+
+        for i, (texto, valor) in enumerate(rows):
+            listCtrl.InsertItem(i, texto)
+            listCtrl.SetItem(i, 1, f'{valor:.2f}')
+
+            if i % 2:
+                listCtrl.SetItemBackgroundColour(i, '#d8daed')
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(listCtrl, flag=wx.ALL, border=5)
+
+        if 'verde' not in resultado and 'azul' not in resultado:
+            sizer.Add(wx.StaticText(self, -1, 'Preencha os Custos de Operação do arquivo para calcular as tarifas.'), flag=wx.ALL, border=5)
+
+        self.SetSizerAndFit(sizer)
+        self.Center()
@@ -5,8 +5,6 @@ Arquivo contém a classe de consumo de água.
 
 import os
 import wx
-from openpyxl import load_workbook
-import csv
 import app.windows.conversor as conversor
 import app.windows.database as database
 import app.file_manager as fm
@@ -15,6 +13,11 @@ import app.global_variables as gv
 import app.windows.graph_drawing as graph_drawing
 import wx.grid as gridlib
 import app.windows.table as table
+import app.water_import as water_import
+import app.project as project
+import app.water_series as water_series
+import app.water_store as water_store
+import app.water_cache as water_cache
 
 class CreateWaterWindow(wx.Frame):
     """ Cria o frame basico para a inicializacao do app. """
@@ -45,9 +48,9 @@ class CreateWaterWindow(wx.Frame):
 
         self.OnInit(self.menu)
 
-        # E uma lista de dicionarios que contem as informacoes de cada linha.
-        # Exemplo: [{'date': '09/03/2021', 'time': '12:30', 'value': '12.9'}, ...]
-        self.data = []
+        # Dados da tabela, atualizados ao abrir, importar, salvar e desenhar. None se não houver dados.
+        # Uma WaterSeries ou, para arquivos grandes salvos, a WaterStore do arquivo (ver `fm.getWaterData()`).
+        self.data = None
         self.LoadFile()
 
         # Bind do evento quando o usuário clica no X da janela para sair.
@@ -280,7 +283,7 @@ class CreateWaterWindow(wx.Frame):
                 self.SetTitle(f'{gv.filename} - {self.WINDOW_NAME}')
 
                 dialog.Destroy()
-                self.table.transferTableToList(self.data)
+                self.data = self.table.transferTableToSeries()
                 self.writeWaterComsumptionToFile()
 
                 return True
@@ -316,7 +319,9 @@ class CreateWaterWindow(wx.Frame):
             self.CloseFile()
             fm.openAndUpdateFileVariables(dialog)
             isFileOK = fm.isFileIntegrityOK()
-            self.data = fm.copyWaterFileDataToList()
+
+            # Os dados já foram lidos pela verificação de integridade: a série vem da mesma leitura.
+            self.data = fm.getWaterData() if isFileOK else None
 
             # Se a lista estiver vazia (não há dados de consumo de água), tudo OK, só não há dados.
             if isFileOK and not self.data:
@@ -327,9 +332,9 @@ class CreateWaterWindow(wx.Frame):
                 self.SetTitle(f'{gv.filename} - {self.WINDOW_NAME}')
                 return
 
-            if isFileOK and fm.analizeWaterData(self.data):
+            if isFileOK:
                 self.table.rearrangeRows(len(self.data))
-                self.table.transferListToTable(self.data)
+                self.table.transferSeriesToTable(self.data)
                 self.table.paintAllBlank()
                 self.isErrors = False
                 self.isSaved = True
@@ -359,7 +364,7 @@ class CreateWaterWindow(wx.Frame):
             self.SetTitle(f'{gv.filename} - {self.WINDOW_NAME}')
 
             dialog.Destroy()
-            self.table.transferTableToList(self.data)
+            self.data = self.table.transferTableToSeries()
             self.writeWaterComsumptionToFile()
 
 
@@ -383,32 +388,14 @@ class CreateWaterWindow(wx.Frame):
         else:
             return
 
-        # Nos não éamos fazer modicacoes no arquivo excel, so precisamos saber o path para pegarmos os dados.
-        workbook = load_workbook(file_path, data_only=True)
-
-        sheet = workbook.active # Aqui a gente diz que vai trabalhar com a primeira "folha" do excel.
-        dic = {}
-
-        self.data.clear()
+        self.data = None
         self.table.clearTable()
         try:
-            for i in range(2, sheet.max_row + 1): # Os dados comecam do index row=2.
-                for j in range(1, 4):
-                    if j == 1:
-                        dic['date'] = dp.excelDateToOurDate(str(sheet.cell(i, j).value))
-                    if j == 2:
-                        dic['time'] = dp.excelTimeToOurTime(str(sheet.cell(i, j).value))
-                    if j == 3:
-                        dic['value'] = str(sheet.cell(i, j).value)
-
-                self.data.append(dic)
-                dic = {}
-
-            if not fm.analizeWaterData(self.data):
-                raise Exception('File error')
+            # O arquivo é lido em modo somente leitura e validado em blocos. Os dados comecam na linha 2.
+            self.data = water_series.WaterSeries(*water_import.importWaterFile(file_path))
 
             self.table.rearrangeRows(len(self.data))
-            self.table.transferListToTable(self.data)
+            self.table.transferSeriesToTable(self.data)
             self.table.paintAllBlank()
             self.isErrors = False
             self.isSaved = False
@@ -419,11 +406,11 @@ class CreateWaterWindow(wx.Frame):
 
             self.OnDraw(None)
 
-        except:
-            self.data.clear()
+        except Exception as e:
+            self.data = None
             self.table.clearTable()
 
-            dial = wx.MessageDialog(self, 'Erro no processamento do arquivo. Ele pode não estar no formato ou identação correta.', 'Erro encontrado.', wx.ICON_ERROR)
+            dial = wx.MessageDialog(self, f'Erro no processamento do arquivo. Ele pode não estar no formato ou identação correta.\n{e}', 'Erro encontrado.', wx.ICON_ERROR)
             dial.ShowModal()
 
     def LoadCsvFile(self, event):
@@ -446,38 +433,26 @@ class CreateWaterWindow(wx.Frame):
         else:
             return
 
-        dic = {}
-        self.data.clear()
+        self.data = None
         self.table.clearTable()
 
         try:
-            with open(file_path, 'r') as f:
-                csvRead = csv.reader(f, delimiter=',')
-                next(csvRead, None)
-
-                for row in csvRead:
-                    dic['date'] = row[0]
-                    dic['time'] = row[1]
-                    dic['value'] = row[2]
-                    self.data.append(dic)
-                    dic = {}
+            # O delimitador (',', ';' ou tabulação) é detectado pelo importador.
+            self.data = water_series.WaterSeries(*water_import.importWaterFile(file_path))
 
-                if not fm.analizeWaterData(self.data):
-                    raise Exception('File error')
-
-                self.table.rearrangeRows(len(self.data))
-                self.table.transferListToTable(self.data)
-                self.table.paintAllBlank()
-                self.isErrors = False
-                self.isSaved = False
-                self.SetTitle(f'(Não Salvo) - {self.WINDOW_NAME}')
+            self.table.rearrangeRows(len(self.data))
+            self.table.transferSeriesToTable(self.data)
+            self.table.paintAllBlank()
+            self.isErrors = False
+            self.isSaved = False
+            self.SetTitle(f'(Não Salvo) - {self.WINDOW_NAME}')
 
-                self.OnDraw(None)
-        except:
-            self.data.clear()
+            self.OnDraw(None)
+        except Exception as e:
+            self.data = None
             self.table.clearTable()
 
-            dial = wx.MessageDialog(self, 'Erro no processamento do arquivo. Ele pode não estar no formato ou identação correta.', 'Erro encontrado', wx.ICON_ERROR)
+            dial = wx.MessageDialog(self, f'Erro no processamento do arquivo. Ele pode não estar no formato ou identação correta.\n{e}', 'Erro encontrado', wx.ICON_ERROR)
             dial.ShowModal()
 
 
@@ -501,43 +476,26 @@ class CreateWaterWindow(wx.Frame):
         else:
             return
 
-        dic = {}
-        self.data.clear()
+        self.data = None
         self.table.clearTable()
 
         try:
-            txtFile = open(file_path, 'r')
-            lines = txtFile.readlines()
-
-            for line in lines:
-                words = line.split()
-
-                dic['date'] = words[0]
-                dic['time'] = words[1]
-                dic['value'] = words[2]
-
-                self.data.append(dic)
-                dic = {}
-
-            if not fm.analizeWaterData(self.data):
-                raise Exception('File error')
+            self.data = water_series.WaterSeries(*water_import.importWaterFile(file_path))
 
             self.table.rearrangeRows(len(self.data))
-            self.table.transferListToTable(self.data)
+            self.table.transferSeriesToTable(self.data)
             self.table.paintAllBlank()
             self.isErrors = False
             self.isSaved = False
             self.SetTitle(f'(Não Salvo) - {self.WINDOW_NAME}')
 
-
-            txtFile.close()
             self.OnDraw(None)
 
-        except:
-            self.data.clear()
+        except Exception as e:
+            self.data = None
             self.table.clearTable()
 
-            dial = wx.MessageDialog(self, 'Erro no processamento do arquivo. Ele pode não estar no formato ou identação correta.', 'Erro encontrado', wx.ICON_ERROR)
+            dial = wx.MessageDialog(self, f'Erro no processamento do arquivo. Ele pode não estar no formato ou identação correta.\n{e}', 'Erro encontrado', wx.ICON_ERROR)
             dial.ShowModal()
 
 
@@ -610,32 +568,34 @@ class CreateWaterWindow(wx.Frame):
         if self.isThereErrorsWithTable():
             return
 
-        if not self.data:
-            dlg = wx.MessageDialog(self, 'Por favor, verifique a tabela por células vazias.', 'Erro encontrado', wx.OK | wx.ICON_ERROR)
-            dlg.ShowModal()
-            return
+        # A WaterStore de um arquivo grande sem alterações já foi validada ao ser montada e vai direto para o calendário,
+        # sem montar a série da tabela em memória.
+        if not (self.isSaved and isinstance(self.data, water_store.WaterStore)):
+            self.data = self.table.transferTableToSeries()
+            if not self.data:
+                dlg = wx.MessageDialog(self, 'Por favor, verifique a tabela por células vazias.', 'Erro encontrado', wx.OK | wx.ICON_ERROR)
+                dlg.ShowModal()
+                return
+
+            # Todas as linhas com erro de data ou horário são marcadas de uma vez.
+            report = water_import.getWaterDataReport(self.data.getOrdinals(), self.data.minutos)
+            if not report['ok']:
+                self.table.paintAllBlank()
+                self.checkConsumoValues()
+                self.table.paintDateTimeErrors(report['linhas'])
 
-        self.table.transferTableToList(self.data)
-        daysList = dp.getTableReadyData(self.data)
+                dlg = wx.MessageDialog(self, f'Corriga as células marcadas em vermelho antes de continuar.\n\n{water_import.getReportMessage(report)}',
+                'Erros encontrados.', wx.OK | wx.ICON_ERROR)
+                dlg.ShowModal()
+                return
 
-        self.calendarWindow.data = daysList
+        self.calendarWindow.data = self.data
         self.calendarWindow.OrganizeData()
         self.textBox.ShowItems(False)
         self.graphBox.ShowItems(True)
         self.rightSizer.Layout()
 
 
-    def SaveOverallGraph(self, path):
-        ''' Ao invés de exibir na tela, salva em ``dir`` o gráfico de consumo geral e destroi a janela. '''
-
-        self.table.transferTableToList(self.data)
-        daysList = dp.getTableReadyData(self.data)
-        self.calendarWindow.data = daysList
-
-        self.calendarWindow.isSaveToDisk = True
-        self.calendarWindow.path = path
-        self.calendarWindow.OnSummary(None)
-
     def SaveFile(self):
         """ Responsável por salvar o arquivo. Supõe que já existe um arquivo aberto. """
 
@@ -643,7 +603,7 @@ class CreateWaterWindow(wx.Frame):
             return
 
         if gv.opened_file and not self.isSaved:
-            self.table.transferTableToList(self.data)
+            self.data = self.table.transferTableToSeries()
             self.writeWaterComsumptionToFile()
             self.isSaved = True
             self.SetTitle(f'{gv.filename} - {self.WINDOW_NAME}')
@@ -657,13 +617,15 @@ class CreateWaterWindow(wx.Frame):
 
         if gv.opened_file:
             if '#water_consumption_start' in gv.fileStartIndices.keys():
-                self.data = fm.copyWaterFileDataToList()
-                self.table.rearrangeRows(len(self.data))
-                self.table.transferListToTable(self.data)
+                self.data = fm.getWaterData()
                 self.isErrors = False
                 self.isSaved = True
                 self.SetTitle(f'{gv.filename} - {self.WINDOW_NAME}')
-                self.OnDraw(None)
+
+                if self.data:
+                    self.table.rearrangeRows(len(self.data))
+                    self.table.transferSeriesToTable(self.data)
+                    self.OnDraw(None)
             else:
                 self.isSaved = True
                 self.SetTitle(f'{gv.filename} - {self.WINDOW_NAME}')
@@ -727,36 +689,23 @@ class CreateWaterWindow(wx.Frame):
     def writeWaterComsumptionToFile(self):
         ''' Salva toda a tabela de consumo de água no arquivo. '''
 
-        before = []
-
-        # Sempre vamos colocar nossos dados no inicio do arquivo. Se dados de água ja existirem, vamos apaga-lo totalmente e reescrever os de agora.
-        # Se não,évamos colocar esses dados no inicio e todo o resto depois.
-        if '#water_consumption_start' in gv.fileStartIndices.keys():
-            before = gv.fileLines[ : gv.fileStartIndices['#water_consumption_start'] - 1]
-            after = gv.fileLines[gv.fileStartIndices['#water_consumption_end'] + 1 : ] # O indice de fim aponta exatamente para o indicador.
-        else:
-            after = gv.fileLines
-
-        outText = before
-        outText += ['#water_consumption_start\n']
-        for dic in self.data:
-            outText.append(f"{dic['date']} {dic['time']} {dic['value']}\n")
-
-        outText += '#water_consumption_end\n'
-        outText += after
+        # Os dados de água não ficam em gv.fileLines, apenas os marcadores da seção. Se a seção não existir, ela vai para o início.
+        fm.replaceSection('water_consumption', [], atStart=True)
 
-        # Fechamos o arquivo e o apagamos totalmente.
-        gv.opened_file.close()
-        gv.opened_file = open(gv.file_path, 'w')
-
-        # Reescrevemos do zero.
-        gv.opened_file.write(''.join(outText))
+        # Fechamos o arquivo e gravamos apenas esta seção, linha a linha a partir da série. O resto do arquivo é copiado sem ser reescrito.
+        # O cache binário da seção antiga (ou do arquivo que foi sobrescrito) é apagado antes.
         gv.opened_file.close()
+        water_cache.removeCache(gv.file_path)
+        project.saveSection(gv.file_path, 'water_consumption', self.data.iterLines(), atStart=True)
 
         # Reabrimos em modo de leitura.
         gv.opened_file = open(gv.file_path, 'r')
 
-        fm.getEntrysDictAndFile()
+        # Arquivos grandes passam a usar a série fora da memória, gravada a partir da série já validada, sem ler o arquivo de novo.
+        if fm.isLargeFile():
+            self.data = water_store.WaterStore.fromSeries(water_store.getStorePath(gv.file_path), self.data, water_cache.getFileKey(gv.file_path))
+        else:
+            water_store.removeStore(gv.file_path)
 
 
     def ManageErrorsWithCells(self, isIn, row):
@@ -789,18 +738,13 @@ class CreateWaterWindow(wx.Frame):
     def checkConsumoValues(self):
         '''Checa todos os dados de consumo. Atualiza a lista self.CellErrorsList. Retorna True se encontrou algum erro. '''
 
-        errorsFound = False
-
-        for row in range(0, self.table.lastFilledRow):
-            if self.table.checkConsumoValue(row):
-                self.ManageErrorsWithCells(True, row)
-                errorsFound = True
-            else:
-                self.ManageErrorsWithCells(False, row)
+        # A tabela checa a coluna de consumo de uma vez. Fileiras após a última data continuam na lista, como antes.
+        rows = self.table.checkConsumoValues()
+        self.CellErrorsList = [row for row in self.CellErrorsList if row >= self.table.lastFilledRow] + rows.tolist()
 
         self.table.grid.ForceRefresh()
 
-        return errorsFound
+        return len(rows) > 0
 
     def isThereErrorsWithTable(self):
         """ Verifica se todos os campos de consumo para onde há dados estão preenchidos corretamente.
@@ -848,7 +792,7 @@ class CreateWaterWindow(wx.Frame):
         ''' Chamada quando o usuário clica para limpar toda a tabela pelo menu Tabela. '''
 
         self.table.clearTable()
-        self.data.clear()
+        self.data = None
         self.CellErrorsList.clear()
         self.isSaved = False
         self.table.paintAllBlank()
@@ -5,16 +5,25 @@ onde o usuario pode escolher com que tipo de função ele quer trabalhar.
 """
 
 import wx
+import importlib
 import app.global_variables as gv
-import app.file_manager as fm
-import app.windows.water_consumption as water_consumption
-import app.windows.parameters as parameters
-import app.windows.energy_consumption as energy_consumption
-import app.windows.custos as custos
-import app.windows.hydric as hydric
-import app.windows.database as database
-import app.pdf_export as pdf_export
-import app.windows.about as about
+import app.startup as startup
+
+# O gerenciador de arquivos carrega o numpy e os módulos do projeto. Só é necessário ao abrir um arquivo.
+fm = startup.lazyImport('app.file_manager')
+
+# Janelas abertas a partir da tela de boas vindas: (módulo, classe). O módulo só é importado quando a janela é aberta
+# pela primeira vez, em `getWindowClass()`.
+WINDOWS = {
+    'consumo': ('app.windows.water_consumption', 'CreateWaterWindow'),
+    'parametros': ('app.windows.parameters', 'ParametersWindow'),
+    'energia': ('app.windows.energy_consumption', 'EnergyConsumption'),
+    'custos': ('app.windows.custos', 'Custos'),
+    'hidrico': ('app.windows.hydric', 'HydricBalance'),
+    'banco': ('app.windows.database', 'Database'),
+    'pdf': ('app.pdf_export', 'ExportPDF'),
+    'sobre': ('app.windows.about', 'About'),
+}
 
 SOFTWARE_NAME = 'LENHS / Diagnóstico Hidroenergético'
 
@@ -29,6 +38,12 @@ Caixa Postal 15029
 Av. Bento Gonçalves, 9500
 91501-970 - Porto Alegre - RS - Brasil"""
 
+def getWindowClass(name):
+    ''' Retorna a classe da janela `name` de `WINDOWS`, importando o módulo dela se ainda não tiver sido importado. '''
+
+    module, cls = WINDOWS[name]
+    return getattr(importlib.import_module(module), cls)
+
 class WelcomeWindow(wx.Frame):
     """ Cria a janela de boas vindas. """
 
@@ -188,13 +203,13 @@ class WelcomeWindow(wx.Frame):
             dialog.ShowModal()
             return
 
-        window = pdf_export.ExportPDF(self)
+        window = getWindowClass('pdf')(self)
         window.ShowModal()
 
     def OnAbout(self, event):
         ''' Chamada quando o usuário clica no botão Sobre. '''
 
-        window = about.About(self)
+        window = getWindowClass('sobre')(self)
         window.ShowModal()
 
     def refreshButtons(self):
@@ -233,7 +248,7 @@ class WelcomeWindow(wx.Frame):
         """ Cria a janela de consumo e fecha a de boas vindas. """
 
         self.Hide()
-        self.working_window = water_consumption.CreateWaterWindow(self)
+        self.working_window = getWindowClass('consumo')(self)
         self.working_window.Show()
 
         event.Skip()
@@ -242,7 +257,7 @@ class WelcomeWindow(wx.Frame):
         """ Cria a janela de parametros operacionais do sistema e fecha a de boas vindas. """
 
         self.Hide()
-        self.working_window = parameters.ParametersWindow(self)
+        self.working_window = getWindowClass('parametros')(self)
         self.working_window.Show()
 
         event.Skip()
@@ -251,7 +266,7 @@ class WelcomeWindow(wx.Frame):
         """ Cria a janela de consumo energetico e indicadores hidroenergeticos e fecha a tela de boas vindas. """
 
         self.Hide()
-        self.working_window = energy_consumption.EnergyConsumption(self)
+        self.working_window = getWindowClass('energia')(self)
         self.working_window.Show()
 
         event.Skip()
@@ -260,7 +275,7 @@ class WelcomeWindow(wx.Frame):
         """ Cria a janela de Custos de Operação e Indicadores Financeiros e fecha a tela de boas vindas. """
 
         self.Hide()
-        self.working_window = custos.Custos(self)
+        self.working_window = getWindowClass('custos')(self)
         self.working_window.Show()
 
         event.Skip()
@@ -269,7 +284,7 @@ class WelcomeWindow(wx.Frame):
         """ Cria a janela de Custos de Operacao e Indicadores Financeiros e fecha a tela de boas vindas. """
 
         self.Hide()
-        self.working_window = hydric.HydricBalance(self)
+        self.working_window = getWindowClass('hidrico')(self)
         self.working_window.Show()
 
         event.Skip()
@@ -278,7 +293,7 @@ class WelcomeWindow(wx.Frame):
         """ Abre a janela do banco de dados. """
 
         if not self.databaseWindow:
-            self.databaseWindow = database.Database(self)
+            self.databaseWindow = getWindowClass('banco')(self)
             self.databaseWindow.Show()
 
     def OnHover(self, event, button):